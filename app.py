@@ -31,23 +31,43 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # 4) Create tables
+import os
+import importlib
 from components.db import create_table
-create_table()
+from components.tenancy import TENANCY, open_tenant
 
-# 5) Import run() from each page
-from views.get_started   import run as get_started
-from views.dashboard    import run as dashboard
-from views.finance_entry  import run as add_expense
-from views.stock_tracker import run as stock_tracker
-from views.chatbot      import run as chatbot
+if TENANCY == "user":
+    # Each signed-in user gets their own database file; the choice lasts for
+    # this run's thread. Anonymous sessions get no database at all.
+    if not (getattr(st.user, "is_logged_in", False) and st.user.get("email")):
+        st.info("Log in to open your BudgetWise data.")
+        st.button("Log in", on_click=st.login)
+        st.stop()
+    open_tenant(st.user.email)
+else:
+    create_table()
 
+# Optionally start loading the sentiment model in the background
+if os.getenv("BUDGETWISE_WARMUP", "0") == "1":
+    from components.sentiment import warm_up
+    warm_up()
+
+# 5) Page modules — each is imported only when its page is first selected,
+#    so e.g. the Dashboard never pulls in yfinance or transformers.
 PAGES = {
-    "Get Started":   get_started,
-    "Dashboard":     dashboard,
-    "Add Expense":   add_expense,
-    "Stock Tracker": stock_tracker,
-    "AI Chatbot":    chatbot
+    "Get Started":   "views.get_started",
+    "Dashboard":     "views.dashboard",
+    "Add Expense":   "views.finance_entry",
+    "Stock Tracker": "views.stock_tracker",
+    "AI Chatbot":    "views.chatbot",
+    "Performance":   "views.performance"
 }
+# Left out of the sidebar; opened with ?page=performance
+HIDDEN_PAGES = {"performance": "Performance"}
+
+def load_page(name: str):
+    """Import the page's module on demand and return its run()."""
+    return importlib.import_module(PAGES[name]).run
 
 # 6) Header
 st.markdown("<h1 style='text-align:center;'>BudgetWise – Personal Finance & AI Tracker</h1>", unsafe_allow_html=True)
@@ -58,10 +78,10 @@ if "selection" not in st.session_state:
 
 with st.sidebar:
     st.title("🏦 BudgetWise")
-    st.radio("Navigate", list(PAGES.keys()), key="selection")
+    st.radio("Navigate", [p for p in PAGES if p not in HIDDEN_PAGES.values()], key="selection")
 
 # 8) Run
-PAGES[st.session_state.selection]()
+load_page(HIDDEN_PAGES.get(st.query_params.get("page"), st.session_state.selection))()
 
 # 9) Swipe nav for mobile nav
 components.html("""
@@ -1,15 +1,21 @@
 # components/advisor.py
 
-from components.db import log_trade
+from components.db import log_trade, log_trades
+from components.prices import get_price, get_prices
+from components.metrics import timed
 
-def recommend_trade(symbol: str,
-                    sentiment: float,
-                    mode: str,
-                    income: float,
-                    savings: float) -> tuple[str, float]:
+NEUTRAL_BAND = 0.1  # |sentiment| at or below this is a Hold
+
+def plan_trade(symbol: str,
+               sentiment: float,
+               mode: str,
+               income: float,
+               savings: float,
+               price: float = None) -> tuple[str, float]:
     """
     Given sentiment [-1,1], mode ('Conservative'/'Aggressive'),
-    income & savings, return (recommendation_text, units).
+    income & savings, return (recommendation_text, units) without
+    logging it. Pass `price` to skip the quote lookup.
     """
     # Compute disposable cash
     cash = max(income + savings, 0)
@@ -19,25 +25,64 @@ def recommend_trade(symbol: str,
     else:
         alloc_pct = 0.15  # 15% of cash
 
-    if sentiment > 0.1:
+    if sentiment > NEUTRAL_BAND:
         # buy
         usd = cash * alloc_pct * sentiment
-        units = usd / fetch_price(symbol)
+        units = usd / (price or fetch_price(symbol))
         rec = f"Buy ~{units:.2f} shares ({usd:.2f}$ at sentiment {sentiment:.2f})"
-    elif sentiment < -0.1:
+    elif sentiment < -NEUTRAL_BAND:
         # sell
-        units = cash * alloc_pct * (-sentiment) / fetch_price(symbol)
+        units = cash * alloc_pct * (-sentiment) / (price or fetch_price(symbol))
         rec = f"Sell ~{units:.2f} shares"
     else:
         units = 0.0
         rec = "Hold, sentiment neutral"
+    return rec, units
+
+def recommend_trade(symbol: str,
+                    sentiment: float,
+                    mode: str,
+                    income: float,
+                    savings: float,
+                    price: float = None) -> tuple[str, float]:
+    """
+    plan_trade() and log the result to trade_logs.
+    """
+    rec, units = plan_trade(symbol, sentiment, mode, income, savings, price)
     # Log it
     log_trade(symbol, sentiment, rec, units, mode)
     return rec, units
 
+def recommend_trades(sentiments: dict[str, float],
+                     mode: str,
+                     income: float,
+                     savings: float,
+                     quotes: dict[str, float] = None,
+                     log=None) -> dict[str, tuple[str, float]]:
+    """
+    recommend_trade for a whole watchlist: every non-neutral symbol is
+    priced in one batched quote request and all trades are logged in a
+    single transaction. Pass `quotes` when prices were already fetched;
+    a non-neutral symbol without a price gets no trade. `log` replaces
+    db.log_trades (e.g. with an offline stub).
+    """
+    if quotes is None:
+        to_price = [sym for sym, s in sentiments.items() if abs(s) > NEUTRAL_BAND]
+        quotes = get_prices(to_price) if to_price else {}
+    recs = {}
+    for sym, s in sentiments.items():
+        price = quotes.get(sym.upper())
+        if abs(s) > NEUTRAL_BAND and not price:
+            recs[sym] = (f"No price data for {sym}", 0.0)
+        else:
+            recs[sym] = plan_trade(sym, s, mode, income, savings, price=price)
+    if recs:
+        (log or log_trades)([
+            (sym, sentiments[sym], rec, units, mode) for sym, (rec, units) in recs.items()
+        ])
+    return recs
+
+@timed()
 def fetch_price(symbol: str) -> float:
-    # lightweight: use yfinance here
-    import yfinance as yf
-    ticker = yf.Ticker(symbol)
-    price = ticker.history(period="1d")["Close"][-1]
-    return float(price)
+    # served from the shared price cache; one source call on a miss
+    return get_price(symbol)
@@ -1,47 +1,281 @@
 # components/ai_chatbot.py
 
 import os
+import json
+import time
+import random
+import hashlib
+import threading
+from collections import deque
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
+from components.cache import TTLCache, MISSING
+from components.metrics import timed
 
 load_dotenv()
 GROQ_API_KEY = os.getenv("GROQ_API_KEY")
-GROQ_API_URL = "https://api.groq.com/openai/v1/chat/completions"
+GROQ_API_URL = os.getenv("GROQ_API_URL", "https://api.groq.com/openai/v1/chat/completions")
 
-def call_groq(prompt: str, model: str = "llama3-70b-8192") -> str:
-    """Low-level API call to Groq."""
-    if not GROQ_API_KEY:
-        return "❌ Groq API key missing. Please set GROQ_API_KEY in your .env"
+MAX_RETRIES  = int(os.getenv("GROQ_MAX_RETRIES", "3"))
+BACKOFF_BASE = float(os.getenv("GROQ_BACKOFF_BASE", "0.5"))   # seconds
+MAX_BACKOFF  = float(os.getenv("GROQ_MAX_BACKOFF", str(BACKOFF_BASE * 2 ** MAX_RETRIES)))  # seconds
+CACHE_TTL    = float(os.getenv("GROQ_CACHE_TTL", "3600"))     # seconds
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+# ─── Client layer ──────────────────────────────────────────────────────────────
+# One pooled keep-alive session per process, so repeat calls skip the TCP+TLS
+# handshake, and an LRU/TTL cache so identical requests aren't re-billed.
+
+_session = None
+_session_lock = threading.Lock()
+_responses = TTLCache(maxsize=256, ttl=CACHE_TTL)
+
+_metrics_lock = threading.Lock()
+_metrics = {
+    "requests": 0, "cache_hits": 0, "retries": 0, "errors": 0,
+    "prompt_tokens": 0, "completion_tokens": 0,
+}
+_latencies = deque(maxlen=1000)   # seconds, most recent API calls
+_ttft      = deque(maxlen=1000)   # seconds to first streamed token
+
+def get_session() -> requests.Session:
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                _session = session
+    return _session
+
+def _count(**deltas):
+    with _metrics_lock:
+        for name, value in deltas.items():
+            _metrics[name] += value
+
+def _percentile(values: list[float], q: float) -> float:
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+def groq_metrics() -> dict:
+    """
+    Counters plus percentiles (ms) of total latency for recent uncached
+    calls and of time to first token for streamed ones.
+    """
+    with _metrics_lock:
+        out  = dict(_metrics)
+        lat  = sorted(_latencies)
+        ttft = sorted(_ttft)
+    for q in (50, 95, 99):
+        out[f"p{q}_ms"]      = _percentile(lat, q / 100) * 1000
+        out[f"ttft_p{q}_ms"] = _percentile(ttft, q / 100) * 1000
+    return out
+
+def _cache_key(model: str, messages: list[dict], temperature: float) -> str:
+    raw = json.dumps([model, messages, temperature], sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def _backoff(attempt: int, response) -> float:
+    """
+    Full-jitter exponential backoff, honouring Retry-After when given.
+    Never longer than MAX_BACKOFF, so a server asking for minutes cannot
+    stall the page.
+    """
+    retry_after = response.headers.get("Retry-After") if response is not None else None
+    if retry_after:
+        try:
+            return min(max(float(retry_after), 0.0), MAX_BACKOFF)
+        except ValueError:
+            pass
+    return random.uniform(0, BACKOFF_BASE * 2 ** attempt)
+
+@timed("ai_chatbot.request")
+def _request(payload: dict, stream: bool = False) -> requests.Response:
+    """
+    POST to the chat endpoint, retrying 429/5xx and connection errors.
+    Returns the successful response (unread when `stream` is set).
+    """
     headers = {
         "Authorization": f"Bearer {GROQ_API_KEY}",
         "Content-Type": "application/json",
     }
-    payload = {
+    for attempt in range(MAX_RETRIES + 1):
+        r = None
+        try:
+            r = get_session().post(
+                GROQ_API_URL, headers=headers, json=payload, timeout=15, stream=stream
+            )
+            if r.status_code not in RETRY_STATUS:
+                r.raise_for_status()
+                return r
+        except (requests.ConnectionError, requests.Timeout):
+            if attempt == MAX_RETRIES:
+                raise
+        if attempt == MAX_RETRIES:
+            r.raise_for_status()
+        if r is not None:
+            r.close()
+        _count(retries=1)
+        time.sleep(_backoff(attempt, r))
+
+def _post(payload: dict) -> dict:
+    start = time.perf_counter()
+    data = _request(payload).json()
+    with _metrics_lock:
+        _latencies.append(time.perf_counter() - start)
+    return data
+
+def _count_usage(usage: dict):
+    if usage:
+        _count(
+            prompt_tokens=usage.get("prompt_tokens", 0),
+            completion_tokens=usage.get("completion_tokens", 0),
+        )
+
+def _parse_completion(data: dict) -> str:
+    _count_usage(data.get("usage"))
+    return data["choices"][0]["message"]["content"].strip()
+
+@timed()
+def chat_completion(messages: list[dict],
+                    model: str = "llama3-70b-8192",
+                    temperature: float = 0.7,
+                    max_tokens: int = 800,
+                    use_cache: bool = True) -> str:
+    """
+    Run a chat completion and return the reply text. Identical
+    (model, messages, temperature) requests are answered from cache.
+    Raises on failure; call_groq() turns errors into a friendly message.
+    """
+    key = _cache_key(model, messages, temperature)
+    _count(requests=1)
+    if use_cache:
+        cached = _responses.get(key)
+        if cached is not MISSING:
+            _count(cache_hits=1)
+            return cached
+
+    content = _parse_completion(_post({
         "model": model,
-        "messages": [
-            {"role": "system", "content": "You are an AI financial assistant."},
-            {"role": "user",   "content": prompt}
-        ],
-        "max_tokens": 800,
-        "temperature": 0.7,
-    }
+        "messages": messages,
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+    }))
+    if use_cache:
+        _responses.set(key, content)
+    return content
+
+def stream_completion(messages: list[dict],
+                      model: str = "llama3-70b-8192",
+                      temperature: float = 0.7,
+                      max_tokens: int = 800,
+                      use_cache: bool = True):
+    """
+    Like chat_completion(), but yields the reply in chunks as the server
+    sends them (SSE). Closing the generator early, e.g. when Streamlit
+    stops a rerun, closes the HTTP response. If the server rejects or
+    ignores streaming, falls back to the non-streaming reply.
+    """
+    key = _cache_key(model, messages, temperature)
+    if use_cache:
+        cached = _responses.get(key)
+        if cached is not MISSING:
+            _count(requests=1, cache_hits=1)
+            yield cached
+            return
+
+    start = time.perf_counter()
+    parts = []
+    try:
+        r = _request({
+            "model": model,
+            "messages": messages,
+            "max_tokens": max_tokens,
+            "temperature": temperature,
+            "stream": True,
+        }, stream=True)
+    except requests.HTTPError as e:
+        # Streaming rejected outright (not a transient error): fall back
+        if e.response is not None and e.response.status_code in RETRY_STATUS:
+            raise
+        yield chat_completion(messages, model, temperature, max_tokens, use_cache)
+        return
+
+    _count(requests=1)
+    with r:
+        if "text/event-stream" not in r.headers.get("Content-Type", ""):
+            # The server ignored stream=True and sent a normal completion
+            content = _parse_completion(r.json())
+            parts.append(content)
+            yield content
+        else:
+            # SSE is UTF-8 by definition; without a charset requests would
+            # decode text/* as ISO-8859-1
+            r.encoding = "utf-8"
+            for line in r.iter_lines(chunk_size=None, decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                chunk = json.loads(data)
+                _count_usage(chunk.get("usage") or (chunk.get("x_groq") or {}).get("usage"))
+                choices = chunk.get("choices") or [{}]
+                text = (choices[0].get("delta") or {}).get("content")
+                if text:
+                    if not parts:
+                        with _metrics_lock:
+                            _ttft.append(time.perf_counter() - start)
+                    parts.append(text)
+                    yield text
+
+    with _metrics_lock:
+        _latencies.append(time.perf_counter() - start)
+    if use_cache and parts:
+        _responses.set(key, "".join(parts).strip())
+
+def _messages(prompt: str) -> list[dict]:
+    return [
+        {"role": "system", "content": "You are an AI financial assistant."},
+        {"role": "user",   "content": prompt}
+    ]
+
+@timed()
+def call_groq(prompt: str, model: str = "llama3-70b-8192") -> str:
+    """Low-level API call to Groq."""
+    if not GROQ_API_KEY:
+        return "❌ Groq API key missing. Please set GROQ_API_KEY in your .env"
     try:
-        r = requests.post(GROQ_API_URL, headers=headers, json=payload, timeout=15)
-        r.raise_for_status()
-        return r.json()["choices"][0]["message"]["content"].strip()
+        return chat_completion(_messages(prompt), model=model)
     except Exception as e:
-        print("Groq API error:", e, getattr(r, "text", ""))
+        _count(errors=1)
+        print("Groq API error:", e, getattr(getattr(e, "response", None), "text", ""))
         return "❌ Sorry, I couldn’t reach the AI service."
 
-def ask_budgetwise_ai(query: str) -> str:
+def stream_groq(prompt: str, model: str = "llama3-70b-8192"):
+    """Streaming call_groq(): yields text chunks, e.g. for st.write_stream."""
+    if not GROQ_API_KEY:
+        yield "❌ Groq API key missing. Please set GROQ_API_KEY in your .env"
+        return
+    try:
+        yield from stream_completion(_messages(prompt), model=model)
+    except Exception as e:
+        _count(errors=1)
+        print("Groq API error:", e, getattr(getattr(e, "response", None), "text", ""))
+        yield "❌ Sorry, I couldn’t reach the AI service."
+
+def ask_budgetwise_ai(query: str, stream: bool = False):
     """
         answer any single user question about budgeting.
+        With stream=True, returns a generator of text chunks.
     """
     prompt = (
         f"User question: {query}\n\n"
         "Give a concise, actionable answer in the context of personal budgeting."
     )
-    return call_groq(prompt)
+    return stream_groq(prompt) if stream else call_groq(prompt)
 
 def ask_budgetwise_budget(summary: dict) -> str:
     """
@@ -61,10 +295,12 @@ def ask_financial_profile(income: float,
                           goal_1m: float, goal_3m: float,
                           goal_6m: float, goal_1y: float,
                           total_expenses: float,
-                          savings: float, debt: float) -> str:
+                          savings: float, debt: float,
+                          stream: bool = False):
     """
     Generate a personalized AI summary using the full profile:
       - income, goals (1m/3m/6m/1y), expenses, savings, debt
+    With stream=True, returns a generator of text chunks.
     """
     lines = [
         f"After-tax income: ${income:.2f}",
@@ -84,4 +320,4 @@ def ask_financial_profile(income: float,
         "– identify any red flags; – suggest an optimal monthly budget split; "
         "– propose adjustments to meet my investment goals; – and give 3–5 concrete next steps."
     )
-    return call_groq(prompt)
+    return stream_groq(prompt) if stream else call_groq(prompt)
@@ -0,0 +1,378 @@
+# components/categorize.py
+
+import os
+import time
+import atexit
+import threading
+import unicodedata
+import numpy as np
+from components import db
+
+MODEL_NAME = os.getenv("BUDGETWISE_EMBED_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+BATCH_SIZE = int(os.getenv("BUDGETWISE_EMBED_BATCH_SIZE", "128"))
+
+K              = 7      # neighbours that vote on a category
+MIN_CONFIDENCE = 0.5    # share of the vote needed to use a suggestion
+MAX_ROWS       = int(os.getenv("BUDGETWISE_CATEGORY_INDEX_ROWS", "100000"))  # distinct notes kept
+SAVE_INTERVAL  = float(os.getenv("BUDGETWISE_CATEGORY_SAVE_S", "300"))        # min seconds between saves
+
+AUTO = "Auto (from note)"   # category choice that asks for a suggestion
+
+# Starter examples so suggestions work before anything has been labelled
+SEED_EXAMPLES = {
+    "Food":          ["groceries", "supermarket", "restaurant dinner", "coffee", "lunch", "bakery"],
+    "Transport":     ["uber ride", "bus ticket", "train fare", "gas station fuel", "parking", "taxi"],
+    "Utilities":     ["electricity bill", "water bill", "internet", "phone bill", "gas utility"],
+    "Entertainment": ["netflix subscription", "movie tickets", "concert", "video game", "spotify"],
+    "Rent":          ["monthly rent", "landlord payment", "apartment lease"],
+}
+
+# ─── Model ─────────────────────────────────────────────────────────────────────
+# sentence-transformers and the weights load on first use, like the sentiment
+# pipeline, so pages that never categorize never pay for them.
+
+_model = None
+_model_lock = threading.Lock()
+
+def get_model():
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                from sentence_transformers import SentenceTransformer
+                _model = SentenceTransformer(MODEL_NAME, device="cpu")
+    return _model
+
+def _normalize(text: str) -> str:
+    return " ".join(unicodedata.normalize("NFKC", text or "").casefold().split())
+
+def encode(texts: list[str], batch_size: int = BATCH_SIZE) -> np.ndarray:
+    """Unit-length float32 embeddings, one row per text."""
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+    return get_model().encode(
+        list(texts),
+        batch_size=batch_size,
+        convert_to_numpy=True,
+        normalize_embeddings=True,
+        show_progress_bar=False,
+    ).astype(np.float32, copy=False)
+
+# ─── Vector index ──────────────────────────────────────────────────────────────
+# One row per distinct normalized note: its embedding and how often it was
+# filed under each category. A note seen 10,000 times is encoded once.
+
+class CategoryIndex:
+    """
+    Labelled note embeddings with vectorized cosine kNN voting.
+    add() builds new lists and arrays and swaps them in rather than
+    mutating the old ones, so a shallow copy() stays consistent while
+    the original is updated.
+    """
+
+    def __init__(self, texts=(), vectors=None, counts=None, labels=(), watermark: int = 0):
+        self.texts     = list(texts)
+        self.rows      = {t: i for i, t in enumerate(self.texts)}
+        self.vectors   = vectors if vectors is not None else np.zeros((0, 0), dtype=np.float32)
+        self.labels    = list(labels)
+        self.counts    = counts if counts is not None else np.zeros((0, 0), dtype=np.float32)
+        self.watermark = watermark   # highest expenses.id already indexed
+
+    def __len__(self):
+        return len(self.texts)
+
+    # ─── persistence ───
+
+    def save(self, path: str):
+        tmp = path + ".tmp.npz"
+        np.savez(
+            tmp,
+            texts=np.array(self.texts, dtype=str),
+            vectors=self.vectors,
+            counts=self.counts,
+            labels=np.array(self.labels, dtype=str),
+            watermark=np.int64(self.watermark),
+            model=np.array(MODEL_NAME),
+        )
+        os.replace(tmp, path)   # readers never see a half-written file
+
+    @classmethod
+    def load(cls, path: str):
+        """The index stored at `path`, or None if missing or from another model."""
+        if not os.path.exists(path):
+            return None
+        with np.load(path) as data:
+            if str(data["model"]) != MODEL_NAME:
+                return None
+            return cls(
+                texts=data["texts"].tolist(),
+                vectors=data["vectors"],
+                counts=data["counts"],
+                labels=data["labels"].tolist(),
+                watermark=int(data["watermark"]),
+            )
+
+    def copy(self) -> "CategoryIndex":
+        """A snapshot sharing this index's current lists and arrays."""
+        snapshot = CategoryIndex.__new__(CategoryIndex)
+        snapshot.__dict__.update(self.__dict__)
+        return snapshot
+
+    # ─── updates ───
+
+    def add(self, notes: list[str], categories: list[str]):
+        """
+        Count each (note, category) pair, encoding only notes not yet in
+        the index. Beyond MAX_ROWS the oldest notes are dropped.
+        """
+        pairs = {}
+        for note, category in zip(notes, categories):
+            text = _normalize(note)
+            if text:
+                key = (text, category)
+                pairs[key] = pairs.get(key, 0) + 1
+        if not pairs:
+            return
+        texts, rows, vectors, labels = self.texts, self.rows, self.vectors, self.labels
+        counts = self.counts.reshape(len(texts), len(labels))
+        new_texts = list(dict.fromkeys(t for t, _ in pairs if t not in rows))
+        if new_texts:
+            encoded = encode(new_texts)
+            vectors = encoded if not len(texts) else np.vstack([vectors, encoded])
+            counts  = np.vstack([counts, np.zeros((len(new_texts), len(labels)), dtype=np.float32)])
+            rows    = {**rows, **{t: len(texts) + i for i, t in enumerate(new_texts)}}
+            texts   = texts + new_texts
+        else:
+            counts = counts.copy()
+        new_labels = [c for c in dict.fromkeys(c for _, c in pairs) if c not in labels]
+        if new_labels:
+            labels = labels + new_labels
+            counts = np.pad(counts, ((0, 0), (0, len(new_labels))))
+        columns = {label: i for i, label in enumerate(labels)}
+        for (text, category), n in pairs.items():
+            counts[rows[text], columns[category]] += n
+
+        if len(texts) > MAX_ROWS:
+            drop = len(texts) - MAX_ROWS
+            texts, vectors, counts = texts[drop:], vectors[drop:], counts[drop:]
+            rows = {t: i for i, t in enumerate(texts)}
+        self.texts, self.rows, self.vectors, self.counts, self.labels = texts, rows, vectors, counts, labels
+
+    # ─── queries ───
+
+    def classify(self, notes: list[str], k: int = K) -> list[tuple[str, float]]:
+        """
+        (category, confidence) per note by similarity-weighted kNN vote;
+        confidence is the winning share of the vote. (None, 0.0) when
+        the index is empty or the note is blank.
+        """
+        texts = [_normalize(n) for n in notes]
+        if not len(self):
+            return [(None, 0.0)] * len(texts)
+        unique = [t for t in dict.fromkeys(texts) if t]
+        known   = [t for t in unique if t in self.rows]
+        unknown = [t for t in unique if t not in self.rows]
+        queries = np.zeros((len(unique), self.vectors.shape[1]), dtype=np.float32)
+        position = {t: i for i, t in enumerate(known + unknown)}
+        if known:
+            queries[:len(known)] = self.vectors[[self.rows[t] for t in known]]
+        if unknown:
+            queries[len(known):] = encode(unknown)
+
+        # Each neighbour votes with its category distribution, weighted by similarity
+        share = self.counts / np.maximum(self.counts.sum(axis=1, keepdims=True), 1e-9)
+        k = min(k, len(self))
+        step = max(1, (1 << 25) // len(self))   # ~128 MB of similarities per block
+        best = np.zeros(len(unique), dtype=np.int64)
+        conf = np.zeros(len(unique), dtype=np.float32)
+        for start in range(0, len(unique), step):
+            sims = queries[start:start + step] @ self.vectors.T
+            top  = np.argpartition(-sims, k - 1, axis=1)[:, :k]
+            weights = np.clip(np.take_along_axis(sims, top, axis=1), 0.0, None)
+            votes = np.einsum("qk,qkl->ql", weights, share[top])
+            total = votes.sum(axis=1)
+            best[start:start + step] = votes.argmax(axis=1)
+            conf[start:start + step] = np.where(total > 0, votes.max(axis=1) / np.maximum(total, 1e-9), 0.0)
+
+        out = []
+        for text in texts:
+            if not text:
+                out.append((None, 0.0))
+            else:
+                i = position[text]
+                out.append((self.labels[best[i]], float(conf[i])))
+        return out
+
+# ─── Per-database index ────────────────────────────────────────────────────────
+# Stored next to the database (budget.db -> budget.categories.npz). Before each
+# use, expenses added since the last sync are folded in incrementally. The file
+# is a cache: it is rewritten at most every SAVE_INTERVAL seconds (and at exit),
+# and anything newer than its watermark is simply synced again after a restart.
+
+_indexes  = {}   # database path -> CategoryIndex
+_locks    = {}   # database path -> lock held while its index is loaded or synced
+_saved_at = {}   # database path -> time.monotonic() of the last save
+_dirty    = set()
+_indexes_lock = threading.Lock()   # guards the dicts above, never held while encoding
+
+def index_path(path: str = None) -> str:
+    return os.path.splitext(path or db.current_path())[0] + ".categories.npz"
+
+def _path_lock(key: str) -> threading.Lock:
+    with _indexes_lock:
+        return _locks.setdefault(key, threading.Lock())
+
+def _save(key: str, index: "CategoryIndex", force: bool = False):
+    # Caller holds the path lock
+    now = time.monotonic()
+    if force or now - _saved_at.get(key, -SAVE_INTERVAL) >= SAVE_INTERVAL:
+        index.save(index_path(key))
+        _saved_at[key] = now
+        _dirty.discard(key)
+    else:
+        _dirty.add(key)
+
+def _seeded() -> CategoryIndex:
+    index = CategoryIndex()
+    notes, cats = [], []
+    for category, examples in SEED_EXAMPLES.items():
+        notes += examples
+        cats  += [category] * len(examples)
+    index.add(notes, cats)
+    return index
+
+def sync_index(index: CategoryIndex, path: str = None, chunk: int = 50_000) -> int:
+    """Fold labelled expenses newer than the index's watermark into it. Returns rows read."""
+    read = 0
+    while True:
+        with db.get_connection(path) as conn:
+            rows = conn.execute("""
+                SELECT id, note, category FROM expenses
+                WHERE id > ? AND note IS NOT NULL AND note != '' AND category != 'Other'
+                ORDER BY id LIMIT ?
+            """, (index.watermark, chunk)).fetchall()
+            if not rows:
+                # Skip past unlabelled rows too, so they are not re-read
+                newest = conn.execute("SELECT MAX(id) FROM expenses").fetchone()[0]
+                index.watermark = max(index.watermark, newest or 0)
+                return read
+        ids, notes, cats = zip(*rows)
+        index.add(list(notes), list(cats))
+        index.watermark = ids[-1]
+        read += len(rows)
+
+def get_index(path: str = None) -> CategoryIndex:
+    """The category index for a database, loaded once and kept up to date."""
+    key = path or db.current_path()
+    with _path_lock(key):
+        index = _indexes.get(key)
+        if index is None:
+            index = CategoryIndex.load(index_path(key)) or _seeded()
+            _indexes[key] = index
+        before = (index.watermark, len(index))
+        sync_index(index, key)
+        if (index.watermark, len(index)) != before:
+            _save(key, index)
+        return index
+
+def rebuild_index(path: str = None) -> CategoryIndex:
+    """Re-encode every labelled expense from scratch (e.g. after bulk edits)."""
+    key = path or db.current_path()
+    with _path_lock(key):
+        index = _seeded()
+        sync_index(index, key)
+        _save(key, index, force=True)
+        _indexes[key] = index
+        return index
+
+@atexit.register
+def flush_indexes():
+    """Save every index with changes not yet written."""
+    for key in list(_dirty):
+        with _path_lock(key):
+            if key in _dirty:
+                _save(key, _indexes[key], force=True)
+
+# ─── Suggestions ───────────────────────────────────────────────────────────────
+
+def suggest_categories(notes: list[str], path: str = None, k: int = K) -> list[tuple[str, float]]:
+    """(category, confidence) for each note; see CategoryIndex.classify."""
+    key = path or db.current_path()
+    index = get_index(key)
+    with _path_lock(key):   # another thread may be adding to it
+        snapshot = index.copy()
+    return snapshot.classify(notes, k)
+
+def categorize(notes: list[str], default: str = "Other",
+               min_confidence: float = MIN_CONFIDENCE, path: str = None) -> list[str]:
+    """Suggested category per note, or `default` when unsure."""
+    return [
+        cat if cat is not None and conf >= min_confidence else default
+        for cat, conf in suggest_categories(notes, path)
+    ]
+
+def suggest_category(note: str, default: str = "Other", path: str = None) -> str:
+    return categorize([note], default, path=path)[0]
+
+def resolve_category(category: str, note: str, path: str = None) -> str:
+    """`category` as chosen in a form, with AUTO replaced by a suggestion."""
+    if category != AUTO:
+        return category
+    try:
+        return suggest_category(note, path=path)
+    except Exception:
+        # sentence-transformers not installed, or the model cannot be
+        # downloaded (offline): the expense is still saved
+        return "Other"
+
+# ─── Benchmark ─────────────────────────────────────────────────────────────────
+# python -m components.categorize [ROWS]
+# Builds an index from a synthetic labelled history in a temp db, then
+# bulk-categorizes ROWS import-style notes (many repeated payees).
+
+if __name__ == "__main__":
+    import sys
+    import tempfile
+    import time
+
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    rng = np.random.default_rng(0)
+    payees = {
+        "Food":          ["Grocery Mart", "Corner Bakery", "Sushi Place", "Coffee House", "Pizza Express"],
+        "Transport":     ["City Transit", "Uber Trip", "Shell Fuel", "Metro Parking"],
+        "Utilities":     ["Power Co", "Water Dept", "Fiber Internet", "Mobile Phone Bill"],
+        "Entertainment": ["Cinema 9", "Netflix", "Concert Hall", "Game Store"],
+        "Rent":          ["Landlord LLC", "Apartment Rent"],
+    }
+    pairs = [(p, c) for c, ps in payees.items() for p in ps]
+
+    def notes_for(n):
+        picks = rng.integers(0, len(pairs), n)
+        refs  = rng.integers(0, 2000, n)   # store numbers make notes partly unique
+        return ([f"{pairs[i][0]} #{r}" for i, r in zip(picks, refs)],
+                [pairs[i][1] for i in picks])
+
+    db.DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+    db.create_table()
+    notes, cats = notes_for(20_000)
+    with db.get_connection() as conn:
+        db.bulk_insert_expenses(conn, [(1.0, c, n, None, None) for n, c in zip(notes, cats)])
+
+    start = time.perf_counter()
+    index = rebuild_index()
+    print(f"Indexed 20,000 labelled expenses ({len(index):,} distinct notes) "
+          f"in {time.perf_counter() - start:.2f}s")
+
+    queries, truth = notes_for(rows)
+    start = time.perf_counter()
+    predicted = categorize(queries)
+    elapsed = time.perf_counter() - start
+    accuracy = np.mean([p == t for p, t in zip(predicted, truth)])
+    print(f"Categorized {rows:,} rows in {elapsed:.2f}s "
+          f"({rows / elapsed:,.0f} rows/s, accuracy {accuracy:.1%})")
+
+    with db.get_connection() as conn:
+        db.bulk_insert_expenses(conn, [(1.0, "Food", "Farmers Market stall", None, None)])
+    start = time.perf_counter()
+    get_index()
+    print(f"Incremental sync of 1 new expense: {(time.perf_counter() - start) * 1000:.1f} ms")
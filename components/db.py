@@ -3,20 +3,427 @@
 import sqlite3
 import pandas as pd
 import os
-from datetime import datetime
+import hashlib
+import re
+import queue
+import threading
+import time
+import atexit
+import itertools
+from collections import OrderedDict
+from concurrent.futures import Future
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from components import metrics
+from components.metrics import timed
 
 # ─── Database file setup ───────────────────────────────────────────────────────
 BASE_DIR = os.path.dirname(os.path.dirname(__file__))
 DB_PATH  = os.path.join(BASE_DIR, "data", "budget.db")
 os.makedirs(os.path.dirname(DB_PATH), exist_ok=True)
 
-def connect_db():
-    return sqlite3.connect(DB_PATH, check_same_thread=False)
+# The database used when no path is passed. Unset means DB_PATH; a session
+# serving one tenant points it at that tenant's file (see use_database()).
+# Context-local, so every Streamlit session thread has its own.
+_current_path = ContextVar("budgetwise_db_path", default=None)
 
-def create_table():
-    conn = connect_db()
-    # Expenses table
-    conn.execute("""
+def current_path() -> str:
+    return _current_path.get() or DB_PATH
+
+def use_database(path: str = None):
+    """Make `path` the default database for this thread/context."""
+    return _current_path.set(path)
+
+@contextmanager
+def database(path: str):
+    """Temporarily make `path` the default database."""
+    token = _current_path.set(path)
+    try:
+        yield path
+    finally:
+        _current_path.reset(token)
+
+# ─── Connection pool ───────────────────────────────────────────────────────────
+POOL_SIZE = int(os.getenv("BUDGETWISE_DB_POOL_SIZE", "8"))
+# Pools (and their file handles) kept open at once; the least recently used
+# database is closed beyond this, which matters once every user has a file.
+MAX_OPEN_DATABASES = int(os.getenv("BUDGETWISE_MAX_OPEN_DATABASES", "128"))
+
+# Applied to every new connection. WAL lets readers run alongside the single
+# writer instead of failing with "database is locked".
+PRAGMAS = {
+    "journal_mode": "WAL",
+    "synchronous":  "NORMAL",     # safe with WAL, far fewer fsyncs than FULL
+    "cache_size":   -16000,       # negative = KiB, so ~16 MB page cache
+    "mmap_size":    268435456,    # 256 MB memory-mapped reads
+    "busy_timeout": 5000,         # ms to wait on a lock before erroring
+    "temp_store":   "MEMORY",
+}
+
+# Called with every new connection, e.g. to install a trace callback that
+# counts queries. Register before the first query to see every connection.
+_connect_hooks = []
+
+def on_connect(hook):
+    """Register `hook(conn)` to run on each connection opened from now on."""
+    _connect_hooks.append(hook)
+    return hook
+
+class _TimedCursor(sqlite3.Cursor):
+    """Reports each statement's execute() time to metrics while enabled (slow-query log)."""
+
+    def execute(self, sql, parameters=()):
+        if not metrics.ENABLED:
+            return super().execute(sql, parameters)
+        start = time.perf_counter()
+        try:
+            return super().execute(sql, parameters)
+        finally:
+            metrics.observe_query(sql, time.perf_counter() - start)
+
+    def executemany(self, sql, seq_of_parameters):
+        if not metrics.ENABLED:
+            return super().executemany(sql, seq_of_parameters)
+        start = time.perf_counter()
+        try:
+            return super().executemany(sql, seq_of_parameters)
+        finally:
+            metrics.observe_query(sql, time.perf_counter() - start)
+
+class _TimedConnection(sqlite3.Connection):
+    def cursor(self, factory=_TimedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+def connect_db(path: str = None):
+    """Open a new tuned connection. Prefer get_connection() for pooled access."""
+    conn = sqlite3.connect(path or current_path(), check_same_thread=False, factory=_TimedConnection)
+    for name, value in PRAGMAS.items():
+        conn.execute(f"PRAGMA {name}={value}")
+    for hook in _connect_hooks:
+        hook(conn)
+    return conn
+
+_watch_ids = itertools.count()
+
+class ConnectionPool:
+    """
+    Thread-safe pool of long-lived connections to one database file.
+    Opens up to `size` connections lazily; callers beyond that block
+    until a connection is released.
+    """
+
+    def __init__(self, path: str, size: int = POOL_SIZE):
+        self.path    = path
+        self.size    = size
+        self._idle   = queue.LifoQueue()
+        self._opened = 0
+        self._lock   = threading.Lock()
+        self._watch  = None   # see file_version()
+        self.closed  = False
+
+    def acquire(self) -> sqlite3.Connection:
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            if self._opened < self.size:
+                self._opened += 1
+                open_new = True
+            else:
+                open_new = False
+        if open_new:
+            try:
+                return connect_db(self.path)
+            except Exception:
+                with self._lock:
+                    self._opened -= 1
+                raise
+        return self._idle.get()
+
+    def release(self, conn: sqlite3.Connection):
+        if conn.in_transaction:
+            conn.rollback()
+        if self.closed:
+            conn.close()
+            with self._lock:
+                self._opened -= 1
+            return
+        self._idle.put(conn)
+
+    def file_version(self):
+        """
+        PRAGMA data_version of a connection that never writes: it changes
+        whenever any other connection, in this process or another, commits.
+        Paired with a number unique to that connection, as a reopened one
+        starts counting again. None once the pool is closed.
+        """
+        with self._lock:
+            if self.closed:   # close() would never see a connection opened now
+                return None
+            if self._watch is None:
+                self._watch = sqlite3.connect(self.path, check_same_thread=False)
+                self._watch_id = next(_watch_ids)
+            return self._watch_id, self._watch.execute("PRAGMA data_version").fetchone()[0]
+
+    def close(self):
+        """
+        Close every idle connection; checked-out ones are closed when
+        they are released.
+        """
+        self.closed = True
+        with self._lock:
+            if self._watch is not None:
+                self._watch.close()
+                self._watch = None
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
+            with self._lock:
+                self._opened -= 1
+
+_pools = OrderedDict()   # path -> ConnectionPool, least recently used first
+_pools_lock = threading.Lock()
+
+def get_pool(path: str = None) -> ConnectionPool:
+    path = path or current_path()
+    evicted = []
+    with _pools_lock:
+        pool = _pools.get(path)
+        if pool is None or pool.closed:
+            pool = _pools[path] = ConnectionPool(path)
+            while len(_pools) > MAX_OPEN_DATABASES:
+                evicted.append(_pools.popitem(last=False)[1])
+        else:
+            _pools.move_to_end(path)
+    for old in evicted:
+        old.close()
+    return pool
+
+def close_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+_schemas_ready = set()
+
+# ─── Data versions ─────────────────────────────────────────────────────────────
+# A per-table counter in the data_versions table, bumped by triggers on every
+# insert, update and delete (see migration 7), so writes from any connection
+# or process count, and only the tables they touch move. Readers key derived
+# data (summaries, figures) on it: an unchanged table means a cache hit for
+# the price of one small query.
+
+TABLES = ("expenses", "financial_profiles", "trade_logs")
+
+def data_version(*tables: str, path: str = None) -> tuple[int, ...]:
+    """Current version of each table (all of TABLES if none given)."""
+    with get_connection(path) as conn:
+        versions = dict(conn.execute("SELECT tbl, n FROM data_versions").fetchall())
+    return tuple(versions.get(t, 0) for t in tables or TABLES)
+
+def bump_version(conn, *tables: str):
+    """
+    Count a write the triggers do not see (bulk loads with triggers
+    deferred or dropped, rollup rebuilds) in the caller's transaction.
+    """
+    conn.executemany("UPDATE data_versions SET n = n + 1 WHERE tbl = ?", [(t,) for t in tables])
+
+def file_version(path: str = None) -> tuple[int, int]:
+    """
+    Changes after every commit to the database file, whatever the table,
+    including those made by other processes. One PRAGMA on a dedicated
+    connection.
+    """
+    while True:
+        version = get_pool(path).file_version()
+        if version is not None:
+            return version
+        # The pool was evicted between get_pool() and the PRAGMA; use its successor
+
+@contextmanager
+def get_connection(path: str = None, schema: list[str] = None):
+    """
+    Borrow a pooled connection. Commits on success, rolls back on error,
+    and always returns the connection to the pool.
+
+    `schema` is a list of idempotent CREATE ... IF NOT EXISTS statements
+    for side databases (caches, market data); they run the first time
+    `path` is used in this process.
+    """
+    pool = get_pool(path)
+    conn = pool.acquire()
+    try:
+        if schema and pool.path not in _schemas_ready:
+            for sql in schema:
+                conn.execute(sql)
+            conn.commit()
+            _schemas_ready.add(pool.path)
+        yield conn
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        pool.release(conn)
+
+# ─── Write-behind queue ────────────────────────────────────────────────────────
+# With BUDGETWISE_WRITE_BEHIND=1 the single-row write helpers (add/update/
+# delete_expense, add_financial_profile, log_trade) hand their statement to
+# one writer thread instead of committing in the caller. The writer takes
+# everything queued, waits up to WRITE_BATCH_MS for more, and commits the
+# batch as one transaction per database: a burst of N writes costs one lock
+# acquisition and one commit instead of N. Each caller gets a Future that
+# resolves after its row is committed; call .result() before reading it back.
+# Queued writes are committed when the process exits normally.
+
+WRITE_BEHIND    = os.getenv("BUDGETWISE_WRITE_BEHIND", "0") == "1"
+WRITE_BATCH_MS  = float(os.getenv("BUDGETWISE_WRITE_BATCH_MS", "2"))
+WRITE_BATCH_MAX = 1000
+
+def _write_result(sql: str, cursor) -> int:
+    # New row id for inserts, affected row count for everything else
+    return cursor.lastrowid if sql.lstrip()[:6].upper() == "INSERT" else cursor.rowcount
+
+class WriteQueue:
+    """A single writer thread that group-commits submitted statements."""
+
+    def __init__(self, batch_ms: float = WRITE_BATCH_MS, batch_max: int = WRITE_BATCH_MAX):
+        self.batch_ms  = batch_ms
+        self.batch_max = batch_max
+        self.closed    = False
+        self._queue    = queue.Queue()
+        self._lock     = threading.Lock()
+        self._thread   = threading.Thread(target=self._run, name="budgetwise-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, sql: str, params=(), path: str = None) -> Future:
+        future = Future()
+        with self._lock:
+            if self.closed:
+                raise RuntimeError("write queue is closed")
+            self._queue.put((path or current_path(), sql, params, future))
+        return future
+
+    def close(self, timeout: float = None):
+        """Commit everything already submitted, then stop the thread."""
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+            self._queue.put(None)
+        self._thread.join(timeout)
+
+    def _run(self):
+        stop = False
+        while not stop:
+            item = self._queue.get()
+            if item is None:
+                break
+            batch = [item]
+            deadline = time.monotonic() + self.batch_ms / 1000
+            while len(batch) < self.batch_max:
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self._queue.get(timeout=remaining) if remaining > 0 else self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is None:
+                    stop = True
+                    break
+                batch.append(item)
+            by_path = {}
+            for item in batch:
+                by_path.setdefault(item[0], []).append(item[1:])
+            for path, items in by_path.items():
+                self._commit(path, items)
+
+    def _commit(self, path: str, items: list):
+        # One transaction; a savepoint per statement so a failing write
+        # (e.g. a constraint) fails only its own Future.
+        done = []
+        try:
+            with get_connection(path) as conn:
+                conn.execute("BEGIN IMMEDIATE")
+                for sql, params, future in items:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    conn.execute("SAVEPOINT write")
+                    try:
+                        cursor = conn.execute(sql, params)
+                    except sqlite3.Error as e:
+                        conn.execute("ROLLBACK TO write")
+                        conn.execute("RELEASE write")
+                        future.set_exception(e)
+                        continue
+                    conn.execute("RELEASE write")
+                    done.append((future, _write_result(sql, cursor)))
+        except Exception as e:
+            for future, _ in done:
+                future.set_exception(e)
+            for _, _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for future, result in done:
+            future.set_result(result)
+
+_writer = None
+_writer_lock = threading.Lock()
+
+def get_writer() -> WriteQueue:
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = WriteQueue()
+        return _writer
+
+def stop_writer():
+    """Commit queued writes and stop the writer thread (runs at exit)."""
+    global _writer
+    with _writer_lock:
+        writer, _writer = _writer, None
+    if writer is not None:
+        writer.close()
+
+atexit.register(stop_writer)
+
+@timed()
+def write(sql: str, params=()) -> Future:
+    """
+    Run one write statement against the current database: queued to the
+    writer thread in write-behind mode, otherwise committed right away.
+    Either way returns a Future of the new row id (INSERT) or row count.
+    """
+    if WRITE_BEHIND:
+        return get_writer().submit(sql, params)
+    with get_connection() as conn:
+        result = _write_result(sql, conn.execute(sql, params))
+    future = Future()
+    future.set_result(result)
+    return future
+
+# ─── Schema & migrations ───────────────────────────────────────────────────────
+# Each entry upgrades the schema to its version number. They run in order at
+# startup and the applied version is tracked in PRAGMA user_version, so add new
+# changes by appending a (version, [statements]) tuple — never edit old ones.
+
+MIGRATIONS = [
+    (1, [
+        # Expenses table
+        """
         CREATE TABLE IF NOT EXISTS expenses (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             amount REAL NOT NULL,
@@ -24,9 +431,9 @@ def create_table():
             note TEXT,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
-    """)
-    # Financial profiles table
-    conn.execute("""
+        """,
+        # Financial profiles table
+        """
         CREATE TABLE IF NOT EXISTS financial_profiles (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             after_tax_income REAL,
@@ -39,9 +446,9 @@ def create_table():
             debt REAL,
             created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
         )
-    """)
-    # Trade logs table
-    conn.execute("""
+        """,
+        # Trade logs table
+        """
         CREATE TABLE IF NOT EXISTS trade_logs (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             symbol TEXT NOT NULL,
@@ -51,119 +458,870 @@ def create_table():
             units REAL,
             mode TEXT  -- 'Conservative' or 'Aggressive'
         )
-    """)
-    conn.commit()
-    conn.close()
+        """,
+    ]),
+    (2, [
+        # Covers windowed summaries: range on created_at, reads category/amount
+        "CREATE INDEX IF NOT EXISTS idx_expenses_created_at "
+        "ON expenses(created_at, category, amount)",
+        "CREATE INDEX IF NOT EXISTS idx_expenses_category_created_at "
+        "ON expenses(category, created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_profiles_created_at "
+        "ON financial_profiles(created_at)",
+        "CREATE INDEX IF NOT EXISTS idx_trade_logs_timestamp "
+        "ON trade_logs(timestamp)",
+        "CREATE INDEX IF NOT EXISTS idx_trade_logs_symbol_timestamp "
+        "ON trade_logs(symbol, timestamp)",
+    ]),
+    (3, [
+        # Materialized (month, category) totals kept in sync by triggers, so
+        # the dashboard reads O(categories) rows regardless of history size.
+        """
+        CREATE TABLE IF NOT EXISTS expense_rollup (
+            month TEXT NOT NULL,      -- 'YYYY-MM'
+            category TEXT NOT NULL,
+            amount REAL NOT NULL DEFAULT 0,
+            n INTEGER NOT NULL DEFAULT 0,
+            PRIMARY KEY (month, category)
+        ) WITHOUT ROWID
+        """,
+        """
+        INSERT OR REPLACE INTO expense_rollup (month, category, amount, n)
+        SELECT strftime('%Y-%m', created_at), category, SUM(amount), COUNT(*)
+        FROM expenses
+        GROUP BY 1, 2
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_expenses_rollup_insert
+        AFTER INSERT ON expenses
+        BEGIN
+            INSERT INTO expense_rollup (month, category, amount, n)
+            VALUES (strftime('%Y-%m', NEW.created_at), NEW.category, NEW.amount, 1)
+            ON CONFLICT (month, category)
+            DO UPDATE SET amount = amount + excluded.amount, n = n + 1;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_expenses_rollup_delete
+        AFTER DELETE ON expenses
+        BEGIN
+            UPDATE expense_rollup
+            SET amount = amount - OLD.amount, n = n - 1
+            WHERE month = strftime('%Y-%m', OLD.created_at)
+              AND category = OLD.category;
+            DELETE FROM expense_rollup
+            WHERE month = strftime('%Y-%m', OLD.created_at)
+              AND category = OLD.category
+              AND n <= 0;
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_expenses_rollup_update
+        AFTER UPDATE OF amount, category, created_at ON expenses
+        BEGIN
+            UPDATE expense_rollup
+            SET amount = amount - OLD.amount, n = n - 1
+            WHERE month = strftime('%Y-%m', OLD.created_at)
+              AND category = OLD.category;
+            DELETE FROM expense_rollup
+            WHERE month = strftime('%Y-%m', OLD.created_at)
+              AND category = OLD.category
+              AND n <= 0;
+            INSERT INTO expense_rollup (month, category, amount, n)
+            VALUES (strftime('%Y-%m', NEW.created_at), NEW.category, NEW.amount, 1)
+            ON CONFLICT (month, category)
+            DO UPDATE SET amount = amount + excluded.amount, n = n + 1;
+        END
+        """,
+    ]),
+    (4, [
+        # 64-bit hash of an imported row's natural key (date, amount, note,
+        # occurrence) so re-importing a statement never duplicates rows.
+        # NULL for expenses entered by hand.
+        "ALTER TABLE expenses ADD COLUMN natural_key INTEGER",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_expenses_natural_key "
+        "ON expenses(natural_key) WHERE natural_key IS NOT NULL",
+        # bulk_insert_expenses() sets deferred=1 inside its own transaction
+        # and applies the rollup once per (month, category) instead of per row
+        "CREATE TABLE IF NOT EXISTS rollup_state (deferred INTEGER NOT NULL)",
+        "INSERT INTO rollup_state (deferred) SELECT 0 WHERE NOT EXISTS (SELECT 1 FROM rollup_state)",
+        "DROP TRIGGER IF EXISTS trg_expenses_rollup_insert",
+        """
+        CREATE TRIGGER trg_expenses_rollup_insert
+        AFTER INSERT ON expenses
+        WHEN (SELECT deferred FROM rollup_state) = 0
+        BEGIN
+            INSERT INTO expense_rollup (month, category, amount, n)
+            VALUES (strftime('%Y-%m', NEW.created_at), NEW.category, NEW.amount, 1)
+            ON CONFLICT (month, category)
+            DO UPDATE SET amount = amount + excluded.amount, n = n + 1;
+        END
+        """,
+    ]),
+    (5, [
+        # Identifies one Get Started submission so saving it twice is a no-op
+        "ALTER TABLE financial_profiles ADD COLUMN submission_id TEXT",
+        "CREATE UNIQUE INDEX IF NOT EXISTS idx_profiles_submission_id "
+        "ON financial_profiles(submission_id) WHERE submission_id IS NOT NULL",
+    ]),
+    (6, [
+        # Full-text index over note and category. External content: the text
+        # lives only in expenses and the index is kept in sync by triggers.
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS expenses_fts USING fts5(
+            note, category,
+            content='expenses', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2',
+            prefix='2 3'
+        )
+        """,
+        "INSERT INTO expenses_fts (expenses_fts) VALUES ('rebuild')",
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_expenses_fts_insert
+        AFTER INSERT ON expenses
+        BEGIN
+            INSERT INTO expenses_fts (rowid, note, category)
+            VALUES (NEW.id, NEW.note, NEW.category);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_expenses_fts_delete
+        AFTER DELETE ON expenses
+        BEGIN
+            INSERT INTO expenses_fts (expenses_fts, rowid, note, category)
+            VALUES ('delete', OLD.id, OLD.note, OLD.category);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS trg_expenses_fts_update
+        AFTER UPDATE OF note, category ON expenses
+        BEGIN
+            INSERT INTO expenses_fts (expenses_fts, rowid, note, category)
+            VALUES ('delete', OLD.id, OLD.note, OLD.category);
+            INSERT INTO expenses_fts (rowid, note, category)
+            VALUES (NEW.id, NEW.note, NEW.category);
+        END
+        """,
+    ]),
+    (7, [
+        # Per-table write counters read by data_version(). Seeded at random
+        # so a re-created file does not repeat the versions of an old one.
+        """
+        CREATE TABLE IF NOT EXISTS data_versions (
+            tbl TEXT PRIMARY KEY,
+            n INTEGER NOT NULL
+        ) WITHOUT ROWID
+        """,
+        "INSERT OR IGNORE INTO data_versions (tbl, n) VALUES "
+        + ", ".join(f"('{table}', abs(random() >> 16))" for table in TABLES),
+        # bulk_insert_expenses() bumps expenses once instead of per row
+        *(f"""
+        CREATE TRIGGER IF NOT EXISTS trg_{table}_version_{event.lower()}
+        AFTER {event} ON {table}
+        {"WHEN (SELECT deferred FROM rollup_state) = 0" if (table, event) == ("expenses", "INSERT") else ""}
+        BEGIN
+            UPDATE data_versions SET n = n + 1 WHERE tbl = '{table}';
+        END
+        """ for table in TABLES for event in ("INSERT", "UPDATE", "DELETE")),
+    ]),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+def migrate(conn) -> int:
+    """
+    Apply every migration newer than the database's user_version, each in
+    its own transaction. Safe to call concurrently and repeatedly.
+    Returns the resulting schema version.
+    """
+    for version, statements in MIGRATIONS:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            current = conn.execute("PRAGMA user_version").fetchone()[0]
+            if current >= version:
+                conn.rollback()
+                continue
+            for sql in statements:
+                conn.execute(sql)
+            conn.execute(f"PRAGMA user_version={version}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+_migrated = set()
+
+@timed()
+def create_table(path: str = None):
+    """Bring the database up to SCHEMA_VERSION (once per process and file)."""
+    path = path or current_path()
+    if path in _migrated:
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with get_connection(path) as conn:
+        migrate(conn)
+    _migrated.add(path)
+
+@timed()
+def explain(sql: str, params=()) -> list[str]:
+    """Return the EXPLAIN QUERY PLAN detail lines for `sql`."""
+    with get_connection() as conn:
+        rows = conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    return [row[-1] for row in rows]
 
 # ─── Expense CRUD ──────────────────────────────────────────────────────────────
 
-def add_expense(amount, category, note):
-    conn = connect_db()
-    conn.execute(
+@timed()
+def add_expense(amount, category, note) -> Future:
+    """Insert one expense; the Future resolves to its id once committed."""
+    return write(
         "INSERT INTO expenses (amount, category, note) VALUES (?, ?, ?)",
         (amount, category, note)
     )
-    conn.commit()
-    conn.close()
 
+@timed()
+def bulk_insert_expenses(conn, rows) -> int:
+    """
+    Insert many (amount, category, note, created_at, natural_key) rows
+    inside the caller's transaction, or a BEGIN IMMEDIATE one if none is
+    open; the caller commits. created_at is 'YYYY-MM-DD HH:MM:SS'
+    or None (now); natural_key may be None (no dedup). Rows whose natural_key already
+    exists are skipped. The rollup is updated once per (month, category)
+    rather than by the per-row trigger. Returns the number inserted.
+    """
+    if not conn.in_transaction:
+        # Take the write lock up front: a deferred transaction that has
+        # read expenses cannot upgrade once another connection commits,
+        # and fails with "database is locked" whatever the busy_timeout
+        conn.execute("BEGIN IMMEDIATE")
+    conn.execute("""
+        CREATE TEMP TABLE IF NOT EXISTS expense_stage (
+            amount REAL, category TEXT, note TEXT,
+            created_at TEXT, natural_key INTEGER UNIQUE
+        )
+    """)
+    conn.execute("DELETE FROM expense_stage")
+    # OR IGNORE drops keys repeated within this batch
+    conn.executemany("INSERT OR IGNORE INTO expense_stage VALUES (?, ?, ?, ?, ?)", rows)
+    conn.execute("UPDATE expense_stage SET created_at = CURRENT_TIMESTAMP WHERE created_at IS NULL")
+    # ...and this drops keys that are already stored
+    conn.execute("""
+        DELETE FROM expense_stage
+        WHERE natural_key IS NOT NULL
+          AND EXISTS (SELECT 1 FROM expenses e WHERE e.natural_key = expense_stage.natural_key)
+    """)
+    conn.execute("UPDATE rollup_state SET deferred = 1")
+    inserted = conn.execute("""
+        INSERT INTO expenses (amount, category, note, created_at, natural_key)
+        SELECT amount, category, note, created_at, natural_key
+        FROM expense_stage
+        ORDER BY created_at
+    """).rowcount
+    # created_at is 'YYYY-MM-DD HH:MM:SS' here, so the month is its prefix
+    conn.execute("""
+        INSERT INTO expense_rollup (month, category, amount, n)
+        SELECT substr(created_at, 1, 7), category, SUM(amount), COUNT(*)
+        FROM expense_stage
+        WHERE true
+        GROUP BY 1, 2
+        ON CONFLICT (month, category)
+        DO UPDATE SET amount = amount + excluded.amount, n = n + excluded.n
+    """)
+    conn.execute("UPDATE rollup_state SET deferred = 0")
+    if inserted:
+        bump_version(conn, "expenses")
+    conn.execute("DELETE FROM expense_stage")
+    return inserted
+
+@timed()
 def get_expenses():
-    conn = connect_db()
-    df = pd.read_sql_query(
-        "SELECT * FROM expenses ORDER BY created_at DESC",
-        conn,
-        parse_dates=["created_at"]
-    )
-    conn.close()
-    return df
+    with get_connection() as conn:
+        return pd.read_sql_query(
+            "SELECT * FROM expenses ORDER BY created_at DESC",
+            conn,
+            parse_dates=["created_at"]
+        )
+
+@timed()
+def get_expenses_page(page_size: int = 50, cursor: tuple = None,
+                      start=None, end=None, category: str = None):
+    """
+    One page of expenses, newest first, optionally limited to [start, end)
+    and one category. Pagination is keyset-based: pass the returned
+    cursor, a (created_at, id) pair, to get the next page, so deep pages
+    cost the same as the first. Returns (DataFrame, next_cursor), with
+    next_cursor None on the last page.
+    """
+    clauses, params = _date_clauses(start, end)
+    if category:
+        clauses.append("category = ?")
+        params.append(category)
+    if cursor is not None:
+        clauses.append("(created_at, id) < (?, ?)")
+        params.extend(cursor)
+    where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+    with get_connection() as conn:
+        df = pd.read_sql_query(
+            f"SELECT id, amount, category, note, created_at FROM expenses {where} "
+            "ORDER BY created_at DESC, id DESC LIMIT ?",
+            conn,
+            params=(*params, page_size + 1)
+        )
+    next_cursor = None
+    if len(df) > page_size:
+        df = df.iloc[:page_size]
+        last = df.iloc[-1]
+        next_cursor = (last["created_at"], int(last["id"]))
+    df["created_at"] = pd.to_datetime(df["created_at"])
+    return df, next_cursor
+
+@timed()
+def get_expense(expense_id: int):
+    """A single expense by id, or None."""
+    with get_connection() as conn:
+        df = pd.read_sql_query(
+            "SELECT * FROM expenses WHERE id = ?",
+            conn,
+            params=(expense_id,),
+            parse_dates=["created_at"]
+        )
+    return df.iloc[0] if not df.empty else None
+
+# Matches ranked per search; newer rows win when a term is very common
+SEARCH_CANDIDATES = int(os.getenv("BUDGETWISE_SEARCH_CANDIDATES", "2000"))
+
+# Note matches weigh twice as much as category matches
+_BM25 = "bm25(expenses_fts, 1.0, 0.5)"
+
+_FTS_TERM = re.compile(r'"([^"]*)"|(\S+)')
 
-def update_expense(expense_id: int, amount: float, category: str, note: str):
-    conn = connect_db()
-    conn.execute(
+def fts_query(text: str) -> str:
+    """
+    Turn a search box entry into a safe FTS5 query: "quoted text" is a
+    phrase, a trailing * makes a prefix term (groc*), and every term must
+    match. Other FTS5 syntax is treated as plain text.
+    """
+    terms = []
+    for phrase, word in _FTS_TERM.findall(text or ""):
+        if phrase.strip():
+            terms.append('"' + phrase + '"')
+        elif word:
+            prefix = word.endswith("*")
+            word = word.replace('"', "").rstrip("*")
+            if word:
+                terms.append('"' + word + '"' + ("*" if prefix else ""))
+    return " ".join(terms)
+
+@timed()
+def search_expenses(query: str, limit: int = 50, start=None, end=None,
+                    min_amount: float = None, max_amount: float = None,
+                    category: str = None) -> pd.DataFrame:
+    """
+    Expenses whose note or category match `query` (see fts_query), best
+    match first, optionally limited to [start, end), an amount range and
+    one category. Adds a `rank` column (bm25; lower is better).
+
+    Only the newest SEARCH_CANDIDATES matching rows are ranked, so a term
+    that appears in most of the table costs the same as a rare one. When
+    the filters leave that many matches or fewer, every match is ranked;
+    df.attrs["all_ranked"] says which case applied.
+    """
+    match = fts_query(query)
+    if not match:
+        df = pd.DataFrame(columns=["id", "amount", "category", "note", "created_at", "rank"])
+        df.attrs["all_ranked"] = True
+        return df
+    clauses, params = _date_clauses(start, end, column="e.created_at")
+    if min_amount is not None:
+        clauses.append("e.amount >= ?")
+        params.append(min_amount)
+    if max_amount is not None:
+        clauses.append("e.amount <= ?")
+        params.append(max_amount)
+    if category:
+        clauses.append("e.category = ?")
+        params.append(category)
+    filters = "".join(" AND " + c for c in clauses)
+    with get_connection() as conn:
+        # One row past the cap tells whether any older match was left out
+        df = pd.read_sql_query(f"""
+            WITH candidates AS MATERIALIZED (
+                SELECT f.rowid AS id
+                FROM expenses_fts f JOIN expenses e ON e.id = f.rowid
+                WHERE expenses_fts MATCH ?{filters}
+                ORDER BY f.rowid DESC
+                LIMIT ?
+            ),
+            ranked AS (
+                -- bm25 is only computed for candidates; the unary + keeps
+                -- FTS5 from turning the IN list into per-row lookups
+                SELECT rowid AS id, {_BM25} AS rank
+                FROM expenses_fts
+                WHERE expenses_fts MATCH ?
+                  AND rowid >= (SELECT MIN(id) FROM candidates)
+                  AND +rowid IN (SELECT id FROM candidates)
+                ORDER BY rank
+                LIMIT ?
+            )
+            SELECT e.id, e.amount, e.category, e.note, e.created_at, r.rank,
+                   (SELECT COUNT(*) FROM candidates) AS candidates
+            FROM ranked r JOIN expenses e ON e.id = r.id
+            ORDER BY r.rank
+        """,
+            conn,
+            params=(match, *params, SEARCH_CANDIDATES + 1, match, limit),
+            parse_dates=["created_at"]
+        )
+    df.attrs["all_ranked"] = df.empty or int(df["candidates"].iloc[0]) <= SEARCH_CANDIDATES
+    return df.drop(columns="candidates")
+
+@timed()
+def update_expense(expense_id: int, amount: float, category: str, note: str) -> Future:
+    return write(
         "UPDATE expenses SET amount=?, category=?, note=? WHERE id=?",
         (amount, category, note, expense_id)
     )
-    conn.commit()
-    conn.close()
-
-def delete_expense(expense_id: int):
-    conn = connect_db()
-    conn.execute("DELETE FROM expenses WHERE id=?", (expense_id,))
-    conn.commit()
-    conn.close()
-
-def get_summary():
-    df = get_expenses()
-    if df.empty:
+
+@timed()
+def delete_expense(expense_id: int) -> Future:
+    return write("DELETE FROM expenses WHERE id=?", (expense_id,))
+
+def _sql_ts(value) -> str:
+    """Format a date/datetime/str the way SQLite's CURRENT_TIMESTAMP stores it."""
+    if isinstance(value, str):
+        return value
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    return value.strftime("%Y-%m-%d %H:%M:%S")
+
+def _date_clauses(start=None, end=None, column: str = "created_at"):
+    """Conditions and params for the half-open window [start, end)."""
+    clauses, params = [], []
+    if start is not None:
+        clauses.append(f"{column} >= ?")
+        params.append(_sql_ts(start))
+    if end is not None:
+        clauses.append(f"{column} < ?")
+        params.append(_sql_ts(end))
+    return clauses, params
+
+def _date_filter(start=None, end=None, column: str = "created_at"):
+    """Build a WHERE clause for the half-open window [start, end)."""
+    clauses, params = _date_clauses(start, end, column)
+    where = ("WHERE " + " AND ".join(clauses)) if clauses else ""
+    return where, params
+
+def month_window(day=None) -> tuple[datetime, datetime]:
+    """
+    Return [first of month, first of next month) containing `day`
+    (default: today in UTC, matching CURRENT_TIMESTAMP).
+    """
+    day = day or datetime.now(timezone.utc)
+    start = datetime(day.year, day.month, 1)
+    if day.month == 12:
+        end = datetime(day.year + 1, 1, 1)
+    else:
+        end = datetime(day.year, day.month + 1, 1)
+    return start, end
+
+def _month_key(value):
+    """
+    'YYYY-MM' if `value` falls exactly on the start of a month, else None.
+    Only such boundaries can be answered from expense_rollup.
+    """
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    if not isinstance(value, datetime):
+        value = datetime(value.year, value.month, value.day)
+    if value.replace(day=1, hour=0, minute=0, second=0, microsecond=0) != value:
+        return None
+    return f"{value:%Y-%m}"
+
+@timed()
+def get_summary(start=None, end=None):
+    """
+    Aggregate expenses inside SQLite for the window [start, end)
+    (both optional). Returns (total, count, grouped) where grouped is a
+    small category/amount DataFrame sorted by amount.
+
+    Windows made of whole months are answered from expense_rollup;
+    anything else falls back to scanning expenses.
+    """
+    start_month = _month_key(start) if start is not None else None
+    end_month   = _month_key(end)   if end   is not None else None
+    whole_months = (start is None or start_month) and (end is None or end_month)
+    if whole_months:
+        where, params = _date_filter(start_month, end_month, column="month")
+        table = "expense_rollup"
+        aggregates = "SUM(amount) AS amount, SUM(n) AS n"
+    else:
+        where, params = _date_filter(start, end)
+        table = "expenses"
+        aggregates = "SUM(amount) AS amount, COUNT(*) AS n"
+    with get_connection() as conn:
+        grouped = pd.read_sql_query(f"""
+            SELECT category, {aggregates}
+            FROM {table}
+            {where}
+            GROUP BY category
+        """, conn, params=params)
+    if grouped.empty:
         return 0.0, 0, pd.DataFrame(columns=["category","amount"])
+    # One row per category: sorted here rather than in a temp B-tree
+    grouped = grouped.sort_values("amount", ascending=False, ignore_index=True)
 
-    total = df["amount"].sum()
-    count = df.shape[0]
-    grouped = (
-        df
-        .groupby("category")["amount"]
-        .sum()
-        .reset_index()
-        .sort_values("amount", ascending=False)
-    )
-    return total, count, grouped
+    total = float(grouped["amount"].sum())
+    count = int(grouped["n"].sum())
+    return total, count, grouped[["category","amount"]]
+
+# ─── Monthly rollup maintenance ───────────────────────────────────────────────
+
+_ROLLUP_FROM_RAW = """
+    SELECT strftime('%Y-%m', created_at) AS month, category,
+           SUM(amount) AS amount, COUNT(*) AS n
+    FROM expenses
+    GROUP BY 1, 2
+"""
+
+@timed()
+def verify_rollup(tolerance: float = 0.005) -> pd.DataFrame:
+    """
+    Recompute the rollup from raw expenses and return every
+    (month, category) whose stored amount or count has drifted.
+    An empty frame means the rollup is consistent.
+    """
+    with get_connection() as conn:
+        drift = pd.read_sql_query(f"""
+            WITH raw AS ({_ROLLUP_FROM_RAW}),
+            keys AS (
+                SELECT month, category FROM raw
+                UNION
+                SELECT month, category FROM expense_rollup
+            )
+            SELECT k.month, k.category,
+                   COALESCE(r.amount, 0) AS expected_amount,
+                   COALESCE(s.amount, 0) AS stored_amount,
+                   COALESCE(r.n, 0)      AS expected_n,
+                   COALESCE(s.n, 0)      AS stored_n
+            FROM keys k
+            LEFT JOIN raw r            ON r.month = k.month AND r.category = k.category
+            LEFT JOIN expense_rollup s ON s.month = k.month AND s.category = k.category
+            WHERE ABS(COALESCE(r.amount, 0) - COALESCE(s.amount, 0)) > ?
+               OR COALESCE(r.n, 0) != COALESCE(s.n, 0)
+            ORDER BY k.month, k.category
+        """, conn, params=(tolerance,))
+    return drift
+
+@timed()
+def rebuild_rollup() -> int:
+    """Recompute expense_rollup from raw rows in one transaction. Returns row count."""
+    with get_connection() as conn:
+        conn.execute("DELETE FROM expense_rollup")
+        conn.execute(f"INSERT INTO expense_rollup (month, category, amount, n) {_ROLLUP_FROM_RAW}")
+        bump_version(conn, "expenses")
+        return conn.execute("SELECT COUNT(*) FROM expense_rollup").fetchone()[0]
 
 
 # ─── Financial profile CRUD ───────────────────────────────────────────────────
 
-def add_financial_profile(income, g1m, g3m, g6m, g1y, expenses, savings, debt):
-    conn = connect_db()
-    conn.execute("""
+@timed()
+def add_financial_profile(income, g1m, g3m, g6m, g1y, expenses, savings, debt) -> Future:
+    return write("""
         INSERT INTO financial_profiles
             (after_tax_income, goal_1m, goal_3m, goal_6m, goal_1y,
              total_expenses, savings, debt)
         VALUES (?, ?, ?, ?, ?, ?, ?, ?)
     """, (income, g1m, g3m, g6m, g1y, expenses, savings, debt))
-    conn.commit()
-    conn.close()
 
+def _submission_key(submission_id: str, index: int) -> int:
+    raw = f"onboarding|{submission_id}|{index}".encode("utf-8")
+    return int.from_bytes(hashlib.blake2b(raw, digest_size=8).digest(), "big", signed=True)
+
+@timed()
+def save_onboarding(submission_id: str, income, g1m, g3m, g6m, g1y,
+                    savings, debt, expenses: list[dict]) -> bool:
+    """
+    Save a Get Started submission atomically: the profile row and every
+    onboarding expense ({amount, category, note}) in one transaction,
+    the expenses with a single batched insert. Idempotent per
+    submission_id; returns False if it was already saved.
+    """
+    total = sum(e["amount"] for e in expenses)
+    with get_connection() as conn:
+        saved = conn.execute("""
+            INSERT OR IGNORE INTO financial_profiles
+                (after_tax_income, goal_1m, goal_3m, goal_6m, goal_1y,
+                 total_expenses, savings, debt, submission_id)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, (income, g1m, g3m, g6m, g1y, total, savings, debt, submission_id)).rowcount
+        if not saved:
+            return False
+        bulk_insert_expenses(conn, [
+            (e["amount"], e["category"], e.get("note") or "", None,
+             _submission_key(submission_id, i))
+            for i, e in enumerate(expenses)
+        ])
+    return True
+
+@timed()
 def get_latest_profile():
-    conn = connect_db()
-    df = pd.read_sql_query(
-        "SELECT * FROM financial_profiles ORDER BY created_at DESC LIMIT 1",
-        conn,
-        parse_dates=["created_at"]
-    )
-    conn.close()
+    with get_connection() as conn:
+        df = pd.read_sql_query(
+            "SELECT * FROM financial_profiles ORDER BY created_at DESC LIMIT 1",
+            conn,
+            parse_dates=["created_at"]
+        )
     return df.iloc[0] if not df.empty else None
 
+@timed()
 def update_profile_savings_debt(savings: float, debt: float):
-    conn = connect_db()
-    cur = conn.cursor()
-    cur.execute("SELECT id FROM financial_profiles ORDER BY created_at DESC LIMIT 1")
-    row = cur.fetchone()
-    if row:
-        fid = row[0]
-        conn.execute(
-            "UPDATE financial_profiles SET savings=?, debt=? WHERE id=?",
-            (savings, debt, fid)
-        )
-        conn.commit()
-    conn.close()
+    with get_connection() as conn:
+        row = conn.execute(
+            "SELECT id FROM financial_profiles ORDER BY created_at DESC LIMIT 1"
+        ).fetchone()
+        if row:
+            conn.execute(
+                "UPDATE financial_profiles SET savings=?, debt=? WHERE id=?",
+                (savings, debt, row[0])
+            )
 
 # ─── Trade log CRUD ────────────────────────────────────────────────────────────
 
-def log_trade(symbol: str, sentiment: float, recommendation: str, units: float, mode: str):
-    conn = connect_db()
-    conn.execute("""
+@timed()
+def log_trade(symbol: str, sentiment: float, recommendation: str, units: float, mode: str) -> Future:
+    return write("""
         INSERT INTO trade_logs
             (symbol, sentiment, recommendation, units, mode)
         VALUES (?, ?, ?, ?, ?)
     """, (symbol, sentiment, recommendation, units, mode))
-    conn.commit()
-    conn.close()
 
+@timed()
+def log_trades(rows: list[tuple]):
+    """
+    Insert many (symbol, sentiment, recommendation, units, mode) rows
+    in a single transaction.
+    """
+    with get_connection() as conn:
+        conn.executemany("""
+            INSERT INTO trade_logs
+                (symbol, sentiment, recommendation, units, mode)
+            VALUES (?, ?, ?, ?, ?)
+        """, rows)
+
+@timed()
 def get_trade_logs(limit: int = 100):
-    conn = connect_db()
-    df = pd.read_sql_query(
-        "SELECT * FROM trade_logs ORDER BY timestamp DESC LIMIT ?",
-        conn,
-        params=(limit,),
-        parse_dates=["timestamp"]
-    )
-    conn.close()
-    return df
+    with get_connection() as conn:
+        return pd.read_sql_query(
+            "SELECT * FROM trade_logs ORDER BY timestamp DESC LIMIT ?",
+            conn,
+            params=(limit,),
+            parse_dates=["timestamp"]
+        )
+
+# ─── CLI ───────────────────────────────────────────────────────────────────────
+# python -m components.db verify-rollup        report drift between rollup and raw rows
+# python -m components.db rebuild-rollup       recompute the rollup from raw rows
+# python -m components.db bench-search [ROWS]  time search_expenses on a synthetic temp db
+# python -m components.db bench-writes [ROWS]  concurrent add_expense, direct vs. write-behind
+
+def _bench_search(rows: int):
+    import random
+    import tempfile
+    import time
+    global DB_PATH
+    DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+    create_table()
+
+    rng = random.Random(0)
+    brands = ["Grocery", "Coffee", "Transit", "Cinema", "Pharmacy", "Books", "Garden",
+              "Hardware", "Pizza", "Sushi", "Fuel", "Gym", "Pet", "Bakery", "Florist"]
+    kinds  = ["Mart", "House", "Co", "Depot", "Corner", "Express", "Outlet", "Club"]
+    cities = ["Springfield", "Riverside", "Fairview", "Madison", "Georgetown",
+              "Salem", "Clinton", "Arlington", "Ashland", "Burlington"]
+    memos  = ["card", "online", "refund", "tip", "subscription", "weekly", "gift", "", "", ""]
+    cats   = ["Food", "Transport", "Utilities", "Entertainment", "Rent", "Other"]
+
+    start = time.perf_counter()
+    for _ in range(0, rows, 100_000):
+        batch = [(
+            round(rng.uniform(1, 250), 2),
+            rng.choice(cats),
+            f"{rng.choice(brands)} {rng.choice(kinds)} {rng.choice(cities)} "
+            f"{rng.choice(memos)} #{rng.randrange(100_000)}".strip(),
+            f"20{rng.randint(20, 25)}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 12:00:00",
+            None,
+        ) for _ in range(min(100_000, rows))]
+        with get_connection() as conn:
+            bulk_insert_expenses(conn, batch)
+    print(f"Loaded {rows:,} rows (FTS kept in sync) in {time.perf_counter() - start:.1f}s")
+
+    queries = [
+        ("term",            "sushi",                    {}),
+        ("rare term",       "florist subscription",     {}),
+        ("prefix",          "garde*",                   {}),
+        ("phrase",          '"coffee house"',           {}),
+        ("phrase + prefix", '"pizza corner" spring*',   {}),
+        ("term, filtered",  "gym",                      {"start": "2024-01-01", "end": "2024-04-01",
+                                                         "min_amount": 50, "max_amount": 100}),
+        ("unique token",    "12345",                    {}),
+    ]
+    for label, query, filters in queries:
+        search_expenses(query, **filters)  # warm the page cache
+        runs = 20
+        t = time.perf_counter()
+        for _ in range(runs):
+            hits = search_expenses(query, **filters)
+        ms = (time.perf_counter() - t) / runs * 1000
+        print(f"  {label:<16} {query!r:<26} {ms:8.2f} ms  ({len(hits)} shown)")
+
+def _bench_pool(rows: int, readers: int = 8, seconds: float = 5.0):
+    # Before: what every helper did originally, a fresh sqlite3.connect() per
+    # call on a rollback-journal file. After: the shared pool in WAL mode.
+    import random
+    import tempfile
+    global DB_PATH
+    reads = [
+        ("SELECT category, SUM(amount) FROM expenses WHERE created_at >= ? AND created_at < ? "
+         "GROUP BY category", ("2024-03-01 00:00:00", "2024-03-20 00:00:00")),
+        ("SELECT * FROM financial_profiles ORDER BY created_at DESC LIMIT 1", ()),
+        ("SELECT * FROM expenses ORDER BY created_at DESC, id DESC LIMIT 50", ()),
+    ]
+    write = "INSERT INTO expenses (amount, category, note) VALUES (?, ?, ?)"
+
+    def unpooled(path, sql, params, commit=False):
+        conn = sqlite3.connect(path, check_same_thread=False)
+        try:
+            conn.execute(sql, params).fetchall()
+            if commit:
+                conn.commit()
+        finally:
+            conn.close()
+
+    def pooled(path, sql, params, commit=False):
+        with get_connection(path) as conn:
+            conn.execute(sql, params).fetchall()
+
+    print(f"{readers} readers + 1 writer for {seconds:.0f}s each, {rows:,} expenses")
+    for label, run in [("before (connect per call)", unpooled), ("after (pool + WAL)", pooled)]:
+        DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+        create_table()
+        rng = random.Random(0)
+        with get_connection() as conn:
+            bulk_insert_expenses(conn, [
+                (round(rng.uniform(1, 250), 2), rng.choice(["Food", "Transport", "Rent", "Other"]),
+                 f"bench {i}", f"2024-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d} 12:00:00", None)
+                for i in range(rows)
+            ])
+            conn.execute("INSERT INTO financial_profiles (after_tax_income) VALUES (5000)")
+        if run is unpooled:
+            close_pools()
+            conn = sqlite3.connect(DB_PATH)
+            conn.execute("PRAGMA journal_mode=DELETE")
+            conn.close()
+
+        stop = time.perf_counter() + seconds
+        latencies, counts = [], {"reads": 0, "writes": 0, "errors": 0}
+        lock = threading.Lock()
+
+        def worker(writer: bool):
+            mine, done, errors = [], 0, 0
+            while time.perf_counter() < stop:
+                sql, params = (write, (9.99, "Food", "bench write")) if writer else reads[done % len(reads)]
+                t = time.perf_counter()
+                try:
+                    run(DB_PATH, sql, params, commit=writer)
+                except sqlite3.OperationalError:
+                    errors += 1   # "database is locked"
+                    continue
+                mine.append(time.perf_counter() - t)
+                done += 1
+            with lock:
+                if not writer:
+                    latencies.extend(mine)
+                counts["writes" if writer else "reads"] += done
+                counts["errors"] += errors
+
+        threads = [threading.Thread(target=worker, args=(i == 0,)) for i in range(readers + 1)]
+        for th in threads:
+            th.start()
+        for th in threads:
+            th.join()
+        close_pools()
+        latencies.sort()
+        p = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000 if latencies else 0.0
+        print(f"  {label:<26} {counts['reads'] / seconds:9,.0f} reads/s  {counts['writes'] / seconds:7,.0f} writes/s  "
+              f"read p50 {p(0.50):6.2f} ms  p99 {p(0.99):7.2f} ms  locked {counts['errors']}")
+
+def _bench_writes(rows: int, threads: int = 50):
+    import tempfile
+    global DB_PATH, WRITE_BEHIND
+    per_thread = max(1, rows // threads)
+    modes = [("direct", False, True), ("write-behind", True, False),
+             ("write-behind, wait each", True, True)]
+    print(f"{threads} threads x {per_thread:,} add_expense calls")
+    for label, behind, wait in modes:
+        DB_PATH = os.path.join(tempfile.mkdtemp(), "bench.db")
+        create_table()
+        WRITE_BEHIND = behind
+        latencies, futures = [], []
+        lock = threading.Lock()
+        barrier = threading.Barrier(threads)
+
+        def worker():
+            mine, pending = [], []
+            barrier.wait()
+            for i in range(per_thread):
+                t = time.perf_counter()
+                future = add_expense(9.99, "Food", f"bench {i}")
+                if wait:
+                    future.result()
+                mine.append(time.perf_counter() - t)
+                pending.append(future)
+            with lock:
+                latencies.extend(mine)
+                futures.extend(pending)
+
+        workers = [threading.Thread(target=worker) for _ in range(threads)]
+        start = time.perf_counter()
+        for w in workers:
+            w.start()
+        for w in workers:
+            w.join()
+        failed = sum(1 for f in futures if f.exception() is not None)
+        elapsed = time.perf_counter() - start
+        stop_writer()
+        latencies.sort()
+        p = lambda q: latencies[min(len(latencies) - 1, int(q * len(latencies)))] * 1000
+        print(f"  {label:<24} {len(futures) / elapsed:9,.0f} writes/s  "
+              f"p50 {p(0.50):7.2f} ms  p99 {p(0.99):7.2f} ms  failed {failed}")
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m components.db")
+    parser.add_argument("command", choices=["verify-rollup", "rebuild-rollup", "bench-search",
+                                            "bench-writes", "bench-pool"])
+    parser.add_argument("rows", nargs="?", type=int)
+    args = parser.parse_args()
+
+    if args.command == "bench-search":
+        _bench_search(args.rows or 1_000_000)
+        raise SystemExit(0)
+    if args.command == "bench-writes":
+        _bench_writes(args.rows or 20_000)
+        raise SystemExit(0)
+    if args.command == "bench-pool":
+        _bench_pool(args.rows or 100_000)
+        raise SystemExit(0)
+
+    create_table()
+    if args.command == "verify-rollup":
+        drift = verify_rollup()
+        if drift.empty:
+            print("expense_rollup is consistent with expenses.")
+        else:
+            print(drift.to_string(index=False))
+            raise SystemExit(1)
+    else:
+        print(f"Rebuilt expense_rollup: {rebuild_rollup()} rows.")
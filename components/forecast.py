@@ -0,0 +1,372 @@
+# components/forecast.py
+
+import os
+import json
+import hashlib
+import importlib.util
+import threading
+import time
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from components.cache import TTLCache, MISSING
+from components.db import BASE_DIR, get_connection, month_window
+
+# Goal horizons stored in financial_profiles: label -> (column, months)
+HORIZONS = {
+    "1m": ("goal_1m", 1),
+    "3m": ("goal_3m", 3),
+    "6m": ("goal_6m", 6),
+    "1y": ("goal_1y", 12),
+}
+MAX_HORIZON = 12   # months; every model forecasts this far and callers slice
+SEASON      = 12   # months
+
+# auto: Prophet when installed, else the NumPy baseline | prophet | baseline
+METHOD             = os.getenv("BUDGETWISE_FORECAST_METHOD", "auto")
+MIN_PROPHET_MONTHS = 6
+PROPHET_TIMEOUT    = float(os.getenv("BUDGETWISE_PROPHET_TIMEOUT", "5"))  # seconds
+PROPHET_RETRY      = float(os.getenv("BUDGETWISE_PROPHET_RETRY", "3600"))  # seconds before refitting a failure
+MAX_WORKERS        = int(os.getenv("BUDGETWISE_FORECAST_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# ─── History ───────────────────────────────────────────────────────────────────
+
+def monthly_spending(path: str = None) -> pd.DataFrame:
+    """
+    Spending per completed month (rows) and category (columns), read
+    from expense_rollup. Months without expenses are 0. The current,
+    partial month is left out.
+    """
+    current, _ = month_window()
+    with get_connection(path) as conn:
+        df = pd.read_sql_query(
+            "SELECT month, category, amount FROM expense_rollup WHERE month < ?",
+            conn,
+            params=(f"{current:%Y-%m}",)
+        )
+    if df.empty:
+        return pd.DataFrame(index=pd.DatetimeIndex([], name="month"))
+    table = df.pivot_table(index="month", columns="category", values="amount", aggfunc="sum")
+    table.index = pd.to_datetime(table.index, format="%Y-%m")
+    months = pd.date_range(table.index.min(), pd.Timestamp(current) - pd.offsets.MonthBegin(1),
+                           freq="MS", name="month")
+    return table.reindex(months).fillna(0.0)
+
+def forecast_index(horizon: int = MAX_HORIZON) -> pd.DatetimeIndex:
+    """The months being forecast: the current month and the ones after it."""
+    current, _ = month_window()
+    return pd.date_range(current, periods=horizon, freq="MS", name="month")
+
+# ─── NumPy baseline ────────────────────────────────────────────────────────────
+
+def seasonal_smoothing(y, horizon: int = MAX_HORIZON, alpha: float = 0.3,
+                       beta: float = 0.1, gamma: float = 0.3, phi: float = 0.9,
+                       season: int = SEASON) -> np.ndarray:
+    """
+    Additive Holt-Winters with a damped trend, run on every column of
+    `y` (months × series) at once; the loop is over months only.
+    Seasonality is used once two full seasons exist. Returns a
+    (horizon × series) array clipped at 0.
+    """
+    y = np.asarray(y, dtype=float)
+    T, K = y.shape
+    if T == 0:
+        return np.zeros((horizon, K))
+    if T >= 2 * season:
+        level  = y[:season].mean(axis=0)
+        trend  = (y[season:2 * season].mean(axis=0) - level) / season
+        seasonals = y[:season] - level
+    else:
+        level, trend = y[0].copy(), np.zeros(K)
+        seasonals, gamma = np.zeros((season, K)), 0.0
+    for t in range(T):
+        i = t % season
+        prev  = level
+        level = alpha * (y[t] - seasonals[i]) + (1 - alpha) * (level + phi * trend)
+        trend = beta * (level - prev) + (1 - beta) * phi * trend
+        seasonals[i] = gamma * (y[t] - level) + (1 - gamma) * seasonals[i]
+    damped = np.cumsum(phi ** np.arange(1, horizon + 1))
+    steps  = (T + np.arange(horizon)) % season
+    return np.clip(level + damped[:, None] * trend + seasonals[steps], 0.0, None)
+
+# ─── Prophet model cache ───────────────────────────────────────────────────────
+# Fitted models are stored by a fingerprint of the category's monthly series,
+# so a category is only refitted after its spending changes (or a month ends).
+
+CACHE_PATH     = os.path.join(BASE_DIR, "data", "forecast_cache.db")
+CACHE_MAX_ROWS = int(os.getenv("BUDGETWISE_FORECAST_CACHE_MAX_ROWS", "5000"))
+
+CACHE_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS forecast_models (
+        fingerprint TEXT PRIMARY KEY,
+        category TEXT NOT NULL,
+        model TEXT NOT NULL,       -- prophet.serialize.model_to_json
+        forecast TEXT NOT NULL,    -- JSON list of MAX_HORIZON monthly values
+        created_at REAL NOT NULL   -- unix time
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_forecast_models_created_at "
+    "ON forecast_models(created_at)",
+]
+
+def _cache_conn():
+    return get_connection(CACHE_PATH, schema=CACHE_SCHEMA)
+
+def fingerprint(category: str, months: pd.DatetimeIndex, values) -> str:
+    h = hashlib.sha256()
+    h.update(f"prophet\0{category}\0{months[0]:%Y-%m}\0{len(months)}\0{MAX_HORIZON}".encode())
+    h.update(np.round(np.asarray(values, dtype=float), 2).astype("<f8").tobytes())
+    return h.hexdigest()
+
+def _cached_forecasts(fingerprints: list[str]) -> dict[str, np.ndarray]:
+    found = {}
+    with _cache_conn() as conn:
+        for i in range(0, len(fingerprints), 500):
+            chunk = fingerprints[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            for fp, forecast in conn.execute(
+                f"SELECT fingerprint, forecast FROM forecast_models WHERE fingerprint IN ({marks})",
+                chunk
+            ):
+                found[fp] = np.array(json.loads(forecast))
+    return found
+
+def _store_model(fp: str, category: str, model_json: str, forecast: list[float]):
+    with _cache_conn() as conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO forecast_models "
+            "(fingerprint, category, model, forecast, created_at) VALUES (?, ?, ?, ?, ?)",
+            (fp, category, model_json, json.dumps(forecast), time.time())
+        )
+        conn.execute("""
+            DELETE FROM forecast_models WHERE fingerprint IN (
+                SELECT fingerprint FROM forecast_models
+                ORDER BY created_at DESC LIMIT -1 OFFSET ?
+            )
+        """, (CACHE_MAX_ROWS,))
+
+def load_model(category: str, months: pd.DatetimeIndex, values):
+    """The cached fitted Prophet model for this series, or None."""
+    with _cache_conn() as conn:
+        row = conn.execute(
+            "SELECT model FROM forecast_models WHERE fingerprint=?",
+            (fingerprint(category, months, values),)
+        ).fetchone()
+    if row is None:
+        return None
+    from prophet.serialize import model_from_json
+    return model_from_json(row[0])
+
+def clear_cache():
+    with _cache_conn() as conn:
+        conn.execute("DELETE FROM forecast_models")
+
+# ─── Prophet ───────────────────────────────────────────────────────────────────
+
+def prophet_available() -> bool:
+    return importlib.util.find_spec("prophet") is not None
+
+def _fit_prophet(category: str, months: list[str], values: list[float], horizon: int):
+    # Runs in a worker process; returns what the parent caches
+    import logging
+    from prophet import Prophet
+    from prophet.serialize import model_to_json
+    logging.getLogger("cmdstanpy").setLevel(logging.WARNING)
+    history = pd.DataFrame({"ds": pd.to_datetime(months), "y": values})
+    model = Prophet(
+        yearly_seasonality=len(history) >= 2 * SEASON,
+        weekly_seasonality=False,
+        daily_seasonality=False,
+    )
+    model.fit(history)
+    future = model.make_future_dataframe(periods=horizon, freq="MS", include_history=False)
+    forecast = model.predict(future)["yhat"].clip(lower=0).tolist()
+    return model_to_json(model), forecast
+
+_pool = None
+_pool_lock = threading.Lock()
+_fitting = {}   # fingerprint -> Future, while a fit is running
+_failed  = TTLCache(maxsize=1024, ttl=PROPHET_RETRY)   # fingerprint -> error
+
+def _executor(reset: bool = False) -> ProcessPoolExecutor:
+    """Process pool shared by every session, started on first use."""
+    global _pool
+    with _pool_lock:
+        if reset and _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+        if _pool is None:
+            import multiprocessing
+            # spawn: forking a threaded server process is unsafe
+            _pool = ProcessPoolExecutor(
+                max_workers=MAX_WORKERS, mp_context=multiprocessing.get_context("spawn")
+            )
+    return _pool
+
+def _submit_fit(fp: str, category: str, series: pd.Series):
+    """Start a fit unless one is running. Returns (future, newly_submitted)."""
+    with _pool_lock:
+        future = _fitting.get(fp)
+    if future is not None:
+        return future, False
+    args = (_fit_prophet, category, [f"{m:%Y-%m-%d}" for m in series.index],
+            series.tolist(), MAX_HORIZON)
+    try:
+        future = _executor().submit(*args)
+    except BrokenProcessPool:
+        # A worker died (e.g. killed for memory); start a fresh pool
+        future = _executor(reset=True).submit(*args)
+    with _pool_lock:
+        _fitting[fp] = future
+
+    def store(done):
+        # Cached (or marked failed) before it stops counting as running, so
+        # a concurrent call never sees it as neither and fits it again
+        try:
+            if done.cancelled():   # the pool was reset; the next call refits
+                return
+            try:
+                model_json, forecast = done.result()
+            except Exception as e:
+                print(f"Prophet fit failed for {category}:", e)
+                _failed.set(fp, e)
+            else:
+                _store_model(fp, category, model_json, forecast)
+        finally:
+            with _pool_lock:
+                _fitting.pop(fp, None)
+
+    future.add_done_callback(store)
+    return future, True
+
+def prophet_forecast(history: pd.DataFrame,
+                     timeout: float = PROPHET_TIMEOUT) -> tuple[dict[str, np.ndarray], int]:
+    """
+    Prophet forecasts (MAX_HORIZON months) for each category in `history`
+    with at least MIN_PROPHET_MONTHS of data, and the number of fits
+    still running. Cached fits are reused; the rest are fitted in
+    parallel worker processes. Only fits started by this call are
+    waited for, up to `timeout` seconds; ones started earlier are just
+    checked. Unfinished fits keep running and are cached for the next
+    call. Failed fits are left out, and not retried for PROPHET_RETRY
+    seconds.
+    """
+    if len(history) < MIN_PROPHET_MONTHS:
+        return {}, 0
+    fps = {cat: fingerprint(cat, history.index, history[cat]) for cat in history.columns}
+    cached = _cached_forecasts(list(fps.values()))
+    out = {cat: cached[fp] for cat, fp in fps.items() if fp in cached}
+
+    futures, new = {}, []
+    for cat, fp in fps.items():
+        if fp in cached or _failed.get(fp) is not MISSING:
+            continue
+        futures[cat], submitted = _submit_fit(fp, cat, history[cat])
+        if submitted:
+            new.append(futures[cat])
+    if new:
+        wait(new, timeout=timeout)
+    pending = 0
+    for cat, future in futures.items():
+        if not future.done():
+            pending += 1
+        elif not future.cancelled() and future.exception() is None:
+            out[cat] = np.array(future.result()[1])
+    return out, pending
+
+# ─── Forecasts & goals ─────────────────────────────────────────────────────────
+
+def forecast_spending(horizon: int = MAX_HORIZON, method: str = METHOD,
+                      path: str = None) -> pd.DataFrame:
+    """
+    Projected spending per category for the next `horizon` months,
+    starting with the current one. Every category gets the baseline;
+    with method "prophet" (or "auto" when Prophet is installed) it is
+    replaced by Prophet's forecast wherever one is ready.
+    out.attrs["methods"] maps each category to the model used, and
+    out.attrs["pending"] counts Prophet fits still running.
+    """
+    history = monthly_spending(path)
+    index = forecast_index(horizon)
+    if history.empty:
+        out = pd.DataFrame(index=index)
+        out.attrs["methods"], out.attrs["pending"] = {}, 0
+        return out
+    baseline = seasonal_smoothing(history.to_numpy(), max(horizon, MAX_HORIZON))
+    out = pd.DataFrame(baseline[:horizon], index=index, columns=history.columns)
+    methods = dict.fromkeys(history.columns, "baseline")
+
+    if method == "prophet" and not prophet_available():
+        raise ImportError("prophet is not installed")
+    pending = 0
+    if method == "prophet" or (method == "auto" and prophet_available()):
+        fitted, pending = prophet_forecast(history)
+        for cat, values in fitted.items():
+            out[cat] = values[:horizon]
+            methods[cat] = "prophet"
+    out.attrs["methods"] = methods
+    out.attrs["pending"] = pending   # categories whose Prophet fit isn't ready yet
+    return out
+
+def goal_progress(profile, forecast: pd.DataFrame) -> pd.DataFrame:
+    """
+    For each goal horizon: projected spending, projected surplus (income
+    minus spending over the horizon) and the share of the goal that
+    surplus covers. `forecast` must span MAX_HORIZON months.
+    """
+    income   = float(profile["after_tax_income"] or 0.0)
+    spending = np.cumsum(forecast.sum(axis=1).to_numpy()) if len(forecast) else np.zeros(MAX_HORIZON)
+    rows = []
+    for label, (column, months) in HORIZONS.items():
+        goal    = float(profile[column] or 0.0)
+        spent   = float(spending[months - 1])
+        surplus = income * months - spent
+        rows.append({
+            "horizon":            label,
+            "goal":               goal,
+            "projected_spending": spent,
+            "projected_surplus":  surplus,
+            "attainment":         surplus / goal if goal > 0 else float("nan"),
+        })
+    return pd.DataFrame(rows)
+
+# ─── Benchmark ─────────────────────────────────────────────────────────────────
+# python -m components.forecast [series] [months]
+# Times the vectorized baseline against smoothing each series on its own and,
+# when Prophet is installed, a cold (parallel fit) and warm (cached) run.
+
+def benchmark(n_series: int = 1000, months: int = 36) -> dict[str, float]:
+    rng = np.random.default_rng(0)
+    t = np.arange(months)
+    y = (200 + 50 * np.sin(2 * np.pi * t / SEASON))[:, None] + rng.normal(0, 20, (months, n_series))
+
+    results = {}
+    start = time.perf_counter()
+    seasonal_smoothing(y)
+    results["baseline_vectorized_s"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for k in range(n_series):
+        seasonal_smoothing(y[:, k:k + 1])
+    results["baseline_per_series_s"] = time.perf_counter() - start
+
+    if prophet_available():
+        index = pd.date_range("2020-01-01", periods=months, freq="MS")
+        history = pd.DataFrame(y[:, :8], index=index, columns=[f"cat{k}" for k in range(8)])
+        start = time.perf_counter()
+        prophet_forecast(history, timeout=600)
+        results["prophet_8_cold_s"] = time.perf_counter() - start
+        start = time.perf_counter()
+        prophet_forecast(history, timeout=600)
+        results["prophet_8_cached_s"] = time.perf_counter() - start
+    return results
+
+if __name__ == "__main__":
+    import sys
+    import tempfile
+    args = [int(a) for a in sys.argv[1:3]]
+    CACHE_PATH = os.path.join(tempfile.mkdtemp(), "forecast_cache.db")
+    for name, secs in benchmark(*args).items():
+        print(f"{name:>22}: {secs:.4f}")
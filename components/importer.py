@@ -0,0 +1,249 @@
+# components/importer.py
+
+import io
+import re
+import pandas as pd
+from components.db import PRAGMAS, get_connection, bulk_insert_expenses
+
+CHUNK_SIZE = 200_000
+
+# Page cache for the loading connection while an import runs (KiB)
+IMPORT_CACHE_KIB = 262144
+
+# Header names accepted for each expense field (compared lower-cased)
+CSV_COLUMNS = {
+    "date":     ["date", "posted", "posted date", "transaction date", "created_at"],
+    "amount":   ["amount", "debit", "value", "amount ($)"],
+    "category": ["category", "type"],
+    "note":     ["note", "description", "memo", "payee", "name", "details"],
+}
+
+# ─── Normalization ─────────────────────────────────────────────────────────────
+
+def natural_keys(frame: pd.DataFrame, seen: dict) -> pd.Series:
+    """
+    Signed 64-bit hash of (created_at, amount, note, occurrence) per row,
+    computed vectorized. The occurrence number keeps genuinely repeated
+    transactions (two identical coffees on one day) apart, while
+    re-importing the same file yields the same keys. `seen` carries
+    occurrence counts across the chunks of one file.
+    """
+    base = pd.util.hash_pandas_object(pd.DataFrame({
+        "created_at": frame["created_at"],
+        "amount":     frame["amount"].round(2),
+        "note":       frame["note"].str.casefold(),
+    }), index=False)
+    occurrence = base.groupby(base).cumcount() + 1
+    if seen:
+        occurrence += base.map(seen).fillna(0).astype("int64")
+    counts = base.value_counts()
+    for h, n in zip(counts.index.tolist(), counts.tolist()):
+        seen[h] = seen.get(h, 0) + n
+    keys = pd.util.hash_pandas_object(
+        pd.DataFrame({"base": base, "occurrence": occurrence}), index=False
+    )
+    return keys.astype("int64")
+
+def normalize(frame: pd.DataFrame, seen: dict, sign: str = "abs") -> tuple[pd.DataFrame, int]:
+    """
+    Validate and normalize a chunk with date/amount[/category/note]
+    columns. Returns (clean rows, number rejected). With sign="debits",
+    only negative amounts are kept (positive rows are credits); with
+    "abs", every non-zero amount counts as an expense.
+    """
+    n = len(frame)
+    dates   = pd.to_datetime(frame["date"], errors="coerce", format="mixed")
+    amounts = pd.to_numeric(
+        frame["amount"].astype(str).str.replace(r"[$,\s]", "", regex=True),
+        errors="coerce"
+    )
+    valid = dates.notna() & amounts.notna() & (amounts != 0)
+    if sign == "debits":
+        skipped_credits = valid & (amounts > 0)
+        valid &= amounts < 0
+    else:
+        skipped_credits = pd.Series(False, index=frame.index)
+
+    clean = pd.DataFrame({
+        "amount":     amounts[valid].abs().round(2),
+        "category":   (frame["category"][valid].fillna("Other").astype(str).str.strip().str.title()
+                       if "category" in frame else "Other"),
+        "note":       (frame["note"][valid].fillna("").astype(str).str.strip()
+                       if "note" in frame else ""),
+        "created_at": dates[valid].dt.strftime("%Y-%m-%d %H:%M:%S"),
+    })
+    clean.loc[clean["category"] == "", "category"] = "Other"
+    clean["natural_key"] = natural_keys(clean, seen)
+    rejected = n - int(valid.sum()) - int(skipped_credits.sum())
+    return clean, rejected
+
+# ─── Readers ───────────────────────────────────────────────────────────────────
+
+def _match_columns(columns) -> dict:
+    lookup = {str(c).strip().lower(): c for c in columns}
+    found = {}
+    for field, names in CSV_COLUMNS.items():
+        for name in names:
+            if name in lookup:
+                found[lookup[name]] = field
+                break
+    missing = {"date", "amount"} - set(found.values())
+    if missing:
+        raise ValueError(f"CSV is missing required column(s): {', '.join(sorted(missing))}")
+    return found
+
+def read_csv(source, chunk_size: int = CHUNK_SIZE):
+    """Stream a CSV as DataFrames of date/amount/category/note columns."""
+    reader = pd.read_csv(source, chunksize=chunk_size, dtype=str, skipinitialspace=True)
+    mapping = None
+    for chunk in reader:
+        if mapping is None:
+            mapping = _match_columns(chunk.columns)
+        yield chunk[list(mapping)].rename(columns=mapping)
+
+_OFX_TAG = re.compile(r"<(/?\w+)>([^<\r\n]*)")
+
+def _ofx_date(value: str) -> str:
+    # 20240105120000[-5:EST] -> 2024-01-05 12:00:00
+    digits = re.sub(r"\D", "", value.split("[")[0].split(".")[0])[:14].ljust(14, "0")
+    return f"{digits[:4]}-{digits[4:6]}-{digits[6:8]} {digits[8:10]}:{digits[10:12]}:{digits[12:14]}"
+
+def _ofx_row(txn: dict) -> dict:
+    note = txn.get("NAME") or txn.get("PAYEE") or ""
+    if txn.get("MEMO") and txn["MEMO"] != note:
+        note = f"{note} {txn['MEMO']}".strip()
+    return {"date": _ofx_date(txn.get("DTPOSTED", "")), "amount": txn.get("TRNAMT"), "note": note}
+
+def read_ofx(source, chunk_size: int = CHUNK_SIZE):
+    """
+    Stream STMTTRN records from an OFX/QFX file (SGML v1 or XML v2)
+    as DataFrames of date/amount/note columns.
+    """
+    if isinstance(source, str):
+        source = open(source, encoding="utf-8", errors="replace")
+    elif not isinstance(source, io.TextIOBase):
+        source = io.TextIOWrapper(source, encoding="utf-8", errors="replace")
+
+    rows, txn = [], None
+    with source:
+        for line in source:
+            # Tags are handled in order, so several records on one line
+            # (XML files without line breaks) each close on their own tag
+            for tag, value in _OFX_TAG.findall(line):
+                tag = tag.upper()
+                if tag == "STMTTRN":
+                    txn = {}
+                elif tag == "/STMTTRN" and txn is not None:
+                    rows.append(_ofx_row(txn))
+                    txn = None
+                    if len(rows) >= chunk_size:
+                        yield pd.DataFrame(rows)
+                        rows = []
+                elif txn is not None and tag[0] != "/":
+                    txn[tag] = value.strip()
+    if rows:
+        yield pd.DataFrame(rows)
+
+# ─── Import ────────────────────────────────────────────────────────────────────
+
+def import_file(source, kind: str = None, sign: str = None,
+                chunk_size: int = CHUNK_SIZE, on_progress=None,
+                path: str = None, categorize: bool = False) -> dict:
+    """
+    Import a CSV or OFX/QFX statement into expenses. Each chunk is
+    normalized, then inserted with one executemany in its own
+    transaction; rows whose natural key already exists are skipped.
+    With `categorize`, rows that would be filed under "Other" get a
+    category suggested from their note. `on_progress(stats)` is called
+    after every chunk. Returns {"read", "inserted", "duplicates", "rejected"}.
+    """
+    if kind is None:
+        name = source if isinstance(source, str) else getattr(source, "name", "")
+        kind = "ofx" if str(name).lower().endswith((".ofx", ".qfx")) else "csv"
+    if kind == "ofx":
+        chunks = read_ofx(source, chunk_size)
+        sign = sign or "debits"   # OFX debits are negative TRNAMT
+    else:
+        chunks = read_csv(source, chunk_size)
+        sign = sign or "abs"
+
+    stats = {"read": 0, "inserted": 0, "duplicates": 0, "rejected": 0}
+    seen = {}
+    for chunk in chunks:
+        clean, rejected = normalize(chunk, seen, sign)
+        if categorize:
+            from components.categorize import categorize as suggest
+            auto = (clean["category"] == "Other") & (clean["note"] != "")
+            if auto.any():
+                clean.loc[auto, "category"] = suggest(clean.loc[auto, "note"].tolist(), path=path)
+        with get_connection(path) as conn:
+            # A larger page cache keeps index pages hot across the chunk
+            conn.execute(f"PRAGMA cache_size=-{IMPORT_CACHE_KIB}")
+            try:
+                inserted = bulk_insert_expenses(conn, zip(
+                    *(clean[c].tolist() for c in ("amount", "category", "note", "created_at", "natural_key"))
+                ))
+                conn.commit()
+            finally:
+                conn.execute(f"PRAGMA cache_size={PRAGMAS['cache_size']}")
+        stats["read"]       += len(chunk)
+        stats["rejected"]   += rejected
+        stats["inserted"]   += inserted
+        stats["duplicates"] += len(clean) - inserted
+        if on_progress:
+            on_progress(dict(stats))
+    return stats
+
+# ─── CLI ───────────────────────────────────────────────────────────────────────
+# python -m components.importer FILE [--sign abs|debits]
+# python -m components.importer --bench [ROWS]   synthetic statement into a temp db
+
+def synthetic_statement(path: str, rows: int, seed: int = 0):
+    """Write a bank-style CSV with `rows` random debits."""
+    import numpy as np
+    rng = np.random.default_rng(seed)
+    payees = np.array(["Grocery Mart", "City Transit", "Power Co", "Cinema 9",
+                       "Landlord LLC", "Coffee House", "Online Store"])
+    seconds = rng.integers(0, 5 * 365 * 86400, rows)
+    pd.DataFrame({
+        "Date":        pd.Timestamp("2020-01-01") + pd.to_timedelta(seconds, unit="s"),
+        "Description": payees[rng.integers(0, len(payees), rows)],
+        "Amount":      -rng.gamma(2.0, 20.0, rows).round(2) - 0.01,
+    }).to_csv(path, index=False)
+
+if __name__ == "__main__":
+    import argparse
+    import os
+    import tempfile
+    import time
+    from components.db import create_table, get_connection as _conn
+
+    parser = argparse.ArgumentParser(prog="python -m components.importer")
+    parser.add_argument("file", nargs="?")
+    parser.add_argument("--sign", choices=["abs", "debits"])
+    parser.add_argument("--bench", type=int, nargs="?", const=1_000_000, metavar="ROWS")
+    args = parser.parse_args()
+
+    progress = lambda s: print(f"  {s['read']:>10,} read  {s['inserted']:>10,} inserted", end="\r")
+    if args.bench:
+        tmp = tempfile.mkdtemp()
+        csv_path, db_path = os.path.join(tmp, "statement.csv"), os.path.join(tmp, "bench.db")
+        synthetic_statement(csv_path, args.bench)
+        import components.db as db
+        db.DB_PATH = db_path
+        create_table()
+        start = time.perf_counter()
+        stats = import_file(csv_path, sign="debits", on_progress=progress, path=db_path)
+        elapsed = time.perf_counter() - start
+        print(f"\nImported {stats['inserted']:,} rows in {elapsed:.2f}s "
+              f"({stats['inserted'] / elapsed:,.0f} rows/s)")
+        start = time.perf_counter()
+        again = import_file(csv_path, sign="debits", path=db_path)
+        print(f"Re-import: {again['duplicates']:,} duplicates skipped in "
+              f"{time.perf_counter() - start:.2f}s")
+    elif args.file:
+        create_table()
+        stats = import_file(args.file, sign=args.sign, on_progress=progress)
+        print(f"\n{stats}")
+    else:
+        parser.print_help()
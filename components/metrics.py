@@ -0,0 +1,245 @@
+# components/metrics.py
+
+import os
+import json
+import time
+import logging
+import threading
+import functools
+from bisect import bisect_left
+from collections import deque
+
+# Timings are collected only while enabled (BUDGETWISE_METRICS=1, or the
+# toggle on the Performance page). When disabled, an instrumented call costs
+# one global lookup on top of the call itself.
+ENABLED = os.getenv("BUDGETWISE_METRICS", "0") == "1"
+
+# The Performance page is open to anyone with ?page=performance; switching
+# collection on/off and resetting it (process-wide) needs this as well.
+ADMIN = os.getenv("BUDGETWISE_METRICS_ADMIN", "0") == "1"
+
+# SQLite statements at or above this many ms are kept in the slow-query log
+SLOW_QUERY_MS  = float(os.getenv("BUDGETWISE_SLOW_QUERY_MS", "250"))
+SLOW_QUERY_LOG = 200   # most recent slow statements kept in memory
+
+# Histogram bucket upper bounds in seconds (plus an implicit +Inf)
+BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+           0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_log = logging.getLogger("budgetwise.slow_query")
+
+def enable(on: bool = True):
+    global ENABLED
+    ENABLED = on
+
+# ─── Timers ────────────────────────────────────────────────────────────────────
+
+class Timer:
+    """
+    Count, total, max and a fixed-bucket histogram of durations. Memory
+    is constant however many calls are observed; percentiles are read
+    off the histogram by interpolating inside the bucket.
+    """
+
+    __slots__ = ("name", "count", "total", "max", "buckets", "_lock")
+
+    def __init__(self, name: str):
+        self.name    = name
+        self.count   = 0
+        self.total   = 0.0
+        self.max     = 0.0
+        self.buckets = [0] * (len(BUCKETS) + 1)
+        self._lock   = threading.Lock()
+
+    def observe(self, seconds: float):
+        i = bisect_left(BUCKETS, seconds)
+        with self._lock:
+            self.count += 1
+            self.total += seconds
+            self.buckets[i] += 1
+            if seconds > self.max:
+                self.max = seconds
+
+    def percentile(self, q: float) -> float:
+        """Estimated q-quantile (0..1) in seconds."""
+        with self._lock:
+            count, buckets, top = self.count, list(self.buckets), self.max
+        if not count:
+            return 0.0
+        rank, seen = q * count, 0
+        for i, n in enumerate(buckets):
+            if n and seen + n >= rank:
+                lo = BUCKETS[i - 1] if i else 0.0
+                hi = min(BUCKETS[i], top) if i < len(BUCKETS) else top
+                return lo + (hi - lo) * (rank - seen) / n
+            seen += n
+        return top
+
+    def reset(self):
+        with self._lock:
+            self.count, self.total, self.max = 0, 0.0, 0.0
+            self.buckets = [0] * (len(BUCKETS) + 1)
+
+    def snapshot(self) -> dict:
+        out = {
+            "count":   self.count,
+            "total_s": self.total,
+            "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+            "max_ms":  self.max * 1000,
+        }
+        for q in (50, 95, 99):
+            out[f"p{q}_ms"] = self.percentile(q / 100) * 1000
+        return out
+
+_timers = {}
+_timers_lock = threading.Lock()
+
+def timer(name: str) -> Timer:
+    """The registered Timer called `name`, created on first use."""
+    t = _timers.get(name)
+    if t is None:
+        with _timers_lock:
+            t = _timers.setdefault(name, Timer(name))
+    return t
+
+class _Track:
+    __slots__ = ("timer", "start")
+
+    def __init__(self, timer: Timer):
+        self.timer = timer
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.timer.observe(time.perf_counter() - self.start)
+
+class _NoTrack:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+_NO_TRACK = _NoTrack()
+
+def track(name: str):
+    """Context manager timing its block as `name`: with track("prices.fetch"): ..."""
+    return _Track(timer(name)) if ENABLED else _NO_TRACK
+
+def timed(name: str = None):
+    """
+    Decorator timing every call as `name`, by default "<module>.<function>"
+    (e.g. "db.get_summary"). Not for generator functions: only creating
+    the generator would be timed.
+    """
+    def decorate(fn):
+        metric = timer(name or f"{fn.__module__.rsplit('.', 1)[-1]}.{fn.__name__}")
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                metric.observe(time.perf_counter() - start)
+        return wrapper
+    return decorate
+
+# ─── Slow-query log ────────────────────────────────────────────────────────────
+# components.db reports every statement it executes while enabled. Times are
+# for execute(): for a SELECT that is the work up to the first row.
+
+_statements = timer("sqlite.statement")
+_slow = deque(maxlen=SLOW_QUERY_LOG)
+
+def observe_query(sql: str, seconds: float):
+    _statements.observe(seconds)
+    ms = seconds * 1000
+    if ms >= SLOW_QUERY_MS:
+        sql = " ".join(sql.split())
+        _slow.append({"at": time.time(), "ms": ms, "sql": sql[:1000]})
+        _log.warning("slow query (%.0f ms): %s", ms, sql[:200])
+
+def slow_queries() -> list[dict]:
+    """Logged slow statements, newest first."""
+    return list(reversed(_slow))
+
+# ─── Export ────────────────────────────────────────────────────────────────────
+
+def snapshot() -> dict[str, dict]:
+    """{name: count/total/mean/percentiles/max} for every timer with calls."""
+    with _timers_lock:
+        timers = sorted(_timers.values(), key=lambda t: t.name)
+    return {t.name: t.snapshot() for t in timers if t.count}
+
+def reset():
+    with _timers_lock:
+        timers = list(_timers.values())
+    for t in timers:
+        t.reset()
+    _slow.clear()
+
+def to_json() -> str:
+    return json.dumps({
+        "enabled": ENABLED,
+        "slow_query_ms": SLOW_QUERY_MS,
+        "timers": snapshot(),
+        "slow_queries": slow_queries(),
+    }, indent=2)
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+def to_prometheus() -> str:
+    """Prometheus text exposition: one histogram series per timer."""
+    lines = [
+        "# HELP budgetwise_duration_seconds Time spent in instrumented calls.",
+        "# TYPE budgetwise_duration_seconds histogram",
+    ]
+    with _timers_lock:
+        timers = sorted(_timers.values(), key=lambda t: t.name)
+    for t in timers:
+        with t._lock:
+            count, total, buckets = t.count, t.total, list(t.buckets)
+        if not count:
+            continue
+        name = _label(t.name)
+        cumulative = 0
+        for bound, n in zip(BUCKETS + (float("inf"),), buckets):
+            cumulative += n
+            le = "+Inf" if bound == float("inf") else repr(bound)
+            lines.append(f'budgetwise_duration_seconds_bucket{{name="{name}",le="{le}"}} {cumulative}')
+        lines.append(f'budgetwise_duration_seconds_sum{{name="{name}"}} {total!r}')
+        lines.append(f'budgetwise_duration_seconds_count{{name="{name}"}} {count}')
+    lines += [
+        "# HELP budgetwise_slow_queries Slow SQLite statements currently in the log.",
+        "# TYPE budgetwise_slow_queries gauge",
+        f"budgetwise_slow_queries {len(_slow)}",
+    ]
+    return "\n".join(lines) + "\n"
+
+# ─── Overhead check ────────────────────────────────────────────────────────────
+# python -m components.metrics   cost of an instrumented call, disabled vs enabled
+
+if __name__ == "__main__":
+    @timed("bench.noop")
+    def noop():
+        pass
+
+    def bare():
+        pass
+
+    n = 1_000_000
+    for label, fn, on in [("plain function", bare, False), ("@timed, disabled", noop, False),
+                          ("@timed, enabled", noop, True)]:
+        enable(on)
+        start = time.perf_counter()
+        for _ in range(n):
+            fn()
+        print(f"{label:<18} {(time.perf_counter() - start) / n * 1e9:7.0f} ns/call")
@@ -1,7 +1,12 @@
 # components/news.py
 
+import os
+import time
 import feedparser
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import quote
+from components.cache import TTLCache
+from components.metrics import timed
 
 symbol_map = {
     "AAPL": "Apple",
@@ -16,15 +21,24 @@ symbol_map = {
     "NVDA": "NVIDIA"
 }
 
-def fetch_news(symbol: str) -> list[dict]:
-    """
-    Returns up to 5 recent headlines for symbol from Google News RSS,
-    each as {title, link, source}.
-    """
+# {query} is replaced with the URL-encoded search; overridable for local stubs
+NEWS_URL = os.getenv(
+    "BUDGETWISE_NEWS_URL",
+    "https://news.google.com/rss/search?q={query}&hl=en-US&gl=US&ceid=US:en"
+)
+FEED_TTL    = float(os.getenv("BUDGETWISE_FEED_TTL", "300"))   # seconds
+MAX_WORKERS = int(os.getenv("BUDGETWISE_FEED_WORKERS", "8"))
+
+# url -> {"etag", "modified", "items", "fetched_at"}. Entries outlive FEED_TTL
+# so that, once stale, they still provide validators for a conditional GET.
+_feed_state = TTLCache(maxsize=512)
+
+def feed_url(symbol: str) -> str:
     query = quote(f"{symbol_map.get(symbol, symbol)} stock when:1d")
-    url   = f"https://news.google.com/rss/search?q={query}&hl=en-US&gl=US&ceid=US:en"
-    feed  = feedparser.parse(url)
-    out   = []
+    return NEWS_URL.format(query=query)
+
+def _parse_entries(feed) -> list[dict]:
+    out = []
     for entry in feed.entries[:5]:
         title  = entry.title
         link   = entry.link
@@ -32,3 +46,74 @@ def fetch_news(symbol: str) -> list[dict]:
         source = entry.get("source", {}).get("title", "")
         out.append({"title": title, "link": link, "source": source})
     return out
+
+def fetch_feed(url: str) -> list[dict]:
+    """
+    Fetch and parse one RSS feed. Served from memory within FEED_TTL;
+    after that, revalidated with If-None-Match / If-Modified-Since so an
+    unchanged feed costs a 304 instead of a full download.
+    """
+    state = _feed_state.get(url, None)
+    if state and time.monotonic() - state["fetched_at"] < FEED_TTL:
+        return state["items"]
+
+    feed = feedparser.parse(
+        url,
+        etag=state["etag"] if state else None,
+        modified=state["modified"] if state else None,
+    )
+    failed = not feed.entries and (feed.get("bozo") or feed.get("status", 200) >= 400)
+    if state and (feed.get("status") == 304 or failed):
+        # Unchanged, or the request failed: keep serving what we have
+        items = state["items"]
+    elif failed:
+        # Nothing to fall back on: retry on the next call instead of
+        # caching an empty list for FEED_TTL
+        return []
+    else:
+        items = _parse_entries(feed)
+    _feed_state.set(url, {
+        "etag":       feed.get("etag") or (state and state["etag"]),
+        "modified":   feed.get("modified") or (state and state["modified"]),
+        "items":      items,
+        "fetched_at": time.monotonic(),
+    })
+    return items
+
+@timed()
+def fetch_news(symbol: str) -> list[dict]:
+    """
+    Returns up to 5 recent headlines for symbol from Google News RSS,
+    each as {title, link, source}.
+    """
+    return fetch_feed(feed_url(symbol))
+
+@timed()
+def fetch_news_many(symbols: list[str], max_workers: int = MAX_WORKERS,
+                    on_result=None, fetch=None) -> dict[str, list[dict]]:
+    """
+    Fetch headlines for several symbols in parallel on a bounded thread
+    pool. Returns {symbol: headlines} in the order given; a symbol whose
+    fetch fails gets []. `on_result(symbol, headlines)` is called from
+    the workers as each feed arrives. `fetch` replaces fetch_news (e.g.
+    with an offline stub).
+    """
+    fetch = fetch or fetch_news
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        return {}
+
+    def one(symbol):
+        try:
+            items = fetch(symbol)
+        except Exception as e:
+            print(f"News fetch failed for {symbol}:", e)
+            items = []
+        if on_result:
+            on_result(symbol, items)
+        return items
+
+    workers = max(1, min(max_workers, len(symbols)))
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="news") as pool:
+        results = pool.map(one, symbols)
+        return dict(zip(symbols, results))
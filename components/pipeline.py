@@ -0,0 +1,127 @@
+# components/pipeline.py
+
+import os
+import time
+import queue
+from concurrent.futures import ThreadPoolExecutor
+from components import news, sentiment, prices
+from components.advisor import plan_trade, recommend_trades
+
+MAX_WORKERS = int(os.getenv("BUDGETWISE_PIPELINE_WORKERS", "32"))
+
+def analyze_watchlist(symbols: list[str],
+                      mode: str,
+                      income: float,
+                      savings: float,
+                      fetch_news=None,
+                      score_symbols=None,
+                      get_prices=None,
+                      log_trades=None):
+    """
+    Staged trade analysis for a whole watchlist. Yields events as work
+    completes so the UI can render progressively:
+
+      ("news",   symbol, headlines)   as each feed arrives
+      ("result", symbol, {"sentiment", "scores", "price", "recommendation", "units"})
+
+    Stages: news.fetch_news_many for every symbol and one batched quote
+    request run concurrently; then all headlines are scored in one
+    batch; then advisor.recommend_trades logs every recommendation in a
+    single transaction. The keyword arguments swap in other sources
+    (e.g. offline stubs).
+    """
+    score_symbols = score_symbols or sentiment.score_symbols
+    get_prices    = get_prices    or prices.get_prices
+
+    symbols = list(dict.fromkeys(symbols))
+    if not symbols:
+        return
+
+    # 1) Network stage: all feeds plus one quote request, concurrently.
+    #    Feeds are reported through a queue as the news workers finish them.
+    arrived = queue.SimpleQueue()
+    with ThreadPoolExecutor(max_workers=2, thread_name_prefix="pipeline") as pool:
+        price_future = pool.submit(get_prices, symbols)
+        news_future  = pool.submit(
+            news.fetch_news_many, symbols, MAX_WORKERS,
+            on_result=lambda sym, items: arrived.put((sym, items)), fetch=fetch_news
+        )
+        news_future.add_done_callback(lambda _: arrived.put(None))
+        while (event := arrived.get()) is not None:
+            yield "news", *event
+        headlines = news_future.result()
+        try:
+            quotes = price_future.result()
+        except Exception as e:
+            print("Price fetch failed:", e)
+            quotes = {}
+
+    # 2) Sentiment stage: one batched pass over every headline
+    with_news = [sym for sym in symbols if headlines[sym]]
+    if not with_news:
+        return
+    scored = score_symbols({sym: [h["title"] for h in headlines[sym]] for sym in with_news})
+
+    # 3) Recommendations, logged in one transaction
+    recs = recommend_trades(
+        {sym: scored[sym]["sentiment"] for sym in with_news},
+        mode, income, savings, quotes=quotes, log=log_trades
+    )
+    for sym in with_news:
+        rec, units = recs[sym]
+        yield "result", sym, {
+            "sentiment":      scored[sym]["sentiment"],
+            "scores":         scored[sym]["scores"],
+            "price":          quotes.get(sym),
+            "recommendation": rec,
+            "units":          units,
+        }
+
+# ─── Offline benchmark ─────────────────────────────────────────────────────────
+# python -m components.pipeline [n_symbols] [latency_s]
+# Compares the old per-symbol loop against the staged pipeline using stubs
+# that sleep like network calls.
+
+def benchmark(n_symbols: int = 20, latency: float = 0.2) -> dict[str, float]:
+    symbols = [f"SYM{i}" for i in range(n_symbols)]
+    logged = []
+
+    def stub_news(sym):
+        time.sleep(latency)
+        return [{"title": f"{sym} beats estimates {i}", "link": "", "source": ""} for i in range(5)]
+
+    def stub_prices(syms):
+        time.sleep(latency)
+        return {s: 100.0 for s in syms}
+
+    def stub_score(by_symbol):
+        time.sleep(0.05)  # one model call
+        return {s: {"scores": [0.5] * len(t), "sentiment": 0.5} for s, t in by_symbol.items()}
+
+    def stub_log(rows):
+        logged.extend(rows)
+
+    start = time.perf_counter()
+    for sym in symbols:
+        items = stub_news(sym)
+        s = stub_score({sym: [h["title"] for h in items]})[sym]["sentiment"]
+        price = stub_prices([sym])[sym]
+        rec, units = plan_trade(sym, s, "Conservative", 1000.0, 0.0, price=price)
+        stub_log([(sym, s, rec, units, "Conservative")])
+    sequential = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in analyze_watchlist(symbols, "Conservative", 1000.0, 0.0,
+                               fetch_news=stub_news, score_symbols=stub_score,
+                               get_prices=stub_prices, log_trades=stub_log):
+        pass
+    staged = time.perf_counter() - start
+    return {"sequential_s": sequential, "pipeline_s": staged}
+
+if __name__ == "__main__":
+    import sys
+    args = [float(a) for a in sys.argv[1:3]]
+    n = int(args[0]) if args else 20
+    lat = args[1] if len(args) > 1 else 0.2
+    for name, secs in benchmark(n, lat).items():
+        print(f"{name:>13}: {secs:.2f}")
@@ -0,0 +1,253 @@
+# components/prices.py
+
+import os
+import time
+import zlib
+import pandas as pd
+from components.cache import TTLCache, MISSING
+from components.db import BASE_DIR, get_connection
+from components.metrics import timed, track
+
+QUOTE_TTL     = float(os.getenv("BUDGETWISE_QUOTE_TTL", "60"))      # seconds
+HISTORY_TTL   = float(os.getenv("BUDGETWISE_HISTORY_TTL", "300"))   # seconds
+SYNC_INTERVAL = float(os.getenv("BUDGETWISE_HISTORY_SYNC", "900"))  # seconds
+
+# Chart ranges offered by the Stock Tracker, in calendar days
+PERIODS = {"7d": 7, "1mo": 31, "3mo": 92, "6mo": 183, "1y": 366, "5y": 1827}
+
+def period_delta(period: str) -> pd.Timedelta:
+    return pd.Timedelta(days=PERIODS[period])
+
+# ─── Price sources ─────────────────────────────────────────────────────────────
+# A source provides latest_closes(symbols) -> {symbol: price} in one request,
+# and bars(symbol, start, end) -> daily OHLCV DataFrame indexed by date for
+# [start, end) (end=None means up to today).
+
+BAR_COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+class YFinanceSource:
+    """Live prices from Yahoo Finance."""
+
+    def latest_closes(self, symbols: list[str]) -> dict[str, float]:
+        import yfinance as yf
+        data = yf.download(symbols, period="5d", progress=False, threads=True)
+        if data.empty:
+            return {}
+        closes = data["Close"]
+        if isinstance(closes, pd.Series):
+            closes = closes.to_frame(symbols[0])
+        out = {}
+        for sym in symbols:
+            if sym in closes:
+                series = closes[sym].dropna()
+                if not series.empty:
+                    out[sym] = float(series.iloc[-1])
+        return out
+
+    def bars(self, symbol: str, start, end=None) -> pd.DataFrame:
+        import yfinance as yf
+        hist = yf.Ticker(symbol).history(start=start, end=end, interval="1d")
+        return hist[BAR_COLUMNS] if not hist.empty else hist
+
+class StubSource:
+    """
+    Deterministic offline prices for tests and load runs: every symbol
+    gets a fixed base price and a repeatable value for each business day.
+    """
+
+    def __init__(self):
+        self.calls = 0
+
+    def _base(self, symbol: str) -> float:
+        return 50.0 + zlib.crc32(symbol.encode()) % 450
+
+    def latest_closes(self, symbols: list[str]) -> dict[str, float]:
+        self.calls += 1
+        return {sym: self._base(sym) for sym in symbols}
+
+    def bars(self, symbol: str, start, end=None) -> pd.DataFrame:
+        self.calls += 1
+        end   = pd.Timestamp(end) - pd.Timedelta(days=1) if end is not None else pd.Timestamp.today().normalize()
+        index = pd.bdate_range(start=pd.Timestamp(start), end=end, name="Date")
+        base  = self._base(symbol)
+        close = [base * (1 + 0.01 * ((d.toordinal() % 7) - 3)) for d in index]
+        return pd.DataFrame({
+            "Open": close, "High": [c * 1.01 for c in close],
+            "Low": [c * 0.99 for c in close], "Close": close,
+            "Volume": [1_000_000] * len(close),
+        }, index=index)
+
+_SOURCES = {"yfinance": YFinanceSource, "stub": StubSource}
+_source = None
+
+def get_price_source():
+    global _source
+    if _source is None:
+        _source = _SOURCES[os.getenv("BUDGETWISE_PRICE_SOURCE", "yfinance")]()
+    return _source
+
+def set_price_source(source):
+    """Swap the price source (e.g. StubSource()) and drop cached prices."""
+    global _source
+    _source = source
+    _quotes.clear()
+    _histories.clear()
+
+# ─── Cached lookups ────────────────────────────────────────────────────────────
+
+_quotes    = TTLCache(maxsize=1024, ttl=QUOTE_TTL)
+_histories = TTLCache(maxsize=256, ttl=HISTORY_TTL)
+
+@timed()
+def get_prices(symbols: list[str]) -> dict[str, float]:
+    """
+    Latest close for each symbol. Cached symbols are served locally and
+    all the rest are fetched together in a single source call. Symbols
+    without data are left out of the result.
+    """
+    symbols = list(dict.fromkeys(s.upper() for s in symbols))
+    prices, missing = {}, []
+    for sym in symbols:
+        price = _quotes.get(sym)
+        if price is MISSING:
+            missing.append(sym)
+        else:
+            prices[sym] = price
+    if missing:
+        with track("prices.fetch"):
+            fetched = get_price_source().latest_closes(missing)
+        for sym, price in fetched.items():
+            _quotes.set(sym, price)
+        prices.update(fetched)
+    return {sym: prices[sym] for sym in symbols if sym in prices}
+
+@timed()
+def get_price(symbol: str) -> float:
+    prices = get_prices([symbol])
+    if not prices:
+        raise ValueError(f"No price data for {symbol}")
+    return prices[symbol.upper()]
+
+# ─── Local history store ───────────────────────────────────────────────────────
+# Daily bars live in data/prices.db, clustered by (symbol, date) so a chart
+# range is one contiguous, memory-mapped read. price_coverage records which
+# date span has been downloaded per symbol: longer ranges only backfill the
+# older part, and newer bars are appended at most every SYNC_INTERVAL.
+
+STORE_PATH = os.path.join(BASE_DIR, "data", "prices.db")
+
+STORE_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS price_bars (
+        symbol TEXT NOT NULL,
+        date TEXT NOT NULL,       -- 'YYYY-MM-DD'
+        open REAL, high REAL, low REAL, close REAL, volume REAL,
+        PRIMARY KEY (symbol, date)
+    ) WITHOUT ROWID
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS price_coverage (
+        symbol TEXT PRIMARY KEY,
+        first_date TEXT NOT NULL,
+        last_date TEXT NOT NULL,
+        synced_at REAL NOT NULL   -- unix time of the last forward sync
+    )
+    """,
+]
+
+def _store_conn():
+    return get_connection(STORE_PATH, schema=STORE_SCHEMA)
+
+def _save_bars(conn, symbol: str, bars: pd.DataFrame):
+    if bars.empty:
+        return
+    rows = zip(
+        [symbol] * len(bars),
+        bars.index.strftime("%Y-%m-%d"),
+        *(bars[c].astype(float).tolist() for c in BAR_COLUMNS)
+    )
+    conn.executemany(
+        "INSERT OR REPLACE INTO price_bars "
+        "(symbol, date, open, high, low, close, volume) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        rows
+    )
+
+@timed()
+def sync_history(symbol: str, period: str = "7d") -> int:
+    """
+    Download only the bars missing from the local store for `period`.
+    Returns the number of source calls made (0 when fully up to date).
+    """
+    today = pd.Timestamp.today().normalize()
+    want_start = f"{today - period_delta(period):%Y-%m-%d}"
+    source = get_price_source()
+    with _store_conn() as conn:
+        cov = conn.execute(
+            "SELECT first_date, last_date, synced_at FROM price_coverage WHERE symbol=?",
+            (symbol,)
+        ).fetchone()
+
+    # Every download happens before the write transaction opens, so a slow
+    # source never holds the store's write lock (or a pooled connection)
+    fetched = []
+    if cov is None:
+        fetched.append(source.bars(symbol, start=want_start))
+        first, last = want_start, want_start
+        synced = time.time()
+    else:
+        first, last, synced = cov
+        if want_start < first:
+            # Backfill only the older part of a longer range
+            fetched.append(source.bars(symbol, start=want_start, end=first))
+            first = want_start
+        if time.time() - synced > SYNC_INTERVAL:
+            # Re-fetch from the last stored bar, which may have been partial
+            fetched.append(source.bars(symbol, start=last))
+            synced = time.time()
+    calls = len(fetched)
+    if calls:
+        with _store_conn() as conn:
+            for bars in fetched:
+                _save_bars(conn, symbol, bars)
+            newest = conn.execute(
+                "SELECT MAX(date) FROM price_bars WHERE symbol=?", (symbol,)
+            ).fetchone()[0]
+            conn.execute(
+                "INSERT OR REPLACE INTO price_coverage (symbol, first_date, last_date, synced_at) "
+                "VALUES (?, ?, ?, ?)",
+                (symbol, first, max(newest or last, last), synced)
+            )
+    return calls
+
+def read_history(symbol: str, start: str, columns: list[str] = BAR_COLUMNS) -> pd.DataFrame:
+    """Stored bars for symbol from `start` on, selecting only `columns`."""
+    cols = ", ".join(c.lower() + f' AS "{c}"' for c in columns)
+    with _store_conn() as conn:
+        return pd.read_sql_query(
+            f"SELECT date AS Date, {cols} FROM price_bars "
+            f"WHERE symbol=? AND date >= ? ORDER BY date",
+            conn,
+            params=(symbol, start),
+            parse_dates=["Date"],
+            index_col="Date"
+        )
+
+@timed()
+def get_history(symbol: str, period: str = "7d") -> pd.DataFrame:
+    """
+    Daily history for the chart over `period` (a key of PERIODS). Served
+    from the local store after an incremental sync, and cached in memory
+    per (symbol, period).
+    """
+    symbol = symbol.upper()
+    key = (symbol, period)
+    hist = _histories.get(key)
+    if hist is MISSING:
+        sync_history(symbol, period)
+        start = f"{pd.Timestamp.today().normalize() - period_delta(period):%Y-%m-%d}"
+        hist = read_history(symbol, start)
+        if not hist.empty:
+            _histories.set(key, hist)
+            # The last bar doubles as a fresh quote for the advisor
+            _quotes.set(symbol, float(hist["Close"].iloc[-1]))
+    return hist
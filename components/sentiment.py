@@ -1,22 +1,247 @@
 # components/sentiment.py
 
-from transformers import pipeline
+import os
+import hashlib
+import threading
+import time
+import unicodedata
+from components.cache import TTLCache, MISSING
+from components.db import BASE_DIR, get_connection
+from components.metrics import timed
 
 # This model predicts 1–5 star; we map to -1…+1
-sentiment_pipe = pipeline("sentiment-analysis", model="nlptown/bert-base-multilingual-uncased-sentiment")
+MODEL_NAME     = "nlptown/bert-base-multilingual-uncased-sentiment"
+MODEL_REVISION = os.getenv("BUDGETWISE_SENTIMENT_REVISION", "main")
+
+BATCH_SIZE = int(os.getenv("BUDGETWISE_SENTIMENT_BATCH_SIZE", "32"))
+
+# torch/transformers and the model weights are loaded on first use, not at
+# import time, so pages that never score headlines never pay for them.
+_pipe = None
+_pipe_lock = threading.Lock()
+_warm_up_lock = threading.Lock()
+_warm_up_thread = None
+
+def get_pipeline():
+    """Process-wide sentiment pipeline, built once on first call."""
+    global _pipe
+    if _pipe is None:
+        with _pipe_lock:
+            if _pipe is None:
+                from transformers import pipeline
+                _pipe = pipeline(
+                    "sentiment-analysis", model=MODEL_NAME, revision=MODEL_REVISION
+                )
+    return _pipe
+
+def warm_up() -> threading.Thread:
+    """Load the pipeline in a daemon thread (once per process)."""
+    global _warm_up_thread
+    with _warm_up_lock:
+        if _warm_up_thread is None:
+            _warm_up_thread = threading.Thread(
+                target=get_pipeline, name="sentiment-warm-up", daemon=True
+            )
+            _warm_up_thread.start()
+    return _warm_up_thread
+
+def _label_to_score(label: str) -> float:
+    """
+    1 star → -1.0; 3 stars → 0.0; 5 stars → +1.0
+    """
+    stars = int(label.split()[0])  # e.g. "4 stars"
+    return (stars - 3) / 2.0
+
+# ─── Score cache ───────────────────────────────────────────────────────────────
+# Scores are content-addressed by (normalized headline, model, revision): an
+# in-process LRU in front of a SQLite table shared by every worker. Only
+# misses in both layers reach the model.
+
+CACHE_PATH     = os.path.join(BASE_DIR, "data", "sentiment_cache.db")
+CACHE_TTL      = float(os.getenv("BUDGETWISE_SENTIMENT_CACHE_TTL", str(7 * 24 * 3600)))
+CACHE_MAX_ROWS = int(os.getenv("BUDGETWISE_SENTIMENT_CACHE_MAX_ROWS", "200000"))
+
+_memory_cache = TTLCache(maxsize=4096, ttl=CACHE_TTL)
+_counters = {"disk_hits": 0, "misses": 0}
+_counters_lock = threading.Lock()
+
+def _normalize(text: str) -> str:
+    # The model is uncased, so case and spacing don't change its output
+    return " ".join(unicodedata.normalize("NFKC", text).casefold().split())
+
+def cache_key(text: str) -> str:
+    raw = "\0".join((_normalize(text), MODEL_NAME, MODEL_REVISION))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+CACHE_SCHEMA = [
+    """
+    CREATE TABLE IF NOT EXISTS sentiment_cache (
+        key TEXT PRIMARY KEY,
+        score REAL NOT NULL,
+        created_at REAL NOT NULL  -- unix time
+    ) WITHOUT ROWID
+    """,
+    "CREATE INDEX IF NOT EXISTS idx_sentiment_cache_created_at "
+    "ON sentiment_cache(created_at)",
+]
+
+def _cache_conn():
+    return get_connection(CACHE_PATH, schema=CACHE_SCHEMA)
+
+def _disk_get(keys: list[str]) -> dict[str, float]:
+    found = {}
+    cutoff = time.time() - CACHE_TTL
+    with _cache_conn() as conn:
+        for i in range(0, len(keys), 500):   # stay under SQLite's variable limit
+            chunk = keys[i:i + 500]
+            marks = ",".join("?" * len(chunk))
+            found.update(conn.execute(
+                f"SELECT key, score FROM sentiment_cache "
+                f"WHERE key IN ({marks}) AND created_at >= ?",
+                (*chunk, cutoff)
+            ).fetchall())
+    return found
+
+def _disk_put(scores: dict[str, float]):
+    now = time.time()
+    with _cache_conn() as conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO sentiment_cache (key, score, created_at) VALUES (?, ?, ?)",
+            [(key, score, now) for key, score in scores.items()]
+        )
+        # Evict expired rows, then the oldest ones beyond the size cap
+        conn.execute("DELETE FROM sentiment_cache WHERE created_at < ?", (now - CACHE_TTL,))
+        conn.execute("""
+            DELETE FROM sentiment_cache WHERE key IN (
+                SELECT key FROM sentiment_cache
+                ORDER BY created_at DESC LIMIT -1 OFFSET ?
+            )
+        """, (CACHE_MAX_ROWS,))
+
+def cache_stats() -> dict:
+    """Hit/miss counters for the memory and disk layers."""
+    memory = _memory_cache.stats()
+    with _counters_lock:
+        disk_hits, misses = _counters["disk_hits"], _counters["misses"]
+    lookups = memory["hits"] + memory["misses"]
+    return {
+        "memory_hits": memory["hits"],
+        "disk_hits":   disk_hits,
+        "misses":      misses,
+        "memory_size": memory["size"],
+        "hit_rate":    (lookups - misses) / lookups if lookups else 0.0,
+    }
+
+def clear_cache():
+    _memory_cache.clear()
+    with _cache_conn() as conn:
+        conn.execute("DELETE FROM sentiment_cache")
+
+# ─── Scoring ───────────────────────────────────────────────────────────────────
+
+@timed("sentiment.inference")
+def _run_model(texts: list[str], batch_size: int) -> list[float]:
+    import torch
+    pipe = get_pipeline()
+    with torch.inference_mode():
+        outs = pipe(
+            list(texts),
+            batch_size=batch_size,
+            truncation=True,
+            padding=True,
+            max_length=512,
+        )
+    return [_label_to_score(o["label"]) for o in outs]
+
+@timed()
+def score_batch(texts: list[str],
+                batch_size: int = BATCH_SIZE,
+                use_cache: bool = True) -> list[float]:
+    """
+    Score many texts in padded, truncated batches of `batch_size`.
+    Returns one sentiment in [-1,1] per input, in order. Cached scores
+    are reused; only unseen headlines are sent to the model.
+    """
+    if not texts:
+        return []
+    if not use_cache:
+        return _run_model(texts, batch_size)
+
+    keys = [cache_key(t) for t in texts]
+    scores = {}
+    for key in set(keys):
+        score = _memory_cache.get(key)
+        if score is not MISSING:
+            scores[key] = score
+
+    pending = [k for k in dict.fromkeys(keys) if k not in scores]
+    if pending:
+        from_disk = _disk_get(pending)
+        for key, score in from_disk.items():
+            _memory_cache.set(key, score)
+        scores.update(from_disk)
+
+    # One model call for the remaining unique texts
+    misses = {}
+    for key, text in zip(keys, texts):
+        if key not in scores and key not in misses:
+            misses[key] = text
+    with _counters_lock:
+        _counters["disk_hits"] += len(pending) - len(misses)
+        _counters["misses"]    += len(misses)
+    if misses:
+        fresh = dict(zip(misses, _run_model(list(misses.values()), batch_size)))
+        _disk_put(fresh)
+        for key, score in fresh.items():
+            _memory_cache.set(key, score)
+        scores.update(fresh)
+
+    return [scores[k] for k in keys]
+
+def score_symbols(headlines: dict[str, list[str]],
+                  batch_size: int = BATCH_SIZE) -> dict[str, dict]:
+    """
+    Score the headlines of every symbol in a single batched pass.
+    Returns {symbol: {"scores": [per-headline], "sentiment": mean}};
+    symbols without headlines get a neutral 0.0.
+    """
+    flat = [text for texts in headlines.values() for text in texts]
+    scores = iter(score_batch(flat, batch_size))
+    out = {}
+    for symbol, texts in headlines.items():
+        per_headline = [next(scores) for _ in texts]
+        out[symbol] = {
+            "scores": per_headline,
+            "sentiment": sum(per_headline) / len(per_headline) if per_headline else 0.0,
+        }
+    return out
 
 def sentiment_score(text: str) -> float:
     """
     Returns continuous sentiment in [-1,1].
     1 star → -1.0; 3 stars → 0.0; 5 stars → +1.0
     """
-    out = sentiment_pipe(text[:512])[0]  # truncate after 512 chars
-    label = out["label"]    # e.g. "4 stars"
-    stars = int(label.split()[0])
-    return (stars - 3) / 2.0  # maps 1→-1, 3→0, 5→+1
+    return score_batch([text])[0]
 
 def aggregate_scores(headlines: list[str]) -> float:
     if not headlines:
         return 0.0
-    scores = [sentiment_score(h) for h in headlines]
+    scores = score_batch(headlines)
     return sum(scores) / len(scores)
+
+def benchmark(batch_sizes=(1, 8, 16, 32, 64), n: int = 256) -> dict[int, float]:
+    """Return CPU throughput in headlines/sec for each batch size."""
+    import time
+    texts = [f"Company {i} shares move after quarterly earnings report" for i in range(n)]
+    score_batch(texts[:8], use_cache=False)  # warm-up
+    results = {}
+    for size in batch_sizes:
+        start = time.perf_counter()
+        score_batch(texts, batch_size=size, use_cache=False)
+        results[size] = n / (time.perf_counter() - start)
+    return results
+
+# python -m components.sentiment   prints headlines/sec per batch size
+if __name__ == "__main__":
+    for size, rate in benchmark().items():
+        print(f"batch_size={size:>3}: {rate:8.1f} headlines/sec")
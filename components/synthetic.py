@@ -0,0 +1,257 @@
+# components/synthetic.py
+
+import os
+import time
+import numpy as np
+import pandas as pd
+from components import db
+
+# ─── Spending model ────────────────────────────────────────────────────────────
+# Share of transactions, lognormal amount (median $, sigma) and merchants per
+# category. Rent is not sampled: it is one payment on the 1st of each month.
+
+CATEGORY_MIX = {
+    "Food":          (0.40,  22.0, 0.7, ["Grocery Mart", "Fresh Market", "Coffee House", "Pizza Corner",
+                                         "Sushi Bar", "Taco Stand", "Bakery Lane", "Deli Express"]),
+    "Transport":     (0.20,  14.0, 0.8, ["City Transit", "Metro Card", "Rideshare", "Fuel Stop",
+                                         "Parking Garage", "Bike Share"]),
+    "Utilities":     (0.05, 85.0, 0.4, ["Power Co", "Water Works", "Gas Utility", "Fiber Net",
+                                         "Mobile Plan"]),
+    "Entertainment": (0.15,  35.0, 0.8, ["Cinema 9", "Concert Hall", "Game Store", "Stream Plus",
+                                         "Bowling Alley", "Museum Pass"]),
+    "Other":         (0.20,  40.0, 1.0, ["Online Store", "Pharmacy", "Hardware Depot", "Gym Club",
+                                         "Bookshop", "Pet Supplies", "Florist", "Gift Shop"]),
+}
+MEMOS = ["", "", "", "weekly", "card", "subscription", "refill", "takeaway", "groceries",
+         "monthly", "gift", "lunch", "dinner", "commute", "online order", "repair"]
+RENT = 1450.0
+BLANK_NOTES = 0.08   # share of expenses with no note
+
+SYMBOLS = ["AAPL", "TSLA", "AMZN", "META", "GOOG", "SPY", "NVDA", "TQQQ"]
+
+# Relaxed for the load connection only, and only when the load created the
+# file: a crash part-way leaves a file that is deleted, not repaired. The
+# file returns to WAL afterwards. Nothing else may use it while a load runs.
+LOAD_PRAGMAS = {
+    "journal_mode": "OFF",
+    "synchronous":  "OFF",
+    "locking_mode": "EXCLUSIVE",
+    "cache_size":   -262144,    # 256 MB
+    "temp_store":   "MEMORY",
+}
+CHUNK_SIZE = 500_000
+
+def _seasonality(days: np.ndarray) -> np.ndarray:
+    """Relative spending weight per day: December and summer peaks, busier weekends."""
+    d = days.astype("datetime64[D]")
+    month = (d.astype("datetime64[M]").astype(int) % 12) + 1
+    weekday = (d.astype(int) + 3) % 7          # 1970-01-01 was a Thursday; Monday = 0
+    weight = 1.0 + 0.30 * (month == 12) + 0.12 * np.isin(month, (6, 7, 8)) - 0.10 * (month == 2)
+    return weight * np.where(weekday >= 5, 1.35, 1.0)
+
+def expense_rows(n: int, start: np.datetime64, end: np.datetime64, rng):
+    """
+    Yield chunks of (amount, category, note, unix seconds) arrays, `n`
+    rows in total across the chunks, in time order. Rent rows are extra:
+    one per month.
+    """
+    days = np.arange(start, end, dtype="datetime64[D]")
+    weight = _seasonality(days)
+    cats = list(CATEGORY_MIX)
+    share = np.array([CATEGORY_MIX[c][0] for c in cats])
+    # Notes are drawn from a per-category vocabulary of merchant + memo strings
+    vocab = {c: np.array([f"{m} {memo}".strip() for m in CATEGORY_MIX[c][3] for memo in MEMOS], dtype=object)
+             for c in cats}
+
+    # Spread the rows over days by weight, then draw each chunk's rows day by day
+    per_day = rng.multinomial(n, weight / weight.sum())
+    bounds = np.searchsorted(np.cumsum(per_day), np.arange(CHUNK_SIZE, n, CHUNK_SIZE))
+    for lo, hi in zip(np.r_[0, bounds], np.r_[bounds, len(days)]):
+        count = int(per_day[lo:hi].sum())
+        if not count:
+            continue
+        day = np.repeat(days[lo:hi], per_day[lo:hi])
+        secs = (day.astype("datetime64[s]").astype(np.int64)
+                + np.sort(rng.integers(7 * 3600, 23 * 3600, count)))
+        order = np.argsort(secs, kind="stable")
+        secs = secs[order]
+        cat = rng.choice(len(cats), count, p=share)
+        amount = np.empty(count)
+        note = np.empty(count, dtype=object)
+        for i, c in enumerate(cats):
+            idx = np.flatnonzero(cat == i)
+            _, median, sigma, _ = CATEGORY_MIX[c]
+            amount[idx] = rng.lognormal(np.log(median), sigma, len(idx))
+            note[idx] = vocab[c][rng.integers(0, len(vocab[c]), len(idx))]
+        note[rng.random(count) < BLANK_NOTES] = ""
+        labels = np.array(cats, dtype=object)[cat]
+        yield np.round(amount + 0.01, 2), labels, note, secs
+
+    months = np.arange(start.astype("datetime64[M]"), end.astype("datetime64[M]"), dtype="datetime64[M]")
+    first = months.astype("datetime64[D]").astype("datetime64[s]").astype(np.int64) + 9 * 3600
+    yield (np.full(len(first), RENT), np.full(len(first), "Rent", dtype=object),
+           np.full(len(first), "Landlord LLC rent", dtype=object), first)
+
+def trade_rows(n: int, start: np.datetime64, end: np.datetime64, rng) -> list[tuple]:
+    """(symbol, sentiment, recommendation, units, mode, unix seconds) rows."""
+    lo = start.astype("datetime64[s]").astype(np.int64)
+    hi = end.astype("datetime64[s]").astype(np.int64)
+    secs = np.sort(rng.integers(lo, hi, n))
+    symbol = np.array(SYMBOLS, dtype=object)[rng.integers(0, len(SYMBOLS), n)]
+    sentiment = np.round(np.clip(rng.normal(0.05, 0.4, n), -1, 1), 2)
+    aggressive = rng.random(n) < 0.4
+    units = np.round(rng.gamma(2.0, 1.5, n), 2)
+    recs = np.where(sentiment > 0.1, "Buy ~" + units.astype(str) + " shares",
+                    np.where(sentiment < -0.1, "Sell ~" + units.astype(str) + " shares",
+                             "Hold, sentiment neutral"))
+    units = np.where(np.abs(sentiment) <= 0.1, 0.0, units)
+    mode = np.where(aggressive, "Aggressive", "Conservative")
+    return list(zip(symbol.tolist(), sentiment.tolist(), recs.tolist(), units.tolist(),
+                    mode.tolist(), secs.tolist()))
+
+def profile_rows(start: np.datetime64, end: np.datetime64, rng) -> list[tuple]:
+    """One profile snapshot per month: income drifting up, savings growing, debt paid down."""
+    months = np.arange(start.astype("datetime64[M]"), end.astype("datetime64[M]"), dtype="datetime64[M]")
+    m = np.arange(len(months))
+    income = np.round(4800 * 1.003 ** m + rng.normal(0, 60, len(m)), 2)
+    expenses = np.round(income * rng.uniform(0.55, 0.75, len(m)), 2)
+    savings = np.round(np.cumsum(income - expenses) * 0.6 + 2000, 2)
+    debt = np.round(np.maximum(0, 12000 - 250 * m), 2)
+    secs = months.astype("datetime64[D]").astype("datetime64[s]").astype(np.int64) + 20 * 3600
+    return [(inc, 300.0, 1200.0, 3000.0, 12000.0, exp, sav, dbt, int(s))
+            for inc, exp, sav, dbt, s in zip(income.tolist(), expenses.tolist(),
+                                             savings.tolist(), debt.tolist(), secs.tolist())]
+
+# ─── Bulk load ─────────────────────────────────────────────────────────────────
+
+def generate(path: str, expenses: int = 1_000_000, trades: int = 100_000,
+             years: int = 5, seed: int = 0, end: str = None, on_progress=None) -> dict:
+    """
+    Fill `path` (created and migrated if needed) with seeded synthetic
+    expenses, monthly financial profiles and trade logs. The same
+    arguments always produce the same rows. Refuses a database that
+    already has expenses. The load runs in one transaction, secondary
+    indexes and triggers dropped and rebuilt afterwards along with the
+    rollup and the FTS index; pragmas are relaxed only for a new file.
+    Returns row counts and timings.
+
+    From a pytest fixture:
+
+        @pytest.fixture(scope="session")
+        def budget_db(tmp_path_factory):
+            path = str(tmp_path_factory.mktemp("data") / "budget.db")
+            synthetic.generate(path, expenses=50_000, trades=5_000)
+            with db.database(path):
+                yield path
+    """
+    rng = np.random.default_rng(seed)
+    stop = np.datetime64(end or "today", "D")
+    start = (stop.astype("datetime64[M]") - 12 * years).astype("datetime64[D]")
+    stats = {"expenses": 0, "trades": 0, "profiles": 0}
+    timings = {}
+
+    fresh = not os.path.exists(path)
+    db.create_table(path)
+    if not fresh:
+        with db.get_connection(path) as conn:
+            if conn.execute("SELECT 1 FROM expenses LIMIT 1").fetchone():
+                raise ValueError(f"{path} already has expenses; generate into a new file")
+    with db._pools_lock:
+        pool = db._pools.pop(path, None)   # the load needs the file to itself
+    if pool is not None:
+        pool.close()
+    conn = db.connect_db(path)
+    try:
+        for name, value in (LOAD_PRAGMAS if fresh else {}).items():
+            conn.execute(f"PRAGMA {name}={value}")
+        t = time.perf_counter()
+        conn.execute("BEGIN")
+        # Secondary indexes and triggers are rebuilt once after the load
+        deferred = conn.execute("""
+            SELECT type, name, sql FROM sqlite_master
+            WHERE type IN ('index', 'trigger') AND sql IS NOT NULL
+              AND tbl_name IN ('expenses', 'financial_profiles', 'trade_logs')
+        """).fetchall()
+        for kind, name, _ in deferred:
+            conn.execute(f"DROP {kind.upper()} {name}")
+
+        rollup = []
+        for amount, category, note, secs in expense_rows(expenses, start, stop, rng):
+            conn.executemany(
+                "INSERT INTO expenses (amount, category, note, created_at) "
+                "VALUES (?, ?, ?, datetime(?, 'unixepoch'))",
+                zip(amount.tolist(), category.tolist(), note.tolist(), secs.tolist())
+            )
+            # (month, category) totals from the arrays: cheaper than a GROUP BY afterwards
+            month = secs.astype("datetime64[s]").astype("datetime64[M]").astype(str)
+            rollup.append(pd.DataFrame({"month": month, "category": category, "amount": amount}))
+            stats["expenses"] += len(amount)
+            if on_progress:
+                on_progress(dict(stats))
+        profiles = profile_rows(start, stop, rng)
+        conn.executemany("""
+            INSERT INTO financial_profiles
+                (after_tax_income, goal_1m, goal_3m, goal_6m, goal_1y,
+                 total_expenses, savings, debt, created_at)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, datetime(?, 'unixepoch'))
+        """, profiles)
+        stats["profiles"] = len(profiles)
+        conn.executemany("""
+            INSERT INTO trade_logs (symbol, sentiment, recommendation, units, mode, timestamp)
+            VALUES (?, ?, ?, ?, ?, datetime(?, 'unixepoch'))
+        """, trade_rows(trades, start, stop, rng))
+        stats["trades"] = trades
+        timings["insert_s"] = time.perf_counter() - t
+
+        t = time.perf_counter()
+        for _, _, sql in deferred:
+            conn.execute(sql)
+        totals = (pd.concat(rollup).groupby(["month", "category"])["amount"]
+                  .agg(["sum", "count"]).reset_index())
+        conn.execute("DELETE FROM expense_rollup")
+        conn.executemany(
+            "INSERT INTO expense_rollup (month, category, amount, n) VALUES (?, ?, ?, ?)",
+            totals.itertuples(index=False)
+        )
+        conn.execute("INSERT INTO expenses_fts (expenses_fts) VALUES ('rebuild')")
+        db.bump_version(conn, *db.TABLES)
+        conn.commit()
+        timings["index_s"] = time.perf_counter() - t
+    except BaseException:
+        conn.rollback()
+        conn.close()
+        if fresh:   # without a journal the rollback is not trustworthy
+            for suffix in ("", "-wal", "-shm"):
+                if os.path.exists(path + suffix):
+                    os.remove(path + suffix)
+        raise
+    if fresh:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA locking_mode=NORMAL")
+        conn.execute("SELECT 1 FROM sqlite_master LIMIT 1")   # drops the exclusive lock
+    conn.close()
+    stats.update(timings, size_mb=os.path.getsize(path) / 2**20)
+    return stats
+
+# ─── CLI ───────────────────────────────────────────────────────────────────────
+# python -m components.synthetic PATH [--expenses N] [--trades N] [--years Y] [--seed S]
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(prog="python -m components.synthetic")
+    parser.add_argument("path", help="database file to fill (created if missing)")
+    parser.add_argument("--expenses", type=int, default=1_000_000)
+    parser.add_argument("--trades", type=int, default=100_000)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--end", help="last day covered, YYYY-MM-DD (default today)")
+    args = parser.parse_args()
+
+    progress = lambda s: print(f"  {s['expenses']:>12,} expenses", end="\r")
+    start = time.perf_counter()
+    stats = generate(args.path, args.expenses, args.trades, args.years, args.seed, args.end, progress)
+    elapsed = time.perf_counter() - start
+    print(f"\n{stats['expenses']:,} expenses, {stats['profiles']:,} profiles, {stats['trades']:,} trades "
+          f"in {elapsed:.1f}s (insert {stats['insert_s']:.1f}s, indexes {stats['index_s']:.1f}s) "
+          f"-> {stats['size_mb']:,.0f} MB, {stats['expenses'] / elapsed:,.0f} expenses/s")
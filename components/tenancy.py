@@ -0,0 +1,94 @@
+# components/tenancy.py
+
+import os
+import hashlib
+import threading
+import time
+from components.db import BASE_DIR, create_table, use_database, database, add_expense
+
+# off: every session shares data/budget.db | user: one database file per user
+TENANCY     = os.getenv("BUDGETWISE_TENANCY", "off")
+TENANTS_DIR = os.getenv("BUDGETWISE_TENANTS_DIR", os.path.join(BASE_DIR, "data", "tenants"))
+
+def tenant_path(user_id: str) -> str:
+    """
+    Database file for a user: data/tenants/<ab>/<hash>.db. Hashing keeps
+    arbitrary ids (emails) out of file names, and the two-character
+    prefix spreads the files over 256 directories.
+    """
+    digest = hashlib.blake2b(user_id.strip().lower().encode(), digest_size=16).hexdigest()
+    return os.path.join(TENANTS_DIR, digest[:2], f"{digest}.db")
+
+def open_tenant(user_id: str) -> str:
+    """
+    Make the user's database the default for this session's thread,
+    creating and migrating it on first use. Returns its path.
+    """
+    path = tenant_path(user_id)
+    create_table(path)
+    use_database(path)
+    return path
+
+# ─── Concurrency benchmark ─────────────────────────────────────────────────────
+# python -m components.tenancy [SESSIONS] [WRITES]
+# SESSIONS threads each add WRITES expenses (one transaction each), all
+# starting together: first against one shared file, then one file per user.
+
+def _percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+def benchmark(sessions: int = 200, writes: int = 25, root: str = None) -> dict[str, dict]:
+    import tempfile
+    root = root or tempfile.mkdtemp()
+    layouts = {
+        "shared":   [os.path.join(root, "shared.db")] * sessions,
+        "per-user": [os.path.join(root, "tenants", f"user{i}.db") for i in range(sessions)],
+    }
+    results = {}
+    for name, paths in layouts.items():
+        for path in set(paths):
+            create_table(path)
+        latencies, errors = [], []
+        lock = threading.Lock()
+        barrier = threading.Barrier(sessions)
+
+        def session(path):
+            mine = []
+            with database(path):
+                barrier.wait()
+                for i in range(writes):
+                    start = time.perf_counter()
+                    try:
+                        add_expense(9.99, "Food", f"bench {i}")
+                    except Exception as e:
+                        with lock:
+                            errors.append(repr(e))
+                        continue
+                    mine.append(time.perf_counter() - start)
+            with lock:
+                latencies.extend(mine)
+
+        threads = [threading.Thread(target=session, args=(p,)) for p in paths]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+        results[name] = {
+            "writes_per_s": len(latencies) / elapsed,
+            "p50_ms":       _percentile(latencies, 0.50) * 1000,
+            "p95_ms":       _percentile(latencies, 0.95) * 1000,
+            "p99_ms":       _percentile(latencies, 0.99) * 1000,
+            "errors":       len(errors),
+        }
+    return results
+
+if __name__ == "__main__":
+    import sys
+    args = [int(a) for a in sys.argv[1:3]]
+    for name, stats in benchmark(*args).items():
+        print(f"{name:>9}: {stats['writes_per_s']:8,.0f} writes/s  "
+              f"p50 {stats['p50_ms']:7.1f} ms  p95 {stats['p95_ms']:7.1f} ms  "
+              f"p99 {stats['p99_ms']:7.1f} ms  errors {stats['errors']}")
@@ -0,0 +1,375 @@
+# loadtest.py
+#
+# Headless load test: drives every page in app.PAGES through scripted flows
+# with streamlit.testing.v1.AppTest, against a synthetic database in a temp
+# directory, with news, Groq and prices served by local stubs.
+#
+#   python loadtest.py [--rows 100000] [--sessions 4] [--iterations 3]
+#                      [--pages "Dashboard" ...] [--json out.json] [--compare base.json]
+#
+# Reports per-page rerun latency percentiles, DB queries per rerun and peak
+# RSS; --json writes the same numbers, plus the components.metrics timers,
+# for comparison across commits.
+
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import resource
+import tempfile
+import threading
+import subprocess
+from collections import defaultdict
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(BASE_DIR, "app.py")
+
+# ─── Network stubs ─────────────────────────────────────────────────────────────
+# One local HTTP server standing in for Google News RSS and the Groq chat API.
+
+STUB_REPLY = ("Track every expense for a month, cap dining out at a fixed weekly amount, "
+              "and move savings on payday so it never sits in checking.").split(" ")
+
+class _StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query).get("q", [""])[0]
+        name  = query.split(" stock")[0] or "Market"
+        items = "".join(
+            f"<item><title>{name} shares {word} after earnings</title>"
+            f"<link>https://example.com/{i}</link><source>Stub Wire</source></item>"
+            for i, word in enumerate(["rise", "slip", "rally", "steady", "surge"])
+        )
+        body = f'<?xml version="1.0"?><rss version="2.0"><channel>{items}</channel></rss>'.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/rss+xml")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        usage = {"prompt_tokens": 40, "completion_tokens": len(STUB_REPLY)}
+        if payload.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.end_headers()
+            for word in STUB_REPLY:
+                chunk = {"choices": [{"delta": {"content": word + " "}}]}
+                self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+            self.wfile.write(f"data: {json.dumps({'choices': [], 'usage': usage})}\n\n".encode())
+            self.wfile.write(b"data: [DONE]\n\n")
+            return
+        body = json.dumps({
+            "choices": [{"message": {"content": " ".join(STUB_REPLY)}}], "usage": usage
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def start_stubs() -> str:
+    """Start the stub server and point the app's endpoints at it. Returns its base URL."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _StubHandler)
+    threading.Thread(target=server.serve_forever, name="loadtest-stubs", daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    # Read at import time by components.news / components.ai_chatbot / components.prices
+    os.environ["BUDGETWISE_NEWS_URL"]     = base + "/rss?q={query}"
+    os.environ["GROQ_API_URL"]            = base + "/chat/completions"
+    os.environ["GROQ_API_KEY"]            = "stub"
+    os.environ["BUDGETWISE_PRICE_SOURCE"] = "stub"
+    return base
+
+def _stub_model(texts: list[str], batch_size: int) -> list[float]:
+    # Keyword scores in place of the transformer, so runs measure the app
+    # rather than model inference (use --real-model to keep it).
+    up, down = ("rise", "rally", "surge"), ("slip", "fall", "drop")
+    return [(any(w in t for w in up) - any(w in t for w in down)) * 0.5 for t in texts]
+
+# ─── Synthetic data ────────────────────────────────────────────────────────────
+
+def prepare_data(root: str, rows: int, seed: int = 0):
+    """Point every database at `root` and load `rows` synthetic expenses."""
+    from components import db, forecast, prices, sentiment, synthetic
+
+    db.DB_PATH           = os.path.join(root, "budget.db")
+    forecast.CACHE_PATH  = os.path.join(root, "forecast_cache.db")
+    prices.STORE_PATH    = os.path.join(root, "prices.db")
+    sentiment.CACHE_PATH = os.path.join(root, "sentiment_cache.db")
+    synthetic.generate(db.DB_PATH, expenses=rows, trades=rows // 10, seed=seed)
+
+# ─── Query counting ────────────────────────────────────────────────────────────
+# A trace callback on every connection counts statements per test session,
+# identified by a marker in its session state. Worker threads (news and
+# price fetchers, the write-behind writer) have no session and are counted
+# as "background".
+
+_QUERY_VERBS = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "REPLACE")
+_SESSION_KEY = "_loadtest_session"
+_queries = defaultdict(int)
+_queries_lock = threading.Lock()
+
+def install_query_counter():
+    from components import db
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    def trace(sql: str):
+        if not sql.lstrip()[:7].upper().startswith(_QUERY_VERBS):
+            return
+        ctx = get_script_run_ctx(suppress_warning=True)
+        session = ctx.session_state[_SESSION_KEY] if ctx and _SESSION_KEY in ctx.session_state else "background"
+        with _queries_lock:
+            _queries[session] += 1
+
+    db.close_pools()
+    db.on_connect(lambda conn: conn.set_trace_callback(trace))
+
+def _query_count(session: str) -> int:
+    with _queries_lock:
+        return _queries[session]
+
+# ─── Page flows ────────────────────────────────────────────────────────────────
+# Each flow is a list of (step, action) pairs; an action edits widgets on the
+# previous rerun's tree and the rerun that follows is what gets timed.
+
+def _find(elements, label: str):
+    for element in elements:
+        if element.label == label:
+            return element
+    raise LookupError(f"no widget labelled {label!r}")
+
+def _flow_get_started():
+    def goals(at):
+        for slider, value in zip(at.slider, (300.0, 1200.0, 3000.0, 12000.0)):
+            slider.set_value(value)
+    def add(note):
+        def action(at):
+            at.number_input(key="gs_amt").set_value(42.5)
+            at.text_input(key="gs_note").set_value(note)
+            _find(at.button, "Add Expense").click()
+        return action
+    def savings(at):
+        at.number_input[0].set_value(8000.0)
+        at.number_input[1].set_value(1500.0)
+    return [
+        ("open",         None),
+        ("income",       lambda at: at.number_input[0].set_value(5200.0)),
+        ("next",         lambda at: _find(at.button, "Next →").click()),
+        ("goals",        goals),
+        ("next",         lambda at: _find(at.button, "Next →").click()),
+        ("add expense",  add("weekly groceries")),
+        ("add expense",  add("bus pass")),
+        ("next",         lambda at: _find(at.button, "Next →").click()),
+        ("savings",      savings),
+        ("next",         lambda at: _find(at.button, "Next →").click()),
+        ("ai summary",   lambda at: _find(at.button, "Get AI Recommendations").click()),
+        ("save",         lambda at: _find(at.button, "Save Profile").click()),
+    ]
+
+def _flow_dashboard():
+    return [("open", None), ("rerun", lambda at: None), ("rerun", lambda at: None)]
+
+def _flow_add_expense():
+    def add(at):
+        _find(at.number_input, "Amount ($)").set_value(18.75)
+        at.selectbox[0].set_value("Food")
+        _find(at.text_input, "Note (optional)").set_value("coffee house")
+        _find(at.button, "Add Expense").click()
+    return [
+        ("open",        None),
+        ("add expense", add),
+        ("older page",  lambda at: _find(at.button, "Older ▶").click()),
+        ("search",      lambda at: at.text_input(key="exp_query").set_value("grocery")),
+        ("clear",       lambda at: at.text_input(key="exp_query").set_value("")),
+        ("filter",      lambda at: at.selectbox(key="exp_category").set_value("Other")),
+    ]
+
+def _flow_stock_tracker():
+    def track(at):
+        _find(at.text_input, "Enter Stock Symbol (e.g., AAPL, TSLA)").set_value("AAPL")
+        _find(at.button, "Track").click()
+    return [
+        ("open",    None),
+        ("track",   track),
+        ("analyze", lambda at: _find(at.button, "Analyze & Recommend").click()),
+    ]
+
+def _flow_chatbot():
+    def ask(at):
+        at.text_area[0].set_value("How can I save on groceries?")
+        _find(at.button, "Ask AI").click()
+    return [("open", None), ("ask", ask)]
+
+def _flow_performance():
+    return [("open", None), ("rerun", lambda at: None)]
+
+FLOWS = {
+    "Get Started":   _flow_get_started,
+    "Dashboard":     _flow_dashboard,
+    "Add Expense":   _flow_add_expense,
+    "Stock Tracker": _flow_stock_tracker,
+    "AI Chatbot":    _flow_chatbot,
+    "Performance":   _flow_performance,
+}
+
+# Session state a returning user would already have (the advisor needs cash)
+SESSION_STATE = {"income": 5200.0, "savings": 8000.0}
+
+# ─── Runner ────────────────────────────────────────────────────────────────────
+
+def _peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def run_flow(page: str, session: str, samples: dict, timeout: float):
+    """Run one page's flow in a fresh session, appending (ms, queries, error) per rerun."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    at.session_state[_SESSION_KEY] = session
+    if page == "Performance":
+        at.query_params["page"] = "performance"   # hidden from the sidebar
+    else:
+        at.session_state["selection"] = page
+    if page != "Get Started":
+        for key, value in SESSION_STATE.items():
+            at.session_state[key] = value
+    for step, action in FLOWS[page]():
+        try:
+            if action is not None:
+                action(at)
+            before = _query_count(session)
+            start = time.perf_counter()
+            at.run()
+            ms = (time.perf_counter() - start) * 1000
+            error = f"{step}: {at.exception[0].value}" if at.exception else None
+        except Exception as e:
+            ms, before, error = 0.0, _query_count(session), f"{step}: {e!r}"
+        samples[page].append((ms, _query_count(session) - before, error))
+        if error:
+            return
+
+def _percentile(values: list[float], q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))] if values else 0.0
+
+def run(pages: list[str], sessions: int = 1, iterations: int = 3, timeout: float = 60) -> dict:
+    """
+    Drive `sessions` concurrent users, each running every page's flow
+    `iterations` times. Returns per-page stats plus process totals.
+    """
+    samples = defaultdict(list)
+    samples_lock = threading.Lock()
+
+    def user(n: int):
+        mine = defaultdict(list)
+        for i in range(iterations):
+            for page in pages:
+                run_flow(page, f"user{n}", mine, timeout)
+        with samples_lock:
+            for page, rows in mine.items():
+                samples[page].extend(rows)
+
+    start = time.perf_counter()
+    users = [threading.Thread(target=user, args=(n,)) for n in range(sessions)]
+    for t in users:
+        t.start()
+    for t in users:
+        t.join()
+    elapsed = time.perf_counter() - start
+
+    result = {"pages": {}, "elapsed_s": elapsed, "peak_rss_mb": _peak_rss_mb(),
+              "background_queries": _queries["background"]}
+    for page in pages:
+        rows   = samples[page]
+        ms     = [r[0] for r in rows if r[2] is None]
+        errors = [r[2] for r in rows if r[2] is not None]
+        result["pages"][page] = {
+            "reruns":             len(rows),
+            "p50_ms":             _percentile(ms, 0.50),
+            "p95_ms":             _percentile(ms, 0.95),
+            "p99_ms":             _percentile(ms, 0.99),
+            "max_ms":             max(ms, default=0.0),
+            "queries_per_rerun":  sum(r[1] for r in rows) / max(len(rows), 1),
+            "errors":             len(errors),
+            "first_error":        errors[0] if errors else None,
+        }
+    return result
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BASE_DIR,
+                              capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return ""
+
+def report(result: dict, baseline: dict = None):
+    base = (baseline or {}).get("pages", {})
+    print(f"{'page':<14} {'reruns':>6} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} "
+          f"{'queries':>8} {'errors':>6}" + ("  p95 vs base" if baseline else ""))
+    for page, s in result["pages"].items():
+        line = (f"{page:<14} {s['reruns']:>6} {s['p50_ms']:>8.1f} {s['p95_ms']:>8.1f} "
+                f"{s['p99_ms']:>8.1f} {s['queries_per_rerun']:>8.1f} {s['errors']:>6}")
+        if page in base and base[page]["p95_ms"]:
+            line += f"  {(s['p95_ms'] / base[page]['p95_ms'] - 1) * 100:+10.0f}%"
+        print(line)
+        if s["first_error"]:
+            print(f"{'':<14} first error: {s['first_error']}")
+    print(f"peak RSS {result['peak_rss_mb']:.0f} MB, {result['background_queries']} background "
+          f"queries, {result['elapsed_s']:.1f}s total")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python loadtest.py")
+    parser.add_argument("--rows", type=int, default=100_000, help="synthetic expenses to load")
+    parser.add_argument("--seed", type=int, default=0, help="seed for the synthetic data")
+    parser.add_argument("--sessions", type=int, default=1, help="concurrent users")
+    parser.add_argument("--iterations", type=int, default=3, help="times each user runs every flow")
+    parser.add_argument("--pages", nargs="+", choices=list(FLOWS), default=list(FLOWS))
+    parser.add_argument("--timeout", type=float, default=60, help="seconds allowed per rerun")
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON ('-' for stdout)")
+    parser.add_argument("--compare", metavar="PATH", help="earlier --json output to compare p95 against")
+    parser.add_argument("--real-model", action="store_true", help="score headlines with the transformer")
+    args = parser.parse_args()
+
+    os.chdir(BASE_DIR)
+    sys.path.insert(0, BASE_DIR)
+    import streamlit.testing.v1
+    from streamlit import logger
+    logger.set_log_level("error")   # silence per-rerun deprecation warnings
+    start_stubs()
+    root = tempfile.mkdtemp(prefix="budgetwise-load-")
+    if not args.real_model:
+        from components import sentiment
+        sentiment._run_model = _stub_model
+    t = time.perf_counter()
+    prepare_data(root, args.rows, args.seed)
+    print(f"Loaded {args.rows:,} synthetic expenses in {time.perf_counter() - t:.1f}s ({root})")
+    install_query_counter()
+
+    from components import metrics
+    metrics.enable()
+    result = run(args.pages, args.sessions, args.iterations, args.timeout)
+    result["timings"] = metrics.snapshot()
+    result["slow_queries"] = metrics.slow_queries()
+    result["meta"] = {
+        "commit": _git_commit(), "rows": args.rows, "seed": args.seed, "sessions": args.sessions,
+        "iterations": args.iterations, "python": platform.python_version(),
+        "cpus": os.cpu_count(), "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+    report(result, baseline)
+    if args.json == "-":
+        json.dump(result, sys.stdout, indent=2)
+    elif args.json:
+        with open(args.json, "w") as f:
+            json.dump(result, f, indent=2)
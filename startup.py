@@ -0,0 +1,100 @@
+# startup.py
+#
+# Startup benchmark for the Dashboard, the page most sessions open first:
+#
+#   python startup.py [--rows 10000] [--top 15] [--json out.json]
+#
+# 1) `python -X importtime -c "import views.dashboard"` in a fresh interpreter:
+#    total import time, the slowest modules, and which heavy optional
+#    libraries (torch, transformers, yfinance, ...) were pulled in.
+# 2) streamlit.testing.v1.AppTest on app.py with the Dashboard selected,
+#    against a synthetic database in a temp directory: time to first render
+#    (cold imports included) and of a warm rerun.
+
+import os
+import re
+import sys
+import json
+import time
+import logging
+import argparse
+import tempfile
+import subprocess
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+APP_PATH = os.path.join(BASE_DIR, "app.py")
+
+# Libraries that only some pages need; the Dashboard should import none of them
+HEAVY = ["torch", "transformers", "sentence_transformers", "prophet", "yfinance", "feedparser"]
+
+_IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|( *)(\S+)")
+
+def import_times(module: str = "views.dashboard") -> dict:
+    """Parse -X importtime for `module` in a fresh interpreter."""
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BASE_DIR, capture_output=True, text=True, check=True,
+    )
+    modules = {}
+    for line in proc.stderr.splitlines():
+        m = _IMPORT_LINE.match(line)
+        if m:
+            self_us, cumulative_us, _, name = m.groups()
+            modules[name.strip()] = (int(self_us), int(cumulative_us))
+    return {
+        "total_ms": modules.get(module, (0, 0))[1] / 1000,
+        "modules":  modules,
+        "heavy":    [name for name in HEAVY if name in modules],
+    }
+
+def first_render(rows: int, timeout: float = 120) -> dict:
+    """Time the Dashboard's first (cold) render and a warm rerun."""
+    # Bare-mode and deprecation notices are logged on every rerun; a filter
+    # survives the log-level reset each AppTest run performs
+    for name in ("streamlit.runtime.scriptrunner_utils.script_run_context",
+                 "streamlit.deprecation_util"):
+        logging.getLogger(name).addFilter(lambda record: False)
+    sys.path.insert(0, BASE_DIR)
+    from components import db, synthetic
+
+    db.DB_PATH = os.path.join(tempfile.mkdtemp(prefix="budgetwise-startup-"), "budget.db")
+    synthetic.generate(db.DB_PATH, expenses=rows, trades=rows // 10)
+
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(APP_PATH, default_timeout=timeout)
+    at.session_state["selection"] = "Dashboard"
+    times = []
+    for _ in range(2):
+        start = time.perf_counter()
+        at.run()
+        times.append((time.perf_counter() - start) * 1000)
+        if at.exception:
+            raise RuntimeError(at.exception[0].value)
+    return {"first_render_ms": times[0], "rerun_ms": times[1],
+            "heavy_loaded": [name for name in HEAVY if name in sys.modules]}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(prog="python startup.py")
+    parser.add_argument("--rows", type=int, default=10_000, help="synthetic expenses to load")
+    parser.add_argument("--top", type=int, default=15, help="slowest imports to list")
+    parser.add_argument("--json", metavar="PATH", help="write results as JSON")
+    args = parser.parse_args()
+    os.chdir(BASE_DIR)
+
+    imports = import_times()
+    slowest = sorted(imports["modules"].items(), key=lambda kv: kv[1][1], reverse=True)
+    print(f"import views.dashboard: {imports['total_ms']:.0f} ms "
+          f"({len(imports['modules'])} modules)")
+    for name, (self_us, cumulative_us) in slowest[1:args.top + 1]:
+        print(f"  {cumulative_us / 1000:8.1f} ms cumulative  {self_us / 1000:7.1f} ms self  {name}")
+    print(f"heavy libraries imported: {', '.join(imports['heavy']) or 'none'}")
+
+    render = first_render(args.rows)
+    print(f"Dashboard first render: {render['first_render_ms']:.0f} ms, "
+          f"warm rerun: {render['rerun_ms']:.0f} ms ({args.rows:,} expenses)")
+    print(f"heavy libraries loaded by the render: {', '.join(render['heavy_loaded']) or 'none'}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"import_ms": imports["total_ms"], "heavy_imports": imports["heavy"],
+                       **render, "rows": args.rows}, f, indent=2)
@@ -0,0 +1,43 @@
+# tests/conftest.py
+
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from components import db
+
+@pytest.fixture
+def budget_db(tmp_path, monkeypatch):
+    """
+    An empty, migrated database made the default for the test, including
+    in threads it starts (AppTest runs the app on its own thread).
+    """
+    path = str(tmp_path / "budget.db")
+    monkeypatch.setattr(db, "DB_PATH", path)
+    db.create_table(path)
+    with db.database(path):
+        yield path
+
+@pytest.fixture
+def http_stub():
+    """
+    Start a local HTTP server for a BaseHTTPRequestHandler subclass:
+    base_url = http_stub(Handler). Servers are shut down after the test.
+    """
+    import threading
+    from http.server import ThreadingHTTPServer
+
+    servers = []
+
+    def start(handler) -> str:
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_port}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
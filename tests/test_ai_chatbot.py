@@ -0,0 +1,133 @@
+# tests/test_ai_chatbot.py
+
+import json
+import time
+from http.server import BaseHTTPRequestHandler
+import pytest
+from components import ai_chatbot
+from components.cache import TTLCache
+
+REPLY = ["Café", " –", " 5€", " a", " day"]
+FIRST_TOKEN_DELAY = 0.05
+REST_DELAY        = 0.5
+
+class ChatStub(BaseHTTPRequestHandler):
+    """OpenAI-compatible chat endpoint; `fail_first` 429s precede each success."""
+
+    protocol_version = "HTTP/1.1"   # keep-alive, so connection reuse is visible
+    fail_first = 0
+    retry_after = "0.1"
+    calls, ports = [], set()
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        type(self).calls.append(payload)
+        type(self).ports.add(self.client_address[1])
+        if type(self).fail_first:
+            type(self).fail_first -= 1
+            self._send(429, b'{"error": "rate limited"}', {"Retry-After": type(self).retry_after})
+        elif payload.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")   # no charset, as Groq sends it
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            time.sleep(FIRST_TOKEN_DELAY)
+            for i, text in enumerate(REPLY):
+                chunk = {"choices": [{"delta": {"content": text}}]}
+                self._chunk(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode())
+                if i == 0:
+                    time.sleep(REST_DELAY)
+            self._chunk(b"data: [DONE]\n\n")
+            self._chunk(b"")
+        else:
+            body = {"choices": [{"message": {"content": "".join(REPLY)}}],
+                    "usage": {"prompt_tokens": 10, "completion_tokens": 5}}
+            self._send(200, json.dumps(body).encode(), {"Content-Type": "application/json"})
+
+    def _chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send(self, status, body, headers):
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+@pytest.fixture
+def chat(http_stub, monkeypatch):
+    ChatStub.fail_first, ChatStub.calls, ChatStub.ports = 0, [], set()
+    ChatStub.retry_after = "0.1"
+    monkeypatch.setattr(ai_chatbot, "GROQ_API_URL", http_stub(ChatStub) + "/chat/completions")
+    monkeypatch.setattr(ai_chatbot, "GROQ_API_KEY", "test")
+    monkeypatch.setattr(ai_chatbot, "_session", None)
+    monkeypatch.setattr(ai_chatbot, "_responses", TTLCache(maxsize=16, ttl=60))
+    return ChatStub
+
+MESSAGES = [{"role": "user", "content": "How much is coffee?"}]
+
+def test_stream_time_to_first_token(chat):
+    start = time.perf_counter()
+    stream = ai_chatbot.stream_completion(MESSAGES)
+    first = next(stream)
+    ttft = time.perf_counter() - start
+    rest = "".join(stream)
+    total = time.perf_counter() - start
+
+    assert first == "Café"
+    assert ttft < REST_DELAY / 2 < REST_DELAY <= total   # first token arrives before the body is done
+    assert first + rest == "Café – 5€ a day"
+    assert 0 < ai_chatbot.groq_metrics()["ttft_p50_ms"] < REST_DELAY * 1000
+
+def test_streamed_reply_is_cached_as_utf8(chat):
+    "".join(ai_chatbot.stream_completion(MESSAGES))
+    assert ai_chatbot.chat_completion(MESSAGES) == "Café – 5€ a day"
+    assert len(chat.calls) == 1
+
+def test_retries_429_with_backoff(chat, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(ai_chatbot.time, "sleep", sleeps.append)
+    chat.fail_first = 2
+    assert ai_chatbot.chat_completion(MESSAGES) == "Café – 5€ a day"
+    assert len(chat.calls) == 3
+    assert sleeps == [0.1, 0.1]   # Retry-After honoured
+
+def test_retry_after_is_capped(chat, monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(ai_chatbot.time, "sleep", sleeps.append)
+    chat.fail_first, chat.retry_after = 2, "600"
+    assert ai_chatbot.chat_completion(MESSAGES) == "Café – 5€ a day"
+    assert sleeps == [ai_chatbot.MAX_BACKOFF] * 2
+
+def test_backoff_is_exponential_with_jitter():
+    for attempt in range(4):
+        cap = ai_chatbot.BACKOFF_BASE * 2 ** attempt
+        assert all(0 <= ai_chatbot._backoff(attempt, None) <= cap for _ in range(50))
+
+def test_gives_up_after_max_retries(chat, monkeypatch):
+    monkeypatch.setattr(ai_chatbot.time, "sleep", lambda s: None)
+    chat.fail_first = ai_chatbot.MAX_RETRIES + 1
+    with pytest.raises(ai_chatbot.requests.HTTPError):
+        ai_chatbot.chat_completion(MESSAGES)
+    assert len(chat.calls) == ai_chatbot.MAX_RETRIES + 1
+
+def test_identical_requests_hit_the_cache(chat):
+    before = ai_chatbot.groq_metrics()["cache_hits"]
+    for _ in range(3):
+        ai_chatbot.chat_completion(MESSAGES, temperature=0.2)
+    ai_chatbot.chat_completion(MESSAGES, temperature=0.3)
+    ai_chatbot.chat_completion(MESSAGES, model="other", temperature=0.2)
+    assert len(chat.calls) == 3
+    assert ai_chatbot.groq_metrics()["cache_hits"] - before == 2
+
+def test_session_and_connection_are_reused(chat):
+    for i in range(5):
+        ai_chatbot.chat_completion([{"role": "user", "content": f"question {i}"}])
+    assert ai_chatbot.get_session() is ai_chatbot.get_session()
+    assert len(chat.calls) == 5
+    assert len(chat.ports) == 1   # one keep-alive connection served every call
@@ -0,0 +1,118 @@
+# tests/test_categorize.py
+
+import sys
+import hashlib
+import threading
+import numpy as np
+import pytest
+from components import categorize, db
+
+def _encode(texts, batch_size=None):
+    # Stand-in for the model: a stable random unit vector per word, averaged
+    out = np.zeros((len(texts), 32), dtype=np.float32)
+    for i, text in enumerate(texts):
+        for word in text.split():
+            seed = int.from_bytes(hashlib.blake2b(word.encode(), digest_size=4).digest(), "little")
+            out[i] += np.random.default_rng(seed).standard_normal(32)
+    return out / np.maximum(np.linalg.norm(out, axis=1, keepdims=True), 1e-9)
+
+@pytest.fixture(autouse=True)
+def fake_model(monkeypatch):
+    monkeypatch.setattr(categorize, "encode", _encode)
+    for name in ("_indexes", "_locks", "_saved_at"):
+        monkeypatch.setattr(categorize, name, {})
+    monkeypatch.setattr(categorize, "_dirty", set())
+
+def test_suggests_from_labelled_history(budget_db):
+    for _ in range(3):
+        db.add_expense(4.0, "Food", "fresh bakery bread")
+    assert categorize.resolve_category(categorize.AUTO, "fresh bakery") == "Food"
+    assert categorize.resolve_category("Rent", "fresh bakery") == "Rent"
+
+def test_model_errors_fall_back_to_other(budget_db, monkeypatch):
+    def offline(*args, **kwargs):
+        raise OSError("cannot download model")
+    monkeypatch.setattr(categorize, "encode", offline)
+    assert categorize.resolve_category(categorize.AUTO, "coffee") == "Other"
+
+def test_saves_are_debounced_and_caught_up_after_restart(budget_db, monkeypatch):
+    saves = []
+    save = categorize.CategoryIndex.save
+    monkeypatch.setattr(categorize.CategoryIndex, "save", lambda self, p: (saves.append(p), save(self, p)))
+    db.add_expense(9.0, "Transport", "city bus")
+    categorize.get_index()
+    db.add_expense(9.0, "Transport", "night tram")
+    categorize.get_index()
+    assert len(saves) == 1 and budget_db.replace(".db", "") in saves[0]
+
+    # A new process loads the older file and re-syncs what was not saved
+    monkeypatch.setattr(categorize, "_indexes", {})
+    index = categorize.get_index()
+    assert "night tram" in index.rows
+
+    categorize.flush_indexes()
+    assert len(saves) == 2 and not categorize._dirty
+
+def test_databases_do_not_share_a_lock(tmp_path, monkeypatch):
+    slow, fast = str(tmp_path / "slow.db"), str(tmp_path / "fast.db")
+    for path in (slow, fast):
+        db.create_table(path)
+        with db.database(path):
+            db.add_expense(1.0, "Food", f"{path} lunch")
+    started, release = threading.Event(), threading.Event()
+
+    def blocking(texts, batch_size=None):
+        if any("slow" in t for t in texts):
+            started.set()
+            release.wait(5)
+        return _encode(texts)
+    monkeypatch.setattr(categorize, "encode", blocking)
+
+    worker = threading.Thread(target=categorize.get_index, args=(slow,))
+    worker.start()
+    assert started.wait(5)
+    assert len(categorize.get_index(fast)) > 0   # not blocked behind the slow database
+    release.set()
+    worker.join()
+
+def test_classify_while_another_thread_adds(budget_db, monkeypatch):
+    # A full index, so every add trims the oldest notes and rebuilds `rows`
+    n = 20_000
+    monkeypatch.setattr(categorize, "MAX_ROWS", n)
+    index = categorize.get_index()
+    filler = categorize.CategoryIndex(
+        texts=[f"old note {i}" for i in range(n)] + index.texts,
+        vectors=np.vstack([_encode(["old note"] * n), index.vectors]),
+        counts=np.vstack([np.ones((n, len(index.labels)), dtype=np.float32), index.counts]),
+        labels=index.labels, watermark=index.watermark,
+    )
+    index = categorize._indexes[budget_db] = filler
+    done, errors = threading.Event(), []
+
+    def adder():
+        try:
+            for i in range(200):
+                with categorize._path_lock(budget_db):   # as sync_index runs
+                    index.add([f"shop {i} item{i % 7}", f"bill {i}"], [f"Cat{i % 40}", "Utilities"])
+        except Exception as e:
+            errors.append(e)
+        finally:
+            done.set()
+
+    switch = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)   # interleave the threads as finely as possible
+    try:
+        worker = threading.Thread(target=adder)
+        worker.start()
+        while not done.is_set():
+            try:
+                for category, conf in categorize.suggest_categories(["shop 5 item5", "bill 9", "bakery"]):
+                    assert category is not None and 0 <= conf <= 1
+            except Exception as e:
+                errors.append(e)
+                break
+        worker.join()
+    finally:
+        sys.setswitchinterval(switch)
+    assert not errors
+    assert len(index) == n and index.counts.shape == (n, len(index.labels))
@@ -0,0 +1,65 @@
+# tests/test_data_versions.py
+
+import os
+import importlib
+import sqlite3
+from streamlit.testing.v1 import AppTest
+from components import db
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+def test_data_version_sees_writes_from_other_connections(budget_db):
+    before = db.data_version()
+    other = sqlite3.connect(budget_db)   # e.g. the importer CLI in another process
+    other.execute("INSERT INTO expenses (amount, category, note) VALUES (5, 'Food', 'cli')")
+    other.commit()
+    other.close()
+    expenses, profiles, trades = db.data_version()
+    assert expenses != before[0]
+    assert (profiles, trades) == before[1:]   # only the table written moves
+
+    db.log_trade("AAPL", 0.4, "BUY", 1, "Conservative").result()
+    assert db.data_version("expenses", "trade_logs")[0] == expenses
+    assert db.data_version("trade_logs") != (trades,)
+
+def test_bulk_writes_bump_once(budget_db):
+    (before,) = db.data_version("expenses")
+    with db.get_connection() as conn:
+        db.bulk_insert_expenses(conn, [(1.0, "Food", f"row {i}", None, i) for i in range(50)])
+    assert db.data_version("expenses") == (before + 1,)
+    db.rebuild_rollup()
+    assert db.data_version("expenses") == (before + 2,)
+
+def test_trade_log_leaves_dashboard_cache_warm(budget_db, monkeypatch):
+    dashboard = importlib.import_module("views.dashboard")
+    db.add_financial_profile(5000, 3000, 9000, 18000, 36000, 0, 1000, 0).result()
+    summaries = []
+    get_summary = dashboard.get_summary
+    monkeypatch.setattr(dashboard, "get_summary", lambda *a: summaries.append(a) or get_summary(*a))
+    at = AppTest.from_file(APP, default_timeout=30)
+    at.session_state["selection"] = "Dashboard"
+    at.run()
+    assert not at.exception and len(summaries) == 1
+
+    db.log_trade("AAPL", 0.4, "BUY", 1, "Conservative").result()
+    at.run()
+    assert not at.exception and len(summaries) == 1   # every frame and figure still cached
+
+    db.add_expense(12.5, "Food", "lunch").result()
+    at.run()
+    assert len(summaries) == 2
+
+def test_file_version_sees_writes_from_other_connections(budget_db):
+    before = db.file_version()
+    assert db.file_version() == before   # reading does not move it
+
+    other = sqlite3.connect(budget_db)
+    other.execute("INSERT INTO trade_logs (symbol, units) VALUES ('AAPL', 1)")
+    other.commit()
+    other.close()
+    assert db.file_version() != before
+
+def test_file_version_is_not_reused_after_the_pool_closes(budget_db):
+    before = db.file_version()
+    db.close_pools()   # e.g. evicted from the open-databases LRU
+    assert db.file_version() != before
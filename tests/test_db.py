@@ -0,0 +1,114 @@
+# tests/test_db.py
+
+import sqlite3
+from contextlib import contextmanager
+import pytest
+from components import db
+
+INSERT = "INSERT INTO expenses (amount, category, note) VALUES (?, ?, ?)"
+
+# ─── Write-behind queue ────────────────────────────────────────────────────────
+
+@pytest.fixture
+def transactions(monkeypatch):
+    """Counts the connections (one transaction each) the writer checks out."""
+    opened = []
+    get_connection = db.get_connection
+    @contextmanager
+    def counting(*args, **kwargs):
+        opened.append(args)
+        with get_connection(*args, **kwargs) as conn:
+            yield conn
+    monkeypatch.setattr(db, "get_connection", counting)
+    return opened
+
+def _count(sql="SELECT COUNT(*) FROM expenses"):
+    with db.get_connection() as conn:
+        return conn.execute(sql).fetchone()[0]
+
+def test_queued_writes_are_group_committed(budget_db, transactions):
+    writer = db.WriteQueue(batch_ms=200)
+    futures = [writer.submit(INSERT, (i, "Food", f"lunch {i}")) for i in range(5)]
+    ids = [f.result(timeout=5) for f in futures]
+    writer.close()
+    assert ids == list(range(ids[0], ids[0] + 5))   # lastrowid, in submission order
+    assert len(transactions) == 1
+    assert _count() == 5
+
+def test_failing_write_fails_only_its_own_future(budget_db):
+    writer = db.WriteQueue(batch_ms=200)
+    good = writer.submit(INSERT, (1, "Food", "before"))
+    bad  = writer.submit(INSERT, (2, None, "no category"))   # NOT NULL
+    last = writer.submit(INSERT, (3, "Food", "after"))
+    writer.close()
+    assert isinstance(bad.exception(timeout=5), sqlite3.IntegrityError)
+    assert good.result() and last.result()
+    assert _count() == 2
+    assert db.verify_rollup().empty   # the failed row's trigger work was rolled back too
+
+def test_results_are_row_ids_and_counts(budget_db):
+    writer = db.WriteQueue()
+    first = writer.submit(INSERT, (5, "Food", "a")).result(timeout=5)
+    writer.submit(INSERT, (6, "Food", "b")).result(timeout=5)
+    assert writer.submit("UPDATE expenses SET note = 'c' WHERE amount > 0").result(timeout=5) == 2
+    assert writer.submit("DELETE FROM expenses WHERE id = ?", (first,)).result(timeout=5) == 1
+    assert writer.submit("DELETE FROM expenses WHERE id = ?", (first,)).result(timeout=5) == 0
+    writer.close()
+
+def test_stop_writer_commits_what_is_queued(budget_db, monkeypatch):
+    monkeypatch.setattr(db, "WRITE_BEHIND", True)
+    monkeypatch.setattr(db, "_writer", db.WriteQueue(batch_ms=1000))   # still batching when stopped
+    futures = [db.add_expense(i, "Food", f"queued {i}") for i in range(3)]
+    db.stop_writer()
+    assert all(f.done() and f.exception() is None for f in futures)
+    assert _count() == 3
+    assert db._writer is None
+
+# ─── Connection pool ───────────────────────────────────────────────────────────
+
+def test_closed_pool_does_not_reopen_its_watch_connection(budget_db):
+    pool = db.get_pool()
+    pool.file_version()
+    db.close_pools()   # e.g. evicted between get_pool() and file_version()
+    assert pool.file_version() is None and pool._watch is None
+    assert db.get_pool() is not pool and db.file_version() is not None
+
+# ─── Queries ───────────────────────────────────────────────────────────────────
+
+def test_expenses_page_walks_every_row_once(budget_db):
+    # 23 rows over 4 timestamps: pages end in the middle of runs of equal dates
+    with db.get_connection() as conn:
+        db.bulk_insert_expenses(conn, [
+            (i, "Food" if i % 3 else "Rent", f"row {i}", f"2024-05-0{1 + i % 4} 12:00:00", None)
+            for i in range(23)
+        ])
+    seen, cursor, pages = [], None, 0
+    while True:
+        page, cursor = db.get_expenses_page(page_size=5, cursor=cursor)
+        seen += list(zip(page["created_at"], page["id"]))
+        pages += 1
+        if cursor is None:
+            break
+    assert pages == 5
+    assert len(seen) == len(set(seen)) == 23
+    assert seen == sorted(seen, reverse=True)   # newest first, ties by id
+
+    last = (f"{seen[-1][0]:%Y-%m-%d %H:%M:%S}", int(seen[-1][1]))
+    page, cursor = db.get_expenses_page(page_size=5, cursor=last)
+    assert page.empty and cursor is None
+
+    rent, cursor = db.get_expenses_page(page_size=50, category="Rent")
+    assert len(rent) == 8 and set(rent["category"]) == {"Rent"} and cursor is None
+
+def test_onboarding_saved_once_per_submission(budget_db):
+    expenses = [{"amount": 1200.0, "category": "Rent", "note": "lease"},
+                {"amount": 80.0, "category": "Food"}]
+    args = (5000, 300, 900, 1800, 3600, 10_000, 0, expenses)
+    assert db.save_onboarding("form-1", *args) is True
+    versions = db.data_version()
+    assert db.save_onboarding("form-1", *args) is False   # e.g. a double-clicked submit
+    assert _count("SELECT COUNT(*) FROM financial_profiles") == 1
+    assert _count() == 2
+    assert db.data_version() == versions   # nothing written at all
+    assert db.save_onboarding("form-2", *args) is True
+    assert _count() == 4
@@ -0,0 +1,102 @@
+# tests/test_forecast.py
+
+import threading
+import time
+import numpy as np
+import pandas as pd
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from components import forecast
+from components.cache import TTLCache
+
+def test_seasonal_smoothing_flat_series():
+    y = np.full((24, 3), [100.0, 50.0, 0.0])
+    out = forecast.seasonal_smoothing(y, horizon=6)
+    assert out.shape == (6, 3)
+    np.testing.assert_allclose(out, np.broadcast_to([100.0, 50.0, 0.0], (6, 3)), atol=1e-6)
+
+def test_seasonal_smoothing_repeats_the_season():
+    season = 100 + 50 * np.sin(2 * np.pi * np.arange(12) / 12)
+    y = np.tile(season, 4)[:, None]
+    out = forecast.seasonal_smoothing(y, horizon=12)[:, 0]
+    np.testing.assert_allclose(out, season, rtol=0.05)
+
+def test_seasonal_smoothing_edges():
+    assert forecast.seasonal_smoothing(np.empty((0, 2)), horizon=4).tolist() == [[0.0, 0.0]] * 4
+    falling = np.linspace(100, 0, 12)[:, None]
+    assert (forecast.seasonal_smoothing(falling, horizon=24) >= 0).all()
+
+def test_goal_progress():
+    months = pd.date_range("2025-01-01", periods=forecast.MAX_HORIZON, freq="MS")
+    projected = pd.DataFrame({"Food": 300.0, "Rent": 1200.0}, index=months)
+    profile = {"after_tax_income": 2000, "goal_1m": 250, "goal_3m": 0, "goal_6m": 6000, "goal_1y": None}
+    progress = forecast.goal_progress(profile, projected).set_index("horizon")
+    assert progress["projected_spending"].tolist() == [1500, 4500, 9000, 18000]
+    assert progress["projected_surplus"].tolist() == [500, 1500, 3000, 6000]
+    assert progress.loc["1m", "attainment"] == 2.0
+    assert progress.loc["6m", "attainment"] == 0.5
+    assert progress.loc[["3m", "1y"], "attainment"].isna().all()   # no goal set
+
+# ─── Prophet fingerprint cache ─────────────────────────────────────────────────
+# Fits run on a thread pool with a stand-in for _fit_prophet, so neither
+# Prophet nor worker processes are needed.
+
+@pytest.fixture
+def fits(tmp_path, monkeypatch):
+    calls, release = [], threading.Event()
+    behaviour = {"fail": False, "block": False}
+    def fake_fit(category, months, values, horizon):
+        calls.append(category)
+        if behaviour["block"]:
+            release.wait(5)
+        if behaviour["fail"]:
+            raise RuntimeError("fit diverged")
+        return "{}", [float(np.mean(values))] * horizon
+    pool = ThreadPoolExecutor(max_workers=4)
+    monkeypatch.setattr(forecast, "CACHE_PATH", str(tmp_path / "forecast_cache.db"))
+    monkeypatch.setattr(forecast, "_fit_prophet", fake_fit)
+    monkeypatch.setattr(forecast, "_executor", lambda reset=False: pool)
+    monkeypatch.setattr(forecast, "_fitting", {})
+    monkeypatch.setattr(forecast, "_failed", TTLCache(maxsize=16, ttl=60))
+    yield calls, behaviour
+    release.set()
+    pool.shutdown(wait=True)
+
+def _history(scale: float = 1.0) -> pd.DataFrame:
+    months = pd.date_range("2024-01-01", periods=12, freq="MS")
+    return pd.DataFrame({"Food": 100.0 * scale, "Rent": 1000.0}, index=months)
+
+def _wait_until_idle():
+    deadline = time.monotonic() + 5
+    while forecast._fitting and time.monotonic() < deadline:
+        time.sleep(0.01)
+
+def test_fits_are_cached_by_fingerprint(fits):
+    calls, _ = fits
+    out, pending = forecast.prophet_forecast(_history(), timeout=5)
+    assert (sorted(out), pending, sorted(calls)) == (["Food", "Rent"], 0, ["Food", "Rent"])
+    _wait_until_idle()
+    out, pending = forecast.prophet_forecast(_history(), timeout=5)
+    assert (out["Food"][0], pending, len(calls)) == (100.0, 0, 2)   # both from the cache
+
+    out, _ = forecast.prophet_forecast(_history(scale=2), timeout=5)
+    assert out["Food"][0] == 200.0
+    assert calls[2:] == ["Food"]   # only the changed series is refitted
+
+def test_failed_fits_are_not_pending_or_retried(fits):
+    calls, behaviour = fits
+    behaviour["fail"] = True
+    out, pending = forecast.prophet_forecast(_history(), timeout=5)
+    assert (out, pending) == ({}, 0)
+    _wait_until_idle()
+    assert forecast.prophet_forecast(_history(), timeout=5) == ({}, 0)
+    assert len(calls) == 2
+
+def test_running_fits_are_polled_not_waited_for(fits):
+    calls, behaviour = fits
+    behaviour["block"] = True
+    assert forecast.prophet_forecast(_history(), timeout=0.05) == ({}, 2)
+    start = time.perf_counter()
+    assert forecast.prophet_forecast(_history(), timeout=5) == ({}, 2)
+    assert time.perf_counter() - start < 1
+    assert len(calls) == 2   # not resubmitted
@@ -0,0 +1,56 @@
+# tests/test_importer.py
+
+import io
+import sqlite3
+from components import db, importer
+
+STMTTRN = ("<STMTTRN><TRNTYPE>DEBIT</TRNTYPE><DTPOSTED>2024010{day}120000</DTPOSTED>"
+           "<TRNAMT>-{day}.50</TRNAMT><NAME>Shop {day}</NAME><MEMO>card</MEMO></STMTTRN>")
+
+def _ofx(separator: str) -> io.StringIO:
+    body = separator.join(STMTTRN.format(day=d) for d in range(1, 6))
+    return io.StringIO(f"<OFX><BANKTRANLIST>{body}</BANKTRANLIST></OFX>")
+
+def test_read_ofx_one_record_per_line():
+    rows = next(importer.read_ofx(_ofx("\n")))
+    assert rows["note"].tolist() == [f"Shop {d} card" for d in range(1, 6)]
+
+def test_read_ofx_single_line():
+    rows = next(importer.read_ofx(_ofx("")))
+    assert len(rows) == 5
+    assert rows["amount"].tolist() == [f"-{d}.50" for d in range(1, 6)]
+    assert rows["date"].iloc[0] == "2024-01-01 12:00:00"
+
+def test_read_ofx_sgml():
+    sgml = io.StringIO("<STMTTRN>\n<DTPOSTED>20240102\n<TRNAMT>-3.25\n<NAME>Bakery\n</STMTTRN>\n")
+    rows = next(importer.read_ofx(sgml))
+    assert rows.to_dict("records") == [{"date": "2024-01-02 00:00:00", "amount": "-3.25", "note": "Bakery"}]
+
+def test_import_file_skips_duplicates(budget_db):
+    first = importer.import_file(_ofx(""), kind="ofx", path=budget_db)
+    again = importer.import_file(_ofx(""), kind="ofx", path=budget_db)
+    assert (first["inserted"], again["inserted"], again["duplicates"]) == (5, 0, 5)
+    assert db.verify_rollup().empty
+
+def test_bulk_insert_survives_concurrent_commit(budget_db):
+    # Another connection tries to commit between the dedup read and the first
+    # write; it must wait for the import rather than make the import's lock
+    # upgrade fail with "database is locked"
+    conn = sqlite3.connect(budget_db)
+    other = sqlite3.connect(budget_db, timeout=0)
+    blocked = []
+    def interleave(sql):
+        if sql.startswith("UPDATE rollup_state"):
+            try:
+                other.execute("INSERT INTO expenses (amount, category, note) VALUES (1, 'Food', 'other')")
+                other.commit()
+            except sqlite3.OperationalError:
+                other.rollback()
+                blocked.append(sql)
+    conn.set_trace_callback(interleave)
+    rows = [(float(d), "Food", f"Shop {d}", f"2024-01-0{d} 12:00:00", d) for d in range(1, 6)]
+    assert db.bulk_insert_expenses(conn, rows) == 5
+    conn.commit()
+    conn.close(), other.close()
+    assert blocked
+    assert db.verify_rollup().empty
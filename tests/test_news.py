@@ -0,0 +1,97 @@
+# tests/test_news.py
+
+import time
+import threading
+from http.server import BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+import pytest
+from components import news
+from components.cache import TTLCache
+
+LATENCY = 0.2   # seconds per response, like a slow upstream
+
+class RssStub(BaseHTTPRequestHandler):
+    """RSS search endpoint with ETags; `failing` makes every request a 500."""
+
+    failing = False
+    requests, not_modified = [], 0
+    lock = threading.Lock()
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        time.sleep(LATENCY)
+        query = parse_qs(urlparse(self.path).query)["q"][0]
+        etag  = f'"{abs(hash(query))}"'
+        with self.lock:
+            type(self).requests.append(query)
+        if type(self).failing:
+            self.send_response(500)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.headers.get("If-None-Match") == etag:
+            with self.lock:
+                type(self).not_modified += 1
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        name  = query.split(" stock")[0]
+        items = "".join(f"<item><title>{name} headline {i}</title><link>https://example.com/{i}</link></item>"
+                        for i in range(8))
+        body  = f'<?xml version="1.0"?><rss version="2.0"><channel>{items}</channel></rss>'.encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/rss+xml")
+        self.send_header("ETag", etag)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+@pytest.fixture
+def rss(http_stub, monkeypatch):
+    RssStub.failing, RssStub.requests, RssStub.not_modified = False, [], 0
+    monkeypatch.setattr(news, "NEWS_URL", http_stub(RssStub) + "/rss?q={query}")
+    monkeypatch.setattr(news, "_feed_state", TTLCache(maxsize=64))
+    return RssStub
+
+SYMBOLS = ["AAPL", "TSLA", "AMZN", "META", "GOOG", "SPY", "NVDA", "TQQQ"]
+
+def test_fetch_news_many_runs_in_parallel(rss):
+    start = time.perf_counter()
+    results = news.fetch_news_many(SYMBOLS)
+    elapsed = time.perf_counter() - start
+
+    assert list(results) == SYMBOLS
+    assert results["AAPL"][0]["title"] == "Apple headline 0"
+    assert all(len(items) == 5 for items in results.values())
+    assert len(rss.requests) == len(SYMBOLS)
+    assert elapsed < len(SYMBOLS) * LATENCY / 2   # sequential fetching would take 1.6 s
+
+def test_fresh_feeds_are_served_from_memory(rss):
+    news.fetch_news_many(SYMBOLS)
+    start = time.perf_counter()
+    again = news.fetch_news_many(SYMBOLS)
+    assert time.perf_counter() - start < LATENCY
+    assert len(rss.requests) == len(SYMBOLS)
+    assert again["TSLA"][0]["title"] == "Tesla headline 0"
+
+def test_stale_feeds_are_revalidated_with_etag(rss, monkeypatch):
+    first = news.fetch_news("NVDA")
+    monkeypatch.setattr(news, "FEED_TTL", 0)
+    assert news.fetch_news("NVDA") == first
+    assert (len(rss.requests), rss.not_modified) == (2, 1)
+
+def test_failed_first_fetch_is_not_cached(rss):
+    rss.failing = True
+    assert news.fetch_news("META") == []
+    rss.failing = False
+    assert news.fetch_news("META")[0]["title"] == "Meta headline 0"
+    assert len(rss.requests) == 2
+
+def test_failure_after_success_keeps_last_headlines(rss, monkeypatch):
+    first = news.fetch_news("SPY")
+    monkeypatch.setattr(news, "FEED_TTL", 0)
+    rss.failing = True
+    assert news.fetch_news("SPY") == first
@@ -0,0 +1,41 @@
+# tests/test_performance_page.py
+
+import os
+import pytest
+from streamlit.testing.v1 import AppTest
+from components import advisor, metrics, prices
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+@pytest.fixture
+def page(budget_db, monkeypatch):
+    monkeypatch.setattr(metrics, "ENABLED", False)
+    def open_page():
+        at = AppTest.from_file(APP, default_timeout=30)
+        at.query_params["page"] = "performance"
+        at.run()
+        assert not at.exception
+        return at
+    return open_page
+
+def test_controls_hidden_without_admin_flag(page, monkeypatch):
+    monkeypatch.setattr(metrics, "ADMIN", False)
+    at = page()
+    assert not at.toggle
+    assert "Reset" not in [b.label for b in at.button]
+
+def test_admin_can_toggle_and_reset(page, monkeypatch):
+    monkeypatch.setattr(metrics, "ADMIN", True)
+    at = page()
+    assert "Reset" in [b.label for b in at.button]
+    at.toggle[0].set_value(True).run()
+    assert metrics.ENABLED
+
+def test_fetch_price_is_timed(monkeypatch):
+    monkeypatch.setattr(metrics, "ENABLED", True)
+    prices.set_price_source(prices.StubSource())
+    try:
+        advisor.fetch_price("AAPL")
+    finally:
+        prices.set_price_source(None)
+    assert metrics.snapshot()["advisor.fetch_price"]["count"] >= 1
@@ -0,0 +1,56 @@
+# tests/test_pipeline.py
+
+import time
+from components.pipeline import analyze_watchlist
+
+LATENCY = 0.2
+SYMBOLS = [f"SYM{i}" for i in range(20)]
+
+def _news(sym):
+    time.sleep(LATENCY)
+    if sym == "QUIET":
+        return []
+    return [{"title": f"{sym} headline {i}", "link": "", "source": ""} for i in range(3)]
+
+def _prices(syms):
+    time.sleep(LATENCY)
+    return {s: 50.0 for s in syms if s != "NOPRICE"}
+
+def _score(by_symbol):
+    return {s: {"scores": [0.5] * len(t), "sentiment": -0.5 if s == "NOPRICE" else 0.5}
+            for s, t in by_symbol.items()}
+
+def _run(symbols, logged):
+    return list(analyze_watchlist(symbols, "Conservative", 1000.0, 0.0, fetch_news=_news,
+                                  score_symbols=_score, get_prices=_prices, log_trades=logged.append))
+
+def test_watchlist_finishes_in_about_one_network_call():
+    logged = []
+    start = time.perf_counter()
+    events = _run(SYMBOLS, logged)
+    elapsed = time.perf_counter() - start
+
+    assert elapsed < 2 * LATENCY   # not 20 feeds + 20 quotes in sequence
+    news = [e for e in events if e[0] == "news"]
+    results = {sym: r for kind, sym, r in events if kind == "result"}
+    assert sorted(sym for _, sym, _ in news) == sorted(SYMBOLS)
+    assert events.index(news[-1]) < len(news)   # every feed is reported before any result
+    assert list(results) == SYMBOLS
+    assert results["SYM0"]["price"] == 50.0 and results["SYM0"]["units"] > 0
+    assert len(logged) == 1 and len(logged[0]) == len(SYMBOLS)   # one transaction
+
+def test_symbols_without_news_or_price():
+    logged = []
+    events = _run(["QUIET", "NOPRICE", "SYM1"], logged)
+    results = {sym: r for kind, sym, r in events if kind == "result"}
+    assert ("news", "QUIET", []) in events
+    assert set(results) == {"NOPRICE", "SYM1"}
+    assert results["NOPRICE"]["recommendation"] == "No price data for NOPRICE"
+    assert [row[0] for row in logged[0]] == ["NOPRICE", "SYM1"]
+
+def test_failed_feed_yields_no_news():
+    def broken(sym):
+        raise OSError("feed down")
+    events = list(analyze_watchlist(["SYM1"], "Aggressive", 1000.0, 0.0, fetch_news=broken,
+                                    score_symbols=_score, get_prices=_prices, log_trades=print))
+    assert events == [("news", "SYM1", [])]
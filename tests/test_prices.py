@@ -0,0 +1,85 @@
+# tests/test_prices.py
+
+import sqlite3
+import types
+import pandas as pd
+import pytest
+from components import cache, prices
+from components.cache import TTLCache
+
+class LockCheckingSource(prices.StubSource):
+    """Records whether the store could be written while each download ran."""
+
+    def __init__(self, path):
+        super().__init__()
+        self.path = path
+        self.writable = []
+
+    def bars(self, symbol, start, end=None):
+        conn = sqlite3.connect(self.path, timeout=0)
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            conn.rollback()
+            self.writable.append(True)
+        except sqlite3.OperationalError:   # database is locked
+            self.writable.append(False)
+        finally:
+            conn.close()
+        return super().bars(symbol, start, end)
+
+@pytest.fixture
+def source(tmp_path, monkeypatch):
+    path = str(tmp_path / "prices.db")
+    monkeypatch.setattr(prices, "STORE_PATH", path)
+    source = LockCheckingSource(path)
+    prices.set_price_source(source)
+    yield source
+    prices.set_price_source(None)
+
+def test_sync_downloads_only_missing_bars(source, monkeypatch):
+    assert prices.sync_history("AAPL", "7d") == 1
+    assert prices.sync_history("AAPL", "7d") == 0   # up to date
+
+    monkeypatch.setattr(prices, "SYNC_INTERVAL", 0)
+    assert prices.sync_history("AAPL", "1mo") == 2   # older backfill plus the forward refresh
+    bars = prices.read_history("AAPL", f"{pd.Timestamp.today() - pd.Timedelta(days=25):%Y-%m-%d}")
+    assert len(bars) > 10
+
+def test_downloads_run_outside_the_write_transaction(source, monkeypatch):
+    prices.sync_history("TSLA", "7d")
+    monkeypatch.setattr(prices, "SYNC_INTERVAL", 0)
+    prices.sync_history("TSLA", "3mo")
+    assert source.writable == [True, True, True]
+
+class QuoteSource(prices.StubSource):
+    """Records each batch of symbols asked for; knows nothing about NOPE."""
+
+    def __init__(self):
+        super().__init__()
+        self.batches = []
+
+    def latest_closes(self, symbols):
+        self.batches.append(list(symbols))
+        return {sym: price for sym, price in super().latest_closes(symbols).items() if sym != "NOPE"}
+
+def test_quotes_are_batched_and_reused_within_the_ttl(monkeypatch):
+    now = [0.0]
+    monkeypatch.setattr(cache, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    monkeypatch.setattr(prices, "_quotes", TTLCache(maxsize=16, ttl=60))
+    source = QuoteSource()
+    prices.set_price_source(source)
+    try:
+        quotes = prices.get_prices(["aapl", "MSFT", "AAPL", "NOPE"])
+        assert list(quotes) == ["AAPL", "MSFT"]   # unknown symbols left out
+        assert source.batches == [["AAPL", "MSFT", "NOPE"]]   # one call, duplicates folded
+
+        now[0] = 59
+        assert prices.get_prices(["MSFT", "AAPL"]) == {"MSFT": quotes["MSFT"], "AAPL": quotes["AAPL"]}
+        assert prices.get_prices(["AAPL", "TSLA"])["AAPL"] == quotes["AAPL"]
+        assert source.batches[1:] == [["TSLA"]]   # only the uncached symbol is fetched
+
+        now[0] = 61   # AAPL and MSFT expired, TSLA still fresh
+        prices.get_prices(["AAPL", "MSFT", "TSLA"])
+        assert source.batches[2:] == [["AAPL", "MSFT"]]
+    finally:
+        prices.set_price_source(None)
@@ -0,0 +1,53 @@
+# tests/test_query_plans.py
+# The dashboard's hot queries must be answered from their indexes. The SQL
+# is captured from the real helpers, then run through EXPLAIN QUERY PLAN.
+
+from datetime import datetime
+import pytest
+from components import db, synthetic
+
+@pytest.fixture(scope="module")
+def plans(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("plans") / "budget.db")
+    synthetic.generate(path, expenses=20_000, trades=2_000, years=2, end="2024-06-30")
+    statements = []
+    hooks = list(db._connect_hooks)
+    db.close_pools()
+    db.on_connect(lambda conn: conn.set_trace_callback(statements.append))
+    try:
+        with db.database(path):
+            def plan_of(call, table):
+                statements.clear()
+                call()
+                sql = [s for s in statements if s.lstrip().upper().startswith("SELECT") and table in s]
+                assert len(sql) == 1, sql
+                return db.explain(sql[0])
+            yield plan_of
+    finally:
+        db._connect_hooks[:] = hooks
+        db.close_pools()
+
+def test_windowed_summary_uses_created_at_index(plans):
+    plan = plans(lambda: db.get_summary(datetime(2024, 3, 5), datetime(2024, 4, 9)), "expenses")
+    assert plan[0].startswith("SEARCH expenses USING COVERING INDEX idx_expenses_created_at")
+    # Grouping by category needs a temp B-tree over the window; ordering the result must not
+    assert not any("ORDER BY" in step for step in plan)
+
+def test_whole_month_summary_reads_the_rollup(plans):
+    plan = plans(lambda: db.get_summary(*db.month_window(datetime(2024, 3, 15))), "expense_rollup")
+    assert plan[0].startswith("SEARCH expense_rollup USING PRIMARY KEY (month>? AND month<?)")
+    assert not any("ORDER BY" in step for step in plan)
+
+def test_latest_profile_walks_the_index(plans):
+    plan = plans(db.get_latest_profile, "financial_profiles")
+    assert plan == ["SCAN financial_profiles USING INDEX idx_profiles_created_at"]
+
+def test_trade_log_walks_the_index(plans):
+    plan = plans(lambda: db.get_trade_logs(50), "trade_logs")
+    assert len(plan) == 1 and plan[0].startswith("SCAN trade_logs USING INDEX idx_trade_logs_")
+    assert not any("TEMP B-TREE" in step for step in plan)
+
+def test_summary_is_sorted_by_amount(plans):
+    total, count, grouped = db.get_summary(datetime(2024, 1, 1), datetime(2024, 6, 17))
+    assert grouped["amount"].is_monotonic_decreasing
+    assert count > 0 and total == pytest.approx(grouped["amount"].sum())
@@ -0,0 +1,33 @@
+# tests/test_search.py
+
+from components import db
+
+def _load(notes):
+    with db.get_connection() as conn:
+        db.bulk_insert_expenses(conn, [
+            (amount, "Food", note, f"2024-01-{day:02d} 12:00:00", None)
+            for day, (amount, note) in enumerate(notes, start=1)
+        ])
+
+def test_best_match_first(budget_db):
+    _load([(4.0, "coffee"), (5.0, "coffee beans coffee grinder"), (6.0, "tea")])
+    df = db.search_expenses("coffee")
+    assert df["note"].tolist()[0] == "coffee"
+    assert len(df) == 2 and df.attrs["all_ranked"]
+
+def test_common_terms_rank_only_recent_matches(budget_db, monkeypatch):
+    monkeypatch.setattr(db, "SEARCH_CANDIDATES", 5)
+    # The best match is the oldest row, outside the newest five candidates
+    _load([(9.0, "lunch")] + [(float(i), f"lunch with team {i}") for i in range(10)])
+    df = db.search_expenses("lunch")
+    assert not df.attrs["all_ranked"]
+    assert "lunch" not in df["note"].tolist()
+
+    # Filters that leave few enough matches rank every one of them
+    df = db.search_expenses("lunch", min_amount=8.5)
+    assert df.attrs["all_ranked"]
+    assert df["note"].tolist()[0] == "lunch"
+
+def test_no_query(budget_db):
+    df = db.search_expenses("  ")
+    assert df.empty and df.attrs["all_ranked"]
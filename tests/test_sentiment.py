@@ -0,0 +1,80 @@
+# tests/test_sentiment.py
+
+import pytest
+from components import cache, sentiment
+from components.cache import TTLCache
+from components.db import get_connection
+
+class FakeClock:
+    """Stands in for the time module: both clocks move only when told to."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def time(self):
+        return self.now
+
+    monotonic = time
+
+    def advance(self, seconds: float):
+        self.now += seconds
+
+@pytest.fixture
+def scorer(tmp_path, monkeypatch):
+    clock, calls = FakeClock(), []
+    def fake_model(texts, batch_size):
+        calls.append(list(texts))
+        return [len(t) % 5 / 2 - 1 for t in texts]
+    monkeypatch.setattr(sentiment, "time", clock)
+    monkeypatch.setattr(cache, "time", clock)
+    monkeypatch.setattr(sentiment, "CACHE_PATH", str(tmp_path / "sentiment_cache.db"))
+    monkeypatch.setattr(sentiment, "CACHE_TTL", 100)
+    monkeypatch.setattr(sentiment, "CACHE_MAX_ROWS", 4)
+    monkeypatch.setattr(sentiment, "_memory_cache", TTLCache(maxsize=3, ttl=100))
+    monkeypatch.setattr(sentiment, "_counters", {"disk_hits": 0, "misses": 0})
+    monkeypatch.setattr(sentiment, "_run_model", fake_model)
+    return clock, calls
+
+def _disk_rows() -> int:
+    with get_connection(sentiment.CACHE_PATH) as conn:
+        return conn.execute("SELECT COUNT(*) FROM sentiment_cache").fetchone()[0]
+
+def test_memory_then_disk_then_model(scorer):
+    _, calls = scorer
+    first = sentiment.score_batch(["Stocks rally", "stocks  RALLY", "Bank fails"])
+    assert calls == [["Stocks rally", "Bank fails"]]   # normalized duplicates scored once
+    assert first[0] == first[1]
+    assert sentiment.cache_stats() == {
+        "memory_hits": 0, "disk_hits": 0, "misses": 2, "memory_size": 2, "hit_rate": 0.0}
+
+    assert sentiment.score_batch(["Bank fails"]) == first[2:]
+    sentiment._memory_cache.clear()   # e.g. another worker process
+    assert sentiment.score_batch(["stocks rally"]) == first[:1]
+    stats = sentiment.cache_stats()
+    assert (stats["memory_hits"], stats["disk_hits"], stats["misses"]) == (1, 1, 2)
+    assert stats["hit_rate"] == 2 / 4
+    assert len(calls) == 1
+
+def test_entries_expire_after_the_ttl(scorer):
+    clock, calls = scorer
+    sentiment.score_batch(["Rates cut"])
+    clock.advance(99)
+    sentiment.score_batch(["Rates cut"])
+    assert len(calls) == 1
+    clock.advance(2)   # past the TTL in both layers
+    sentiment.score_batch(["Rates cut"])
+    assert len(calls) == 2
+    assert sentiment.cache_stats()["misses"] == 2
+
+def test_both_layers_are_size_bounded(scorer):
+    clock, calls = scorer
+    for i in range(6):
+        sentiment.score_batch([f"headline {i}"])
+        clock.advance(1)   # distinct created_at, so the oldest rows go first
+    assert sentiment.cache_stats()["memory_size"] == 3
+    assert _disk_rows() == 4
+    sentiment._memory_cache.clear()
+    sentiment.score_batch(["headline 5", "headline 2"])   # newest four kept on disk
+    assert len(calls) == 6
+    sentiment.score_batch(["headline 0"])   # evicted from both layers
+    assert len(calls) == 7
@@ -0,0 +1,24 @@
+# tests/test_synthetic.py
+
+import sqlite3
+import pytest
+from components import db, synthetic
+
+def test_generate_new_file(tmp_path):
+    path = str(tmp_path / "budget.db")
+    stats = synthetic.generate(path, expenses=5_000, trades=100, years=1, seed=1)
+    assert stats["expenses"] >= 5_000
+    with db.database(path):
+        assert db.verify_rollup().empty
+    assert sqlite3.connect(path).execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+def test_generate_refuses_existing_expenses(budget_db):
+    db.add_expense(12.5, "Food", "lunch")
+    with pytest.raises(ValueError):
+        synthetic.generate(budget_db, expenses=100, trades=10)
+    assert db.verify_rollup().empty
+    assert len(db.get_expenses()) == 1
+
+def test_generate_into_empty_existing_file(budget_db):
+    synthetic.generate(budget_db, expenses=2_000, trades=10, years=1)
+    assert db.verify_rollup().empty
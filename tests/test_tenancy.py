@@ -0,0 +1,23 @@
+# tests/test_tenancy.py
+
+import os
+from streamlit.testing.v1 import AppTest
+from components import tenancy
+
+APP = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "app.py")
+
+def test_tenant_path_ignores_case_and_spaces(tmp_path, monkeypatch):
+    monkeypatch.setattr(tenancy, "TENANTS_DIR", str(tmp_path))
+    path = tenancy.tenant_path("Alice@Example.com ")
+    assert path == tenancy.tenant_path("alice@example.com")
+    assert "alice" not in path
+
+def test_anonymous_session_gets_login_prompt_and_no_database(tmp_path, monkeypatch):
+    monkeypatch.setattr(tenancy, "TENANCY", "user")
+    monkeypatch.setattr(tenancy, "TENANTS_DIR", str(tmp_path))
+    at = AppTest.from_file(APP, default_timeout=30)
+    at.query_params["user"] = "someone@example.com"
+    at.run()
+    assert not at.exception
+    assert [b.label for b in at.button] == ["Log in"]
+    assert not any(files for _, _, files in os.walk(tmp_path))
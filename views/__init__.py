@@ -1,6 +1,20 @@
-from .dashboard     import run as dashboard
-from .finance_entry   import run as add_expense
-from .get_started   import run as get_started
-from .suggestions   import run as suggestions
-from .stock_tracker import run as stock_tracker
-from .chatbot       import run as chatbot
+# Pages are imported lazily (PEP 562) so that loading one view does not pull
+# in the heavy dependencies of every other view.
+import importlib
+
+_PAGES = {
+    "dashboard":     "dashboard",
+    "add_expense":   "finance_entry",
+    "get_started":   "get_started",
+    "suggestions":   "suggestions",
+    "stock_tracker": "stock_tracker",
+    "chatbot":       "chatbot",
+    "performance":   "performance",
+}
+
+def __getattr__(name):
+    if name in _PAGES:
+        run = importlib.import_module(f".{_PAGES[name]}", __name__).run
+        globals()[name] = run
+        return run
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
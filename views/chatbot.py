@@ -13,7 +13,6 @@ def run():
         if not user_input.strip():
             st.warning("Please enter a question.")
         else:
-            with st.spinner("Thinking…"):
-                answer = ask_budgetwise_ai(user_input)
             st.success("Here’s what I found:")
-            st.write(answer)
+            # Tokens are rendered as they arrive instead of after the full reply
+            st.write_stream(ask_budgetwise_ai(user_input, stream=True))
@@ -1,15 +1,76 @@
 import streamlit as st
 import plotly.express   as px
 import plotly.graph_objects as go
-from components.db      import get_summary, get_latest_profile
+from components import db
+from components.cache   import TTLCache, MISSING
+from components.db      import get_summary, get_latest_profile, month_window, data_version
+from components.forecast import forecast_spending, goal_progress
+
+# Frames and figures shared by every session, keyed on the data versions of
+# the tables they are built from: an unchanged rerun costs one version query
+# and no figure work. The versions count commits from every process (CLI
+# imports, rollup rebuilds, synthetic loads), and writes to other tables
+# (trade logs) leave the cache warm.
+_cache = TTLCache(maxsize=128)
+
+def _memo(key, build):
+    value = _cache.get(key)
+    if value is MISSING:
+        value = build()
+        _cache.set(key, value)
+    return value
+
+def _sankey_figure(grouped, remaining):
+    labels = ["Income"] + grouped["category"].tolist() + ["Remaining"]
+    sources = [0]*len(grouped) + [0]
+    targets = list(range(1,1+len(grouped))) + [len(grouped)+1]
+    values  = grouped["amount"].tolist() + [remaining]
+    fig = go.Figure(go.Sankey(
+        node=dict(label=labels, pad=15, thickness=20),
+        link=dict(source=sources, target=targets, value=values)
+    ))
+    fig.update_layout(template="plotly_white", height=350)
+    return fig
+
+def _bar_figure(grouped):
+    return px.bar(
+        grouped, x="category", y="amount",
+        labels={"amount":"Amount ($)","category":"Category"},
+        template="plotly_white",
+        color="amount", color_continuous_scale=px.colors.sequential.Plasma
+    )
+
+def _goal_figure(goal, total):
+    return px.bar(
+        x=["1‑Mo Goal","Actual Spending"],
+        y=[goal, total],
+        labels={"x":"","y":"Amount ($)"},
+        template="plotly_white"
+    )
+
+def _forecast_figure(forecast):
+    projected = forecast.reset_index().melt(
+        id_vars="month", var_name="category", value_name="amount"
+    )
+    return px.area(
+        projected, x="month", y="amount", color="category",
+        labels={"amount":"Projected ($)","month":""},
+        template="plotly_white"
+    )
 
 def run():
     st.header("Budget Dashboard Overview")
 
-    prof = get_latest_profile()
+    path = db.current_path()
+    v_expenses, v_profiles = data_version("expenses", "financial_profiles")
+    month_start, month_end = month_window()
+
+    prof = _memo(("profile", path, v_profiles), get_latest_profile)
     if prof is None:
         st.info("No financial profile found. Go to Get Started to set it up.")
         return
+    profile_key = (int(prof["id"]), v_profiles)
+    spending_key = (path, v_expenses, month_start)
 
     # Profile metrics
     st.subheader("Your Profile")
@@ -20,43 +81,59 @@ def run():
     st.markdown("---")
 
     # This month’s expenses
-    total, count, grouped = get_summary()
+    total, count, grouped = _memo(
+        ("summary", *spending_key), lambda: get_summary(month_start, month_end)
+    )
     remaining = max(prof["after_tax_income"] - total, 0.0)
 
     # Sankey chart
     st.subheader("Income Flow (Sankey)")
-    labels = ["Income"] + grouped["category"].tolist() + ["Remaining"]
-    sources = [0]*len(grouped) + [0]
-    targets = list(range(1,1+len(grouped))) + [len(grouped)+1]
-    values  = grouped["amount"].tolist() + [remaining]
-    fig_sankey = go.Figure(go.Sankey(
-        node=dict(label=labels, pad=15, thickness=20),
-        link=dict(source=sources, target=targets, value=values)
-    ))
-    fig_sankey.update_layout(template="plotly_white", height=350)
+    fig_sankey = _memo(
+        ("sankey", *spending_key, profile_key), lambda: _sankey_figure(grouped, remaining)
+    )
     st.plotly_chart(fig_sankey, use_container_width=True)
     st.markdown("---")
 
     # Bar chart
-    st.subheader("Spending by Category")
+    st.subheader(f"Spending by Category ({month_start:%B %Y})")
     if grouped.empty:
-        st.info("No expenses logged yet.")
+        st.info("No expenses logged this month.")
     else:
-        fig_bar = px.bar(
-            grouped, x="category", y="amount",
-            labels={"amount":"Amount ($)","category":"Category"},
-            template="plotly_white",
-            color="amount", color_continuous_scale=px.colors.sequential.Plasma
-        )
+        fig_bar = _memo(("bar", *spending_key), lambda: _bar_figure(grouped))
         st.plotly_chart(fig_bar, use_container_width=True)
     st.markdown("---")
 
     # Goal vs actual
     st.subheader("Goal vs. Actual (1‑Month)")
-    fig_goal = px.bar(
-        x=["1‑Mo Goal","Actual Spending"],
-        y=[prof["goal_1m"], total],
-        labels={"x":"","y":"Amount ($)"},
-        template="plotly_white"
+    fig_goal = _memo(
+        ("goal", *spending_key, profile_key), lambda: _goal_figure(prof["goal_1m"], total)
     )
     st.plotly_chart(fig_goal, use_container_width=True)
+    st.markdown("---")
+
+    # Forecast & goal outlook
+    st.subheader("Forecast & Goal Outlook")
+    forecast = _cache.get(("forecast", *spending_key))
+    if forecast is MISSING:
+        forecast = forecast_spending()
+    # While Prophet fits are still running, rebuild each rerun to pick them up
+    memo = _memo if not forecast.attrs["pending"] else (lambda key, build: build())
+    forecast = memo(("forecast", *spending_key), lambda: forecast)
+    progress = memo(
+        ("progress", *spending_key, profile_key), lambda: goal_progress(prof, forecast)
+    )
+    cols = st.columns(len(progress))
+    for col, row in zip(cols, progress.itertuples()):
+        col.metric(
+            f"{row.horizon} Goal",
+            f"{row.attainment:.0%}" if row.goal > 0 else "—",
+            f"${row.projected_surplus:,.0f} projected surplus",
+            delta_color="normal" if row.projected_surplus >= 0 else "inverse"
+        )
+    if forecast.columns.empty:
+        st.info("Log a few months of expenses to see a spending forecast.")
+    else:
+        fig_forecast = memo(("forecast_fig", *spending_key), lambda: _forecast_figure(forecast))
+        st.plotly_chart(fig_forecast, use_container_width=True)
+        models = sorted(set(forecast.attrs["methods"].values()))
+        st.caption(f"Projected from completed months using: {', '.join(models)}.")
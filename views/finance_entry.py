@@ -1,10 +1,16 @@
 # views/add_expense.py
 
+import sqlite3
 import streamlit as st
+from datetime import timedelta
 from components.db import (
-    add_expense, get_expenses, update_expense,
-    delete_expense, get_latest_profile, update_profile_savings_debt
+    add_expense, get_expenses_page, get_expense, search_expenses, update_expense,
+    delete_expense, get_latest_profile, update_profile_savings_debt, SEARCH_CANDIDATES
 )
+from components.importer import import_file
+from components.categorize import AUTO, resolve_category
+
+CATEGORIES = ["Food","Transport","Utilities","Entertainment","Rent","Other"]
 
 def run():
     st.header("Add & Manage Your Finances")
@@ -13,24 +19,114 @@ def run():
     st.subheader("➕ Add New Expense")
     with st.form("add_exp_form"):
         amt  = st.number_input("Amount ($)", min_value=0.01, format="%.2f")
-        cat  = st.selectbox("Category",
-            ["Food","Transport","Utilities","Entertainment","Rent","Other"]
-        )
+        cat  = st.selectbox("Category", CATEGORIES + [AUTO])
         note = st.text_input("Note (optional)")
         if st.form_submit_button("Add Expense"):
-            add_expense(amt, cat, note)
+            cat = resolve_category(cat, note)
+            add_expense(amt, cat, note).result()   # wait for the commit so the list below shows it
             st.success(f"Added ${amt:.2f} to {cat}")
     st.markdown("---")
 
-    # ─── 2) Edit / Delete Existing Expenses ─────────────────────────────────────
+    # ─── 2) Import Bank Statement ────────────────────────────────────────────────
+    st.subheader("📥 Import Statement (CSV / OFX)")
+    upload = st.file_uploader("Statement file", type=["csv", "ofx", "qfx"])
+    sign = st.radio(
+        "Amounts",
+        ["Only negative amounts are expenses", "Every row is an expense"],
+        horizontal=True
+    )
+    auto_cat = st.checkbox("Suggest categories from descriptions for uncategorized rows")
+    if upload is not None and st.button("Import Statement"):
+        bar = st.progress(0.0, text="Importing…")
+        size = max(upload.size, 1)
+        def progress(stats):
+            done = min(upload.tell() / size, 1.0) if not upload.closed else 1.0
+            bar.progress(done, text=f"{stats['read']:,} rows read, {stats['inserted']:,} added")
+        try:
+            stats = import_file(
+                upload,
+                sign="debits" if sign.startswith("Only") else "abs",
+                on_progress=progress,
+                categorize=auto_cat
+            )
+        except (ValueError, ImportError) as e:
+            st.error(str(e))
+        except sqlite3.OperationalError as e:
+            st.error(f"The database is busy ({e}). Rows already imported are kept; "
+                     "upload the file again to import the rest.")
+        else:
+            bar.progress(1.0, text="Done")
+            st.success(
+                f"Imported {stats['inserted']:,} expenses "
+                f"({stats['duplicates']:,} duplicates skipped, {stats['rejected']:,} invalid rows)."
+            )
+    st.markdown("---")
+
+    # ─── 3) Edit / Delete Existing Expenses ─────────────────────────────────────
     st.subheader("📝 Edit or Delete Expenses")
-    df = get_expenses()
-    if df.empty:
-        st.info("No expenses logged yet.")
+    s1, s2, s3 = st.columns([3, 1, 1])
+    query   = s1.text_input("Search notes", placeholder='e.g. coffee, groc*, "city transit"', key="exp_query")
+    min_amt = s2.number_input("Min ($)", min_value=0.0, value=None, format="%.2f", key="exp_min")
+    max_amt = s3.number_input("Max ($)", min_value=0.0, value=None, format="%.2f", key="exp_max")
+    f1, f2, f3 = st.columns([2, 2, 1])
+    dates     = f1.date_input("Date range", value=(), key="exp_dates")
+    category  = f2.selectbox("Category filter", ["All"] + CATEGORIES, key="exp_category")
+    page_size = f3.selectbox("Rows", [25, 50, 100], key="exp_page_size")
+    start = dates[0] if len(dates) > 0 else None
+    end   = dates[1] + timedelta(days=1) if len(dates) > 1 else None
+
+    if query.strip():
+        # Ranked search replaces paging while there is a query
+        df = search_expenses(
+            query,
+            limit=page_size,
+            start=start,
+            end=end,
+            min_amount=min_amt,
+            max_amount=max_amt,
+            category=None if category == "All" else category
+        )
+        if df.empty:
+            st.info("No matching expenses.")
+        else:
+            if not df.attrs["all_ranked"]:
+                st.caption(
+                    f"Best of the {SEARCH_CANDIDATES:,} most recent matches. "
+                    "Narrow by date, amount or category to rank every match."
+                )
+            st.dataframe(df[["id","amount","category","note","created_at"]], width=700)
     else:
-        st.dataframe(df[["id","amount","category","note","created_at"]], width=700)
+        # Cursors of the pages visited so far; reset whenever the filters change
+        filters = (start, end, category, page_size)
+        if st.session_state.get("exp_filters") != filters:
+            st.session_state.exp_filters = filters
+            st.session_state.exp_cursors = [None]
+        cursors = st.session_state.exp_cursors
+
+        df, next_cursor = get_expenses_page(
+            page_size,
+            cursor=cursors[-1],
+            start=start,
+            end=end,
+            category=None if category == "All" else category
+        )
+        if df.empty:
+            st.info("No expenses logged yet." if len(cursors) == 1 else "No more expenses.")
+        else:
+            st.dataframe(df[["id","amount","category","note","created_at"]], width=700)
+        p1, p2, p3 = st.columns([1, 1, 4])
+        if p1.button("◀ Newer", disabled=len(cursors) == 1):
+            cursors.pop()
+            st.rerun()
+        if p2.button("Older ▶", disabled=next_cursor is None):
+            cursors.append(next_cursor)
+            st.rerun()
+        p3.caption(f"Page {len(cursors)}")
+
+    if not df.empty:
         selected_id = st.selectbox("Expense ID to Edit", df["id"].tolist())
-        exp = df[df["id"] == selected_id].iloc[0]
+        exp = get_expense(selected_id)
+        options = CATEGORIES if exp["category"] in CATEGORIES else CATEGORIES + [exp["category"]]
         with st.form("edit_form"):
             new_amt  = st.number_input(
                 "Amount ($)",
@@ -39,20 +135,19 @@ def run():
             )
             new_cat  = st.selectbox(
                 "Category",
-                ["Food","Transport","Utilities","Entertainment","Rent","Other"],
-                index=["Food","Transport","Utilities","Entertainment","Rent","Other"]
-                    .index(exp["category"])
+                options,
+                index=options.index(exp["category"])
             )
             new_note = st.text_input("Note", value=exp["note"] or "")
             if st.form_submit_button("Save Changes"):
-                update_expense(selected_id, new_amt, new_cat, new_note)
+                update_expense(selected_id, new_amt, new_cat, new_note).result()
                 st.success("Expense updated.")
         if st.button("Delete Expense"):
-            delete_expense(selected_id)
+            delete_expense(selected_id).result()
             st.success("Expense deleted.")
     st.markdown("---")
 
-    # ─── 3) Update Savings & Debt ────────────────────────────────────────────────
+    # ─── 4) Update Savings & Debt ────────────────────────────────────────────────
     st.subheader("💾 Update Savings & Debt")
     prof = get_latest_profile()
     if prof is not None:
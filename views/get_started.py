@@ -1,10 +1,12 @@
 # views/get_started.py
 
+import uuid
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-from components.db import add_financial_profile
+from components.db import save_onboarding
 from components.ai_chatbot import ask_financial_profile
+from components.categorize import AUTO, resolve_category
 
 def go_to_dashboard():
     """Switch back to Dashboard."""
@@ -25,7 +27,8 @@ def run():
         ("expenses_list", []),
         ("savings", 0.0),
         ("debt", 0.0),
-        ("ai_advice", "")
+        ("ai_advice", ""),
+        ("submission_id", uuid.uuid4().hex)
     ]:
         if key not in st.session_state:
             st.session_state[key] = default
@@ -36,6 +39,8 @@ def run():
     def prev_step():
         if st.session_state.step > 0:
             st.session_state.step -= 1
+            # Going back to edit makes the next save a new submission
+            st.session_state.submission_id = uuid.uuid4().hex
 
     steps = [
         "Enter your monthly after‑tax income",
@@ -81,13 +86,13 @@ def run():
             amt  = st.number_input("Amount ($)", min_value=0.01, format="%.2f", key="gs_amt")
             cat  = st.selectbox(
                 "Category",
-                ["Food","Transport","Utilities","Entertainment","Rent","Other"],
+                ["Food","Transport","Utilities","Entertainment","Rent","Other", AUTO],
                 key="gs_cat"
             )
             note = st.text_input("Note (optional)", key="gs_note")
             if st.form_submit_button("Add Expense"):
                 st.session_state.expenses_list.append({
-                    "amount": amt, "category": cat, "note": note
+                    "amount": amt, "category": resolve_category(cat, note), "note": note
                 })
 
         if st.session_state.expenses_list:
@@ -143,9 +148,10 @@ def run():
         )
         st.plotly_chart(fig, use_container_width=True)
 
-        # AI summary
+        # AI summary, streamed as it is generated
         if st.button("Get AI Recommendations"):
-            st.session_state.ai_advice = ask_financial_profile(
+            st.subheader("AI Budget Plan & Tips")
+            st.session_state.ai_advice = st.write_stream(ask_financial_profile(
                 st.session_state.income,
                 st.session_state.g1m,
                 st.session_state.g3m,
@@ -153,31 +159,30 @@ def run():
                 st.session_state.g1y,
                 total_expenses,
                 st.session_state.savings,
-                st.session_state.debt
-            )
-
-        if st.session_state.ai_advice:
+                st.session_state.debt,
+                stream=True
+            ))
+        elif st.session_state.ai_advice:
             st.subheader("AI Budget Plan & Tips")
             st.write(st.session_state.ai_advice)
 
-        # Save profile + immediate rerun
+        # Save profile + every listed expense in one transaction
         if st.button("Save Profile"):
-            add_financial_profile(
+            saved = save_onboarding(
+                st.session_state.submission_id,
                 st.session_state.income,
                 st.session_state.g1m,
                 st.session_state.g3m,
                 st.session_state.g6m,
                 st.session_state.g1y,
-                total_expenses,
                 st.session_state.savings,
-                st.session_state.debt
+                st.session_state.debt,
+                st.session_state.expenses_list
             )
-            st.success("Profile saved!")
-            # attempt to force a rerun, but if not available, swallow the AttributeError
-            try:
-                st.experimental_rerun()
-            except AttributeError:
-                pass
+            if saved:
+                st.success("Profile saved!")
+            else:
+                st.info("This profile has already been saved.")
 
         # Return home
         st.button("Return to Dashboard", on_click=go_to_dashboard)
@@ -0,0 +1,53 @@
+# views/performance.py
+
+import pandas as pd
+import streamlit as st
+from components import metrics
+
+def run():
+    st.subheader("⏱️ Performance")
+
+    if metrics.ADMIN:
+        enabled = st.toggle("Collect timings", value=metrics.ENABLED)
+        if enabled != metrics.ENABLED:
+            metrics.enable(enabled)
+    else:
+        st.write(f"Collecting timings: **{'on' if metrics.ENABLED else 'off'}**")
+    st.caption(
+        "Timings are kept in memory for this server process. "
+        "Set BUDGETWISE_METRICS=1 to collect from startup, and "
+        "BUDGETWISE_METRICS_ADMIN=1 to switch collection and reset it here."
+    )
+
+    # ─── Timers ──────────────────────────────────────────────────────────────────
+    stats = metrics.snapshot()
+    if stats:
+        df = pd.DataFrame.from_dict(stats, orient="index").sort_values("total_s", ascending=False)
+        st.dataframe(
+            df[["count", "total_s", "mean_ms", "p50_ms", "p95_ms", "p99_ms", "max_ms"]].round(2),
+            width=900
+        )
+    else:
+        st.info("No timings recorded yet.")
+
+    # ─── Slow queries ────────────────────────────────────────────────────────────
+    st.markdown(f"#### 🐢 Slow queries (≥ {metrics.SLOW_QUERY_MS:.0f} ms)")
+    slow = metrics.slow_queries()
+    if slow:
+        df = pd.DataFrame(slow)
+        df["at"] = pd.to_datetime(df["at"], unit="s")
+        df["ms"] = df["ms"].round(1)
+        st.dataframe(df[["at", "ms", "sql"]], width=900)
+    else:
+        st.info("No slow queries logged.")
+
+    # ─── Export ──────────────────────────────────────────────────────────────────
+    c1, c2, c3, c4 = st.columns(4)
+    c1.download_button("Prometheus", metrics.to_prometheus(), "budgetwise_metrics.prom", "text/plain")
+    c2.download_button("JSON", metrics.to_json(), "budgetwise_metrics.json", "application/json")
+    if metrics.ADMIN and c3.button("Reset"):
+        metrics.reset()
+        st.rerun()
+    if c4.button("Close"):
+        del st.query_params["page"]
+        st.rerun()
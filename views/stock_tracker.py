@@ -1,10 +1,9 @@
 # views/stock_tracker.py
 
 import streamlit as st
-import yfinance as yf
-from components.news      import fetch_news
-from components.sentiment import aggregate_scores
-from components.advisor   import recommend_trade
+from components.pipeline  import analyze_watchlist
+from components.sentiment import cache_stats
+from components.prices    import get_history, PERIODS
 from components.db        import get_latest_profile
 
 def run():
@@ -13,15 +12,15 @@ def run():
     # — Existing price chart UI —
     with st.form("stock_form"):
         symbol = st.text_input("Enter Stock Symbol (e.g., AAPL, TSLA)")
+        period = st.selectbox("Range", list(PERIODS.keys()))
         submitted = st.form_submit_button("Track")
         if submitted and symbol:
-            ticker = yf.Ticker(symbol.upper())
-            hist = ticker.history(period="7d")
+            hist = get_history(symbol.upper(), period=period)
             if hist.empty:
                 st.error("No data found for this symbol.")
             else:
                 st.line_chart(hist["Close"])
-                st.success(f"Showing last 7 days of {symbol.upper()} prices.")
+                st.success(f"Showing last {period} of {symbol.upper()} prices.")
 
     # — AI Trade Advisor —
     st.markdown("---")
@@ -41,33 +40,44 @@ def run():
     mode    = st.radio("Risk Mode", ["Conservative", "Aggressive"])
 
     if st.button("Analyze & Recommend"):
-        for sym in [s.strip().upper() for s in symbols.split(",")]:
-            st.subheader(sym)
-            st.write("Fetching news…")
-            headlines = fetch_news(sym)
+        syms = [s.strip().upper() for s in symbols.split(",") if s.strip()]
 
-            if not headlines:
-                st.warning("No recent news for " + sym)
-                continue
+        # One section per symbol, filled in as the pipeline reports progress
+        status, links = {}, {}
+        for sym in dict.fromkeys(syms):
+            st.subheader(sym)
+            status[sym] = st.empty()
+            status[sym].write("Fetching news…")
+            links[sym] = st.container()
 
-            # Compute sentiment over just the headlines
-            sentiment = aggregate_scores([h["title"] for h in headlines])
-            st.write(f"Sentiment score (–1 to +1): **{sentiment:.2f}**")
+        events = analyze_watchlist(
+            syms,
+            mode,
+            st.session_state.income,
+            st.session_state.savings
+        )
+        for kind, sym, payload in events:
+            if kind == "news":
+                if not payload:
+                    status[sym].warning("No recent news for " + sym)
+                    continue
+                status[sym].write("Scoring sentiment…")
 
-            # Get buy/sell recommendation
-            rec, units = recommend_trade(
-                sym,
-                sentiment,
-                mode,
-                st.session_state.income,
-                st.session_state.savings
-            )
-            st.write(f"**Recommendation:** {rec}")
+                # Show the latest headlines as clickable links
+                with links[sym]:
+                    st.markdown("**Latest headlines:**")
+                    for h in payload:
+                        if h.get("source"):
+                            st.markdown(f"- [{h['title']}]({h['link']}) — *{h['source']}*")
+                        else:
+                            st.markdown(f"- [{h['title']}]({h['link']})")
+            else:
+                with status[sym].container():
+                    st.write(f"Sentiment score (–1 to +1): **{payload['sentiment']:.2f}**")
+                    st.write(f"**Recommendation:** {payload['recommendation']}")
 
-            # Show the latest headlines as clickable links
-            st.markdown("**Latest headlines:**")
-            for h in headlines:
-                if h.get("source"):
-                    st.markdown(f"- [{h['title']}]({h['link']}) — *{h['source']}*")
-                else:
-                    st.markdown(f"- [{h['title']}]({h['link']})")
+        stats = cache_stats()
+        st.caption(
+            f"Sentiment cache: {stats['memory_hits'] + stats['disk_hits']} hits, "
+            f"{stats['misses']} misses ({stats['hit_rate']:.0%} hit rate)"
+        )